@@ -5,14 +5,11 @@ from scipy.interpolate import Rbf
 from mathutils import Vector
 import matplotlib.pyplot as plt
 from scipy.spatial.distance import pdist
+from ..attribute_store import object_properties, object_values
 
 def get_unique_properties(collection):
-    unique_props = set()
-    for obj in collection.all_objects:
-        for key in obj.keys():
-            if key not in {'_RNA_UI', 'cycles'}:
-                unique_props.add(key)
-    return list(unique_props)
+    # Custom properties of the objects and the columns of the attribute stores they reference
+    return object_properties(collection.all_objects)
 
 def update_properties_list(self, context):
     props = context.scene.interpolated_volume_tool
@@ -103,8 +100,12 @@ class IMPORT_OT_generate_interpolated_block(bpy.types.Operator):
 
             x, y, z, d = [], [], [], []
 
-            for obj in collection.all_objects:
-                if props.data_property not in obj.keys():
+            # The value of each object from its custom property or its attribute store row, None for
+            # objects without one
+            objects = list(collection.all_objects)
+            values = object_values(objects, props.data_property, numbers=True)
+            for obj, d_value in zip(objects, values):
+                if d_value is None:
                     continue
 
                 if obj.type == 'CURVE':
@@ -121,17 +122,15 @@ class IMPORT_OT_generate_interpolated_block(bpy.types.Operator):
                 else:
                     continue
                 
-                try:
-                    d_value = float(obj[props.data_property])
-                    
-                    x.append(coords[0])
-                    y.append(coords[1])
-                    z.append(coords[2])
-                    d.append(d_value)
-                except (ValueError, TypeError):
+                if np.isnan(d_value):
                     self.report({'WARNING'}, f"Skipping object {obj.name} due to non-numeric data.")
                     continue
 
+                x.append(coords[0])
+                y.append(coords[1])
+                z.append(coords[2])
+                d.append(d_value)
+
             if not x:
                 self.report({'ERROR'}, "No valid data points found in the collection.")
                 return {'CANCELLED'}
@@ -6,14 +6,11 @@ from scipy.interpolate import Rbf
 from skimage.measure import marching_cubes
 from mathutils import Vector
 from scipy.spatial.distance import pdist
+from ..attribute_store import object_properties, object_values
 
 def get_unique_properties(collection):
-    unique_props = set()
-    for obj in collection.all_objects:
-        for key in obj.keys():
-            if key not in {'_RNA_UI', 'cycles'}:
-                unique_props.add(key)
-    return list(unique_props)
+    # Custom properties of the objects and the columns of the attribute stores they reference
+    return object_properties(collection.all_objects)
 
 def update_properties_list(self, context):
     props = context.scene.grade_shell_tool
@@ -100,8 +97,12 @@ class IMPORT_OT_generate_grade_shell_mesh(bpy.types.Operator):
 
             x, y, z, d = [], [], [], []
 
-            for obj in collection.all_objects:
-                if props.data_property not in obj.keys():
+            # The value of each object from its custom property or its attribute store row, None for
+            # objects without one
+            objects = list(collection.all_objects)
+            values = object_values(objects, props.data_property, numbers=True)
+            for obj, d_value in zip(objects, values):
+                if d_value is None:
                     continue
 
                 if obj.type == 'CURVE':
@@ -119,17 +120,15 @@ class IMPORT_OT_generate_grade_shell_mesh(bpy.types.Operator):
                     continue
 
                 # Ensures the data is convertible to float before appending
-                try:
-                    d_value = float(obj[props.data_property])
-                    
-                    x.append(coords[0])
-                    y.append(coords[1])
-                    z.append(coords[2])
-                    d.append(d_value)
-                except (ValueError, TypeError):
+                if np.isnan(d_value):
                     self.report({'WARNING'}, f"Skipping object {obj.name} due to non-numeric data.")
                     continue
 
+                x.append(coords[0])
+                y.append(coords[1])
+                z.append(coords[2])
+                d.append(d_value)
+
             if not x:
                 self.report({'ERROR'}, "No valid data points found in the collection.")
                 return {'CANCELLED'}
@@ -1,5 +1,6 @@
 import bpy
 from . import preferences  
+from . import attribute_store
 
 bl_info = {
     "name": "GeoModeller",
@@ -73,6 +74,7 @@ def register():
     
     
     preferences.register()
+    attribute_store.register()
 
     from .Drilling import bldesurvey
     from .Drilling import import_drill_holes  
@@ -123,6 +125,7 @@ def unregister():
             pass
     
     preferences.unregister()
+    attribute_store.unregister()
 
     from .Drilling import bldesurvey
     from .Drilling import import_drill_holes  
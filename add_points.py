@@ -1,22 +1,18 @@
 import bpy
-import csv
+import numpy as np
+import os
 from mathutils import Vector
 from bpy_extras.io_utils import ImportHelper
 from bpy.types import Operator, Panel
 from bpy.props import EnumProperty, StringProperty
-from ..preferences import get_preferences
+from ..preferences import get_preferences, copy_preferences
+from ..data_io import read_arrays, read_table_columns, skipped_rows_message, duplicate_points_message, TABLE_FILTER_GLOB
+from ..attribute_store import save_store, link_row, link_point_cloud
+from ..modal_import import ModalImport
 
-# Global variables to hold CSV data
-csv_data_points = []
+# Column names of the loaded file, the rows are only read when importing
 csv_columns_points = []
 
-def read_csv_points(filepath):
-    global csv_columns_points, csv_data_points
-    with open(filepath, newline='') as csvfile:
-        reader = csv.DictReader(csvfile)
-        csv_columns_points = reader.fieldnames
-        csv_data_points = [row for row in reader]
-
 def get_csv_column_names_points(self, context):
     return [(col, col, "") for col in csv_columns_points]
 
@@ -40,12 +36,13 @@ class PointsRenderPanel(bpy.types.Panel): # UI Panel
                 for col_name in ['x', 'y', 'z']:
                     prop_name = f"csv_column_{col_name}_points"
                     layout.prop(context.scene, prop_name, text=col_name.capitalize())
+            layout.prop(context.scene, "points_import_mode")
             layout.operator("import_points.create_points", text="Import Points", icon='PLAY')
 
 class LoadCSVOperatorPoints(bpy.types.Operator, ImportHelper): # load CSV
     bl_idname = "import_points.load_csv"
     bl_label = "Load CSV"
-    filter_glob: bpy.props.StringProperty(default="*.csv", options={'HIDDEN'}, maxlen=255)
+    filter_glob: bpy.props.StringProperty(default=TABLE_FILTER_GLOB, options={'HIDDEN'}, maxlen=255)
 
     def execute(self, context):
         context.scene.csv_file_path_points = self.filepath
@@ -84,31 +81,136 @@ def duplicate_sphere(template_sphere, location, name="Point"):
     bpy.context.collection.objects.link(new_sphere)
     return new_sphere
 
-def create_sphere(location, name, row_data, template_sphere, collection):
+def create_sphere(location, name, template_sphere, collection):
+    # The row values are read from the attribute store row the sphere references
     sphere = duplicate_sphere(template_sphere, location, name)
-
-    # Add custom properties based on CSV column headers and row data
-    for key, value in row_data.items():
-        sphere[key] = value
-    
     collection.objects.link(sphere)
     bpy.context.collection.objects.unlink(sphere)
     return sphere
 
-def read_csv_data_points(file_path, x_col, y_col, z_col):
-    data = []
-    with open(file_path, 'r') as file:
-        csv_reader = csv.DictReader(file)
-        for row in csv_reader:
-            x, y, z = float(row[x_col]), float(row[y_col]), float(row[z_col])
-            row_data = {key: row[key] for key in row}
-            row_data.update({
-                x_col: x,
-                y_col: y,
-                z_col: z
-            })
-            data.append(row_data)
-    return data
+def read_point_arrays(file_path, x_col, y_col, z_col, preferences=None, skipped=None, cancel=None):
+    # CSV, NPZ, Parquet or Feather as typed columns (see read_arrays); rows without coordinates are skipped
+    # (and counted in skipped).
+    # preferences: the add-on preferences, a copy of them when reading on a background thread
+    preferences = preferences or get_preferences()
+    return read_arrays(file_path, [x_col, y_col, z_col], workers=preferences.import_workers, skipped=skipped, cancel=cancel)
+
+INSTANCE_NODE_GROUP = "Point Sphere Instances"
+POINT_MATERIAL = "PointAttributeMaterial"
+
+def get_point_material():
+    # One material for every instanced sphere, coloured by the 'color' attribute of its point
+    material = bpy.data.materials.get(POINT_MATERIAL)
+    if material is None:
+        material = bpy.data.materials.new(name=POINT_MATERIAL)
+        material.use_nodes = True
+        nodes = material.node_tree.nodes
+        attribute = nodes.new("ShaderNodeAttribute")
+        attribute.attribute_type = 'INSTANCER'
+        attribute.attribute_name = "color"
+        attribute.location = (-300, 300)
+        material.node_tree.links.new(attribute.outputs["Color"], nodes["Principled BSDF"].inputs["Base Color"])
+    return material
+
+def get_instance_node_group():
+    # Shared Geometry Nodes tree that puts a sphere instance on every point. The sphere radius is the
+    # Radius input times the 'radius' attribute of the point (when there is one). Points whose
+    # 'visible' attribute is false (written by the point data query) get no sphere.
+    node_group = bpy.data.node_groups.get(INSTANCE_NODE_GROUP)
+    if node_group is not None:
+        return node_group
+
+    node_group = bpy.data.node_groups.new(INSTANCE_NODE_GROUP, 'GeometryNodeTree')
+    node_group.interface.new_socket(name="Geometry", in_out='INPUT', socket_type='NodeSocketGeometry')
+    radius_socket = node_group.interface.new_socket(name="Radius", in_out='INPUT', socket_type='NodeSocketFloat')
+    radius_socket.default_value = 1.0
+    radius_socket.min_value = 0.0
+    node_group.interface.new_socket(name="Geometry", in_out='OUTPUT', socket_type='NodeSocketGeometry')
+
+    nodes = node_group.nodes
+    links = node_group.links
+    group_input = nodes.new("NodeGroupInput")
+    sphere = nodes.new("GeometryNodeMeshUVSphere")
+    sphere.inputs["Segments"].default_value = 16
+    sphere.inputs["Rings"].default_value = 8
+    sphere.inputs["Radius"].default_value = 1.0
+    set_material = nodes.new("GeometryNodeSetMaterial")
+    set_material.inputs["Material"].default_value = get_point_material()
+    radius_attribute = nodes.new("GeometryNodeInputNamedAttribute")
+    radius_attribute.data_type = 'FLOAT'
+    radius_attribute.inputs["Name"].default_value = "radius"
+    radius_switch = nodes.new("GeometryNodeSwitch")
+    radius_switch.input_type = 'FLOAT'
+    radius_switch.inputs["False"].default_value = 1.0
+    radius_scale = nodes.new("ShaderNodeMath")
+    radius_scale.operation = 'MULTIPLY'
+    visible_attribute = nodes.new("GeometryNodeInputNamedAttribute")
+    visible_attribute.data_type = 'BOOLEAN'
+    visible_attribute.inputs["Name"].default_value = "visible"
+    visible_switch = nodes.new("GeometryNodeSwitch")
+    visible_switch.input_type = 'BOOLEAN'
+    visible_switch.inputs["False"].default_value = True
+    instance_on_points = nodes.new("GeometryNodeInstanceOnPoints")
+    group_output = nodes.new("NodeGroupOutput")
+
+    group_input.location = (0, 0)
+    sphere.location = (0, -200)
+    set_material.location = (200, -200)
+    radius_attribute.location = (0, -450)
+    radius_switch.location = (200, -450)
+    radius_scale.location = (400, -450)
+    visible_attribute.location = (200, 250)
+    visible_switch.location = (400, 250)
+    instance_on_points.location = (600, 0)
+    group_output.location = (800, 0)
+
+    links.new(group_input.outputs[0], instance_on_points.inputs["Points"])
+    links.new(sphere.outputs["Mesh"], set_material.inputs["Geometry"])
+    links.new(set_material.outputs["Geometry"], instance_on_points.inputs["Instance"])
+    links.new(radius_attribute.outputs["Exists"], radius_switch.inputs["Switch"])
+    links.new(radius_attribute.outputs["Attribute"], radius_switch.inputs["True"])
+    links.new(radius_switch.outputs[0], radius_scale.inputs[0])
+    links.new(group_input.outputs[1], radius_scale.inputs[1])
+    links.new(radius_scale.outputs[0], instance_on_points.inputs["Scale"])
+    links.new(visible_attribute.outputs["Exists"], visible_switch.inputs["Switch"])
+    links.new(visible_attribute.outputs["Attribute"], visible_switch.inputs["True"])
+    links.new(visible_switch.outputs[0], instance_on_points.inputs["Selection"])
+    links.new(instance_on_points.outputs["Instances"], group_output.inputs[0])
+    return node_group
+
+def set_point_attributes(mesh, columns):
+    # Column values as point attributes: numbers as float attributes, text as integer codes with the
+    # strings for the codes in a custom property of the mesh under the column name
+    for col, values in columns.items():
+        if isinstance(values, tuple):
+            attribute = mesh.attributes.new(name=col, type='INT', domain='POINT')
+            attribute.data.foreach_set('value', values[0].astype(np.int32))
+            mesh[col] = list(values[1])
+        else:
+            attribute = mesh.attributes.new(name=col, type='FLOAT', domain='POINT')
+            attribute.data.foreach_set('value', values.astype(np.float32))
+
+def create_point_cloud(name, columns, x_col, y_col, z_col, collection):
+    # Every row as a vertex of one mesh, drawn as sphere instances by the shared node group
+    xyz = np.column_stack((columns[x_col], columns[y_col], columns[z_col]))
+    if len(xyz):
+        top = np.argmax(xyz[:, 2])
+        offset = calculate_offset_points([{x_col: xyz[top, 0], y_col: xyz[top, 1], z_col: xyz[top, 2]}], x_col, y_col, z_col)
+        xyz = xyz + offset
+
+    mesh = bpy.data.meshes.new(name)
+    mesh.vertices.add(len(xyz))
+    mesh.vertices.foreach_set("co", xyz.astype(np.float32).ravel())
+    set_point_attributes(mesh, {col: values for col, values in columns.items() if col not in (x_col, y_col, z_col)})
+    mesh.update()
+
+    cloud = bpy.data.objects.new(name, mesh)
+    modifier = cloud.modifiers.new(name="Point Sphere Instances", type='NODES')
+    node_group = get_instance_node_group()
+    modifier.node_group = node_group
+    modifier[node_group.interface.items_tree["Radius"].identifier] = get_viewport_clip_end() * 0.0012  # same size as the spheres
+    collection.objects.link(cloud)
+    return cloud
 
 def calculate_offset_points(data, x_col, y_col, z_col):
     # Access the add-on preferences
@@ -138,61 +240,94 @@ def calculate_offset_points(data, x_col, y_col, z_col):
 
 def update_csv_columns_points(filepath):
     try:
-        with open(filepath, newline='') as csvfile:
-            reader = csv.DictReader(csvfile)
-            global csv_columns_points
-            csv_columns_points = reader.fieldnames
-            items = [(col, col, "") for col in csv_columns_points]
-            for col_name in ['x', 'y', 'z']:
-                prop_name = f"csv_column_{col_name}_points"
-                setattr(bpy.types.Scene, prop_name, bpy.props.EnumProperty(items=items, name=col_name.capitalize()))
+        global csv_columns_points
+        csv_columns_points = read_table_columns(filepath)
+        items = [(col, col, "") for col in csv_columns_points]
+        for col_name in ['x', 'y', 'z']:
+            prop_name = f"csv_column_{col_name}_points"
+            setattr(bpy.types.Scene, prop_name, bpy.props.EnumProperty(items=items, name=col_name.capitalize()))
     except Exception as e:
         print("Failed to read CSV columns:", e)
 
-class IMPORT_OT_create_points(bpy.types.Operator):
+class IMPORT_OT_create_points(ModalImport, bpy.types.Operator):
     bl_idname = "import_points.create_points"
     bl_label = "Create Points"
     bl_options = {'REGISTER', 'UNDO'}
+    import_label = "Importing points"
 
-    def execute(self, context):
+    def check_inputs(self, context):
         # get filepath and column identifiers from the scene properties
-        filepath = context.scene.csv_file_path_points
-        x_col = context.scene.csv_column_x_points
-        y_col = context.scene.csv_column_y_points
-        z_col = context.scene.csv_column_z_points
+        self.filepath = context.scene.csv_file_path_points
+        self.x_col = context.scene.csv_column_x_points
+        self.y_col = context.scene.csv_column_y_points
+        self.z_col = context.scene.csv_column_z_points
+        self.import_mode = context.scene.points_import_mode
+        self.preferences = copy_preferences()
 
         
-        if not filepath:
+        if not self.filepath:
             self.report({'ERROR'}, "No file selected.")
-            return {'CANCELLED'}
-        if not all([x_col, y_col, z_col]):
+            return False
+        if not all([self.x_col, self.y_col, self.z_col]):
             self.report({'ERROR'}, "One or more column identifiers are missing.")
-            return {'CANCELLED'}
-
-        
-        try:
-            data = read_csv_data_points(filepath, x_col, y_col, z_col)
-            offset = calculate_offset_points(data, x_col, y_col, z_col)
-            
-            # Create a template sphere
-            template_sphere = create_template_sphere()
-            
-            # Create a new collection for the points
-            points_collection_name = "Points Collection"
-            points_collection = bpy.data.collections.new(points_collection_name)
+            return False
+        return True
+
+    def read_data(self):
+        self.skipped = {}
+        return read_point_arrays(self.filepath, self.x_col, self.y_col, self.z_col, self.preferences, self.skipped, self.cancel)
+
+    def check_data(self, data):
+        # Rows left out while reading and points that repeat, before anything is created
+        skipped = skipped_rows_message(self.skipped, [self.x_col, self.y_col, self.z_col])
+        xyz = np.column_stack((data[self.x_col], data[self.y_col], data[self.z_col]))
+        if not len(xyz):
+            raise ValueError(f"No rows with valid coordinates in {os.path.basename(self.filepath)}. {skipped}".strip())
+        return [message for message in [skipped, duplicate_points_message(xyz)] if message]
+
+    def create_geometry(self, context, data):
+        x_col, y_col, z_col = self.x_col, self.y_col, self.z_col
+        if self.import_mode == 'POINT_CLOUD':
+            points_collection = bpy.data.collections.new("Points Collection")
             bpy.context.scene.collection.children.link(points_collection)
-
-            for row_data in data:
-                location = (row_data[x_col] + offset[0], row_data[y_col] + offset[1], row_data[z_col] + offset[2])
-                name = f"Point_{row_data[x_col]}_{row_data[y_col]}_{row_data[z_col]}"
-                create_sphere(location, name, row_data, template_sphere, points_collection)
-
-            bpy.data.objects.remove(template_sphere)  # Remove the template sphere after creating all points
-
-            return {'FINISHED'}
-        except Exception as e:
-            self.report({'ERROR'}, str(e))
-            return {'CANCELLED'}
+            self.created.append(points_collection)
+            cloud = create_point_cloud("Point Cloud", data, x_col, y_col, z_col, points_collection)
+            self.created.append(cloud)
+            # The columns as they are, the vertices of the cloud are the rows in order
+            store_path = save_store(data, points_collection.name)
+            self.created_stores.append(store_path)
+            link_point_cloud(cloud, store_path)
+            yield len(data[x_col]), len(data[x_col])
+            return
+
+        xyz = np.column_stack((data[x_col], data[y_col], data[z_col]))
+        top = np.argmax(xyz[:, 2])
+        offset = calculate_offset_points([{x_col: xyz[top, 0], y_col: xyz[top, 1], z_col: xyz[top, 2]}], x_col, y_col, z_col)
+        
+        # Create a template sphere
+        template_sphere = create_template_sphere()
+        self.created.append(template_sphere)
+        
+        # Create a new collection for the points
+        points_collection_name = "Points Collection"
+        points_collection = bpy.data.collections.new(points_collection_name)
+        bpy.context.scene.collection.children.link(points_collection)
+        self.created.append(points_collection)
+
+        # The columns as they are, each point references the row it was made from
+        store_path = save_store(data, points_collection.name)
+        self.created_stores.append(store_path)
+
+        for row, (x, y, z) in enumerate(xyz.tolist()):
+            location = (x + offset[0], y + offset[1], z + offset[2])
+            name = f"Point_{x}_{y}_{z}"
+            sphere = create_sphere(location, name, template_sphere, points_collection)
+            self.created.append(sphere)
+            link_row(sphere, store_path, row)
+            yield row + 1, len(xyz)
+
+        self.created.remove(template_sphere)
+        bpy.data.objects.remove(template_sphere)  # Remove the template sphere after creating all points
 
 def register():
     bpy.utils.register_class(PointsRenderPanel)
@@ -202,6 +337,15 @@ def register():
     bpy.types.Scene.csv_column_x_points = bpy.props.EnumProperty(items=get_csv_column_names_points, name="X")
     bpy.types.Scene.csv_column_y_points = bpy.props.EnumProperty(items=get_csv_column_names_points, name="Y")
     bpy.types.Scene.csv_column_z_points = bpy.props.EnumProperty(items=get_csv_column_names_points, name="Z")
+    bpy.types.Scene.points_import_mode = bpy.props.EnumProperty(
+        name="Import As",
+        description="How the points are created in the scene",
+        items=[
+            ('SPHERES', "Sphere per Point", "One sphere object per row, the row values in an attribute store each sphere references"),
+            ('POINT_CLOUD', "Instanced Point Cloud", "One mesh with a vertex per row and the row values as point attributes, drawn as sphere instances by Geometry Nodes, for large data sets")
+        ],
+        default='SPHERES'
+    )
     
 
 def unregister():
@@ -212,6 +356,7 @@ def unregister():
     del bpy.types.Scene.csv_column_x_points
     del bpy.types.Scene.csv_column_y_points
     del bpy.types.Scene.csv_column_z_points
+    del bpy.types.Scene.points_import_mode
     
 
 if __name__ == "__main__":
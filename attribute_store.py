@@ -0,0 +1,329 @@
+import os
+import shutil
+import tempfile
+import uuid
+
+import bpy
+import numpy as np
+import pandas as pd
+
+from .data_io import write_npz_arrays, read_npz_arrays
+
+
+# Custom properties on the object data (curve or mesh) that point an imported object at its row of
+# the dataset's attribute store. They sit on the data rather than the object so they never show up
+# in the property lists the tools build from obj.keys().
+STORE_PROP = "attribute_store"
+ROW_PROP = "row_index"
+
+# Custom property of the meshes of the Mesh per Hole and Tubes per Hole imports: the columns stored
+# as edge attributes, the rows of a hole being its edges
+HOLE_COLUMNS_PROP = "hole_columns"
+
+# Custom property of the mesh of an Instanced Point Cloud import: its vertices are the rows of the
+# store, in order
+POINT_CLOUD_PROP = "point_cloud"
+
+# Custom properties every interval curve gets, the structural and GemPy tools read them
+ORIENTATION_PROPERTIES = ['polarity', 'azimuth', 'dip']
+
+# Values the tools treat as no data
+MISSING_VALUES = ['', 'N/A']
+
+# Stores read in this session, by file path
+stores = {}
+
+# Where the stores of a .blend file that has not been saved yet are written until its first save
+TEMP_STORE_DIRECTORY = os.path.join(tempfile.gettempdir(), "attribute_stores")
+
+
+class AttributeStore:
+    # The columns of one imported dataset in the read_arrays layout: float64 arrays, or (codes, strings)
+    # pairs of int32 codes into the column's unique strings. Objects reference rows by index.
+
+    def __init__(self, columns):
+        self.columns = columns
+        self.number_tables = {}  # per text column, each unique string as a number (NaN if it is not one)
+
+    def column_names(self):
+        return list(self.columns)
+
+    def numbers(self, col, rows):
+        # Values of the rows as floats, NaN where a value is missing or not a number
+        values = self.columns[col]
+        if not isinstance(values, tuple):
+            return values[rows]
+        codes, strings = values
+        if col not in self.number_tables:
+            table = pd.to_numeric(pd.Series(strings, dtype=object), errors='coerce').to_numpy(dtype=float)
+            self.number_tables[col] = np.append(table, np.nan)  # code -1 (missing) reads the last entry
+        return self.number_tables[col][codes[rows]]
+
+    def text(self, col, rows):
+        # Values of the rows as strings, '' where a value is missing
+        values = self.columns[col]
+        if isinstance(values, tuple):
+            codes, strings = values
+            return np.array(list(strings) + [''], dtype=object)[codes[rows]]
+        numbers = values[rows]
+        return np.where(np.isnan(numbers), '', numbers.astype(str)).astype(object)
+
+    def present(self, col, rows):
+        # Mask of the rows that hold a value
+        return ~np.isin(self.text(col, rows), MISSING_VALUES)
+
+
+def store_directory():
+    # Next to the .blend file when it has been saved, so the stores travel with it
+    if bpy.data.filepath:
+        directory = os.path.join(os.path.dirname(bpy.data.filepath), "attribute_stores")
+    else:
+        directory = TEMP_STORE_DIRECTORY
+    os.makedirs(directory, exist_ok=True)
+    return directory
+
+
+def save_store(columns, name):
+    # Writes the columns of a new dataset and returns the path the objects reference
+    file_name = f"{bpy.path.clean_name(name)}_{uuid.uuid4().hex[:8]}.npz"
+    file_path = os.path.join(store_directory(), file_name)
+    write_npz_arrays(columns, file_path)
+    stores[file_path] = AttributeStore(columns)
+    return file_path
+
+
+def get_store(file_path):
+    if file_path not in stores:
+        if not file_path or not os.path.exists(file_path):
+            return None
+        stores[file_path] = AttributeStore(read_npz_arrays(file_path))
+    return stores[file_path]
+
+
+def remove_store(file_path):
+    # Deletes the file of a store nothing references anymore, e.g. the store of a cancelled import
+    stores.pop(file_path, None)
+    if os.path.exists(file_path):
+        os.remove(file_path)
+
+
+@bpy.app.handlers.persistent
+def move_temporary_stores(filepath):
+    # Save handler: on the first save of a .blend file, moves the stores written to the temp directory
+    # next to it and points the objects at the new paths before they are written, so the stores are
+    # still found once the temp directory is cleared
+    if not filepath:
+        return
+    directory = os.path.join(os.path.dirname(filepath), "attribute_stores")
+    moved = {}
+    for data in list(bpy.data.curves) + list(bpy.data.meshes):
+        old_path = data.get(STORE_PROP)
+        if not old_path or os.path.dirname(old_path) != TEMP_STORE_DIRECTORY:
+            continue
+        if old_path not in moved:
+            if not os.path.exists(old_path):
+                continue
+            os.makedirs(directory, exist_ok=True)
+            moved[old_path] = os.path.join(directory, os.path.basename(old_path))
+            shutil.move(old_path, moved[old_path])
+            if old_path in stores:
+                stores[moved[old_path]] = stores.pop(old_path)
+        data[STORE_PROP] = moved[old_path]
+
+
+def register():
+    bpy.app.handlers.save_pre.append(move_temporary_stores)
+
+
+def unregister():
+    if move_temporary_stores in bpy.app.handlers.save_pre:
+        bpy.app.handlers.save_pre.remove(move_temporary_stores)
+
+
+def link_row(obj, store_path, row):
+    obj.data[STORE_PROP] = store_path
+    obj.data[ROW_PROP] = row
+
+
+def collection_store(collection, obj_type):
+    # (store, objects, rows) when every obj_type object of the collection references a row of the same
+    # store, None otherwise (older scenes, mixed imports), in which case the tools read the objects
+    objects = []
+    rows = []
+    store_paths = set()
+    for obj in collection.all_objects:
+        if obj is None or obj.type != obj_type:
+            continue
+        if obj.data is None or ROW_PROP not in obj.data:
+            return None
+        objects.append(obj)
+        rows.append(obj.data[ROW_PROP])
+        store_paths.add(obj.data.get(STORE_PROP))
+    if len(store_paths) != 1:
+        return None
+    store = get_store(store_paths.pop())
+    if store is None:
+        return None
+    return store, objects, np.array(rows, dtype=np.int64)
+
+
+def object_properties(objects):
+    # Names object_values can read: the custom properties of the objects and the columns of the
+    # attribute stores they reference
+    names = set()
+    store_paths = set()
+    for obj in objects:
+        names.update(key for key in obj.keys() if key not in {'_RNA_UI', 'cycles'})
+        if obj.data is not None and ROW_PROP in obj.data:
+            store_paths.add(obj.data.get(STORE_PROP))
+    for store_path in store_paths:
+        store = get_store(store_path)
+        if store is not None:
+            names.update(store.column_names())
+    return list(names)
+
+
+def object_values(objects, col, numbers=False):
+    # col of each object for the tools that read objects one by one: the object's custom property when it
+    # has one (scenes imported before the stores, azimuth, dip and polarity, which can be edited), the row
+    # of the attribute store it references otherwise, None when it has neither. The store values come as
+    # text ('' where missing), or as floats with numbers (NaN where missing or not a number).
+    values = [None] * len(objects)
+    store_rows = {}  # store path -> indices of the objects that read it
+    for index, obj in enumerate(objects):
+        if col in obj:
+            value = obj[col]
+            if numbers:
+                try:
+                    value = float(value)
+                except (TypeError, ValueError):
+                    value = np.nan
+            values[index] = value
+        elif obj.data is not None and ROW_PROP in obj.data:
+            store_rows.setdefault(obj.data.get(STORE_PROP), []).append(index)
+    for store_path, indices in store_rows.items():
+        store = get_store(store_path)
+        if store is None or col not in store.columns:
+            continue
+        rows = np.array([objects[index].data[ROW_PROP] for index in indices], dtype=np.int64)
+        read = store.numbers(col, rows).tolist() if numbers else store.text(col, rows)
+        for index, value in zip(indices, read):
+            values[index] = value
+    return values
+
+
+def hole_meshes(collection):
+    # Objects of a Mesh per Hole or Tubes per Hole import
+    return [
+        obj for obj in collection.all_objects
+        if obj is not None and obj.type == 'MESH' and obj.data is not None and HOLE_COLUMNS_PROP in obj.data
+    ]
+
+
+def hole_mesh_store(objects, col):
+    # A column over the edges of the hole meshes, in object order, as a one column AttributeStore so
+    # the summaries below work on it too. Returns (store, rows).
+    parts = []  # per object, floats or the strings of a text column
+    for obj in objects:
+        mesh = obj.data
+        attribute = mesh.attributes.get(col)
+        if attribute is None or attribute.domain != 'EDGE':
+            parts.append(np.full(len(mesh.edges), np.nan))
+        elif attribute.data_type == 'INT' and col in mesh:
+            codes = np.empty(len(mesh.edges), dtype=np.int32)
+            attribute.data.foreach_get('value', codes)
+            parts.append(np.array(list(mesh[col]), dtype=object)[codes])
+        else:
+            values = np.empty(len(mesh.edges), dtype=np.float32)
+            attribute.data.foreach_get('value', values)
+            parts.append(values.astype(float))
+    rows = np.arange(sum(len(part) for part in parts))
+    if all(part.dtype != object for part in parts):
+        return AttributeStore({col: np.concatenate(parts) if parts else np.zeros(0)}), rows
+    # Text in any of the meshes makes the column text, as it does in read_arrays
+    text = np.concatenate([
+        part if part.dtype == object else np.where(np.isnan(part), '', part.astype(str)).astype(object)
+        for part in parts
+    ])
+    codes, strings = pd.factorize(pd.Series(text, dtype=object))
+    return AttributeStore({col: (codes.astype(np.int32), list(strings))}), rows
+
+
+def link_point_cloud(obj, store_path):
+    obj.data[STORE_PROP] = store_path
+    obj.data[POINT_CLOUD_PROP] = True
+
+
+def collection_point_cloud(collection):
+    # (store, cloud, rows) when the collection holds a point cloud linked to a store, None otherwise
+    for obj in collection.all_objects:
+        if obj is None or obj.type != 'MESH' or obj.data is None or POINT_CLOUD_PROP not in obj.data:
+            continue
+        store = get_store(obj.data.get(STORE_PROP))
+        if store is not None:
+            return store, obj, np.arange(len(obj.data.vertices))
+    return None
+
+
+def set_mesh_attribute(obj, name, values, data_type, domain):
+    # Writes a whole attribute, replacing one of the same name with another type or domain
+    mesh = obj.data
+    attribute = mesh.attributes.get(name)
+    if attribute is not None and (attribute.domain != domain or attribute.data_type != data_type):
+        mesh.attributes.remove(attribute)
+        attribute = None
+    if attribute is None:
+        attribute = mesh.attributes.new(name=name, type=data_type, domain=domain)
+    if data_type == 'FLOAT_COLOR':
+        attribute.data.foreach_set('color', np.asarray(values, dtype=np.float32).ravel())
+    else:
+        attribute.data.foreach_set('value', np.asarray(values).ravel())
+    mesh.update()
+
+
+def set_color_attribute(obj, colors, domain):
+    # RGBA per element in the 'color' attribute, which the tube and point instance materials show
+    set_mesh_attribute(obj, "color", colors, 'FLOAT_COLOR', domain)
+
+
+def store_properties(store, objects):
+    # Column names of the store plus any custom property added to the objects after import
+    # (polarity, azimuth, dip), which every object of an import gets
+    extra = [key for key in objects[0].keys() if key not in {'_RNA_UI', 'cycles'}] if objects else []
+    return list(set(store.column_names()) | set(extra))
+
+
+def value_summary(store, col, rows):
+    # How the query tools read a column: ('NUMERICAL', (min, max)) when every value is a number,
+    # ('CATEGORICAL', unique values) otherwise and ('', None) when the rows hold no values
+    present = store.present(col, rows)
+    if not present.any():
+        return '', None
+    numbers = store.numbers(col, rows)[present]
+    if not np.isnan(numbers).any():
+        return 'NUMERICAL', (float(numbers.min()), float(numbers.max()))
+    return 'CATEGORICAL', list(pd.unique(store.text(col, rows)[present]))
+
+
+def property_type_and_data(store, col, rows):
+    # Same result as get_property_type_and_data of the managers: NUMERICAL with the values that are
+    # numbers when there are any, CATEGORICAL with the unique values otherwise
+    present = store.present(col, rows)
+    numbers = store.numbers(col, rows)
+    numbers = numbers[present & ~np.isnan(numbers)]
+    if len(numbers):
+        return ('NUMERICAL', {'min': numbers.min(), 'max': numbers.max(), 'values': numbers})
+    return ('CATEGORICAL', {'values': list(pd.unique(store.text(col, rows)[present]))})
+
+
+def query_mask(store, col, rows, property_type, selected, minimum, maximum):
+    # Rows the data query leaves visible: blank values are hidden, categories must be among the
+    # selected ones and numbers within [minimum, maximum]
+    text = pd.Series(store.text(col, rows), dtype=object).str.strip().to_numpy()
+    visible = text != ''
+    if property_type == 'CATEGORICAL':
+        visible &= np.isin(text, list(selected))
+    elif property_type == 'NUMERICAL':
+        numbers = store.numbers(col, rows)
+        visible &= (numbers >= minimum) & (numbers <= maximum)
+    return visible
@@ -0,0 +1,173 @@
+# Desurvey benchmark on synthetic drilling campaigns, run outside Blender.
+# Reports wall time, peak memory and rows per second for each method and scale, after checking the
+# engine against an analytic reference hole and a hand desurveyed one.
+# Run from the repository root: python benchmarks/bench_desurvey.py [--holes 100 1000 10000]
+
+import argparse
+import os
+import sys
+import time
+import tracemalloc
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from desurvey_engine import DesurveyModel, desurvey_table, index_collar_survey
+
+COLS = {
+    'drill_hole_id': 'HOLEID', 'drill_from_depth': 'FROM', 'drill_to_depth': 'TO',
+    'survey_hole_id': 'HOLEID', 'survey_depth': 'DEPTH', 'survey_azimuth': 'AZIMUTH', 'survey_dip': 'DIP',
+    'collar_hole_id': 'HOLEID', 'collar_easting': 'EAST', 'collar_northing': 'NORTH', 'collar_elevation': 'RL',
+    'collar_start_depth': 'None', 'collar_final_depth': 'DEPTH',
+}
+
+METHODS = ['TANGENTIAL', 'BALANCED_TANGENTIAL', 'MINIMUM_CURVATURE']
+
+# Largest distance from the analytic reference hole accepted, in meters
+REFERENCE_TOLERANCE = 1e-6
+
+# A hole small enough to desurvey by hand: straight down from the collar, east from 30 m and north
+# from 60 m, with its intervals ending at HAND_DEPTHS. The expected offsets from the collar are given
+# for the interval table and for DesurveyModel. Tangential tables take each row's direction from the
+# deepest station at or above its to depth, the model holds each station's direction down to the next.
+HAND_STATIONS = [(0.0, 90.0, -90.0), (30.0, 90.0, 0.0), (60.0, 0.0, 0.0)]  # depth, azimuth, dip
+HAND_DEPTHS = [0.0, 15.0, 30.0, 45.0, 50.0, 60.0, 90.0]
+HAND_BALANCED = [(0, 0, 0), (0, 0, -15), (15, 0, -15), (30, 0, -15), (30, 5, -15), (30, 15, -15), (30, 45, -15)]
+HAND_EXPECTED = {
+    'TANGENTIAL': (
+        [(0, 0, 0), (0, 0, -15), (15, 0, -15), (30, 0, -15), (35, 0, -15), (35, 10, -15), (35, 40, -15)],
+        [(0, 0, 0), (0, 0, -15), (0, 0, -30), (15, 0, -30), (20, 0, -30), (30, 0, -30), (30, 30, -30)],
+    ),
+    'BALANCED_TANGENTIAL': (HAND_BALANCED, HAND_BALANCED),
+}
+
+
+def make_campaign(n_holes, min_intervals=10, max_intervals=200, seed=0):
+    # Collar, survey and interval tables for n_holes holes with 10 to 200 logged intervals each,
+    # gaps between some intervals and a survey station every 30 m with slowly drifting directions
+    rng = np.random.default_rng(seed)
+    hole_ids = np.array([f"DH{i:06d}" for i in range(n_holes)])
+
+    n_intervals = rng.integers(min_intervals, max_intervals + 1, n_holes)
+    lengths = rng.uniform(0.5, 3.0, n_intervals.sum())
+    gaps = np.where(rng.random(len(lengths)) < 0.1, rng.uniform(1.0, 60.0, len(lengths)), 0.0)
+    hole_of = np.repeat(np.arange(n_holes), n_intervals)
+    first = np.concatenate(([0], np.cumsum(n_intervals)[:-1]))
+
+    # Per hole cumulative depth: the bottom of each interval plus the gaps above it
+    ends = np.cumsum(lengths + gaps)
+    ends -= np.repeat(ends[first] - lengths[first] - gaps[first], n_intervals)
+    starts = ends - lengths
+    drill = pd.DataFrame({
+        'HOLEID': hole_ids[hole_of],
+        'FROM': np.round(starts, 2),
+        'TO': np.round(ends, 2),
+        'LITH': rng.choice(['BAS', 'GRN', 'SED', 'QTZ'], len(lengths)),
+        'AU': np.round(rng.lognormal(-1.0, 1.2, len(lengths)), 3),
+    })
+
+    final_depths = np.ceil(ends[first + n_intervals - 1]) + rng.uniform(0, 30, n_holes).round()
+    collar = pd.DataFrame({
+        'HOLEID': hole_ids,
+        'EAST': rng.uniform(500000, 505000, n_holes),
+        'NORTH': rng.uniform(6000000, 6005000, n_holes),
+        'RL': rng.uniform(100, 300, n_holes),
+        'DEPTH': final_depths,
+    })
+
+    n_stations = (final_depths // 30).astype(int) + 1
+    station_hole = np.repeat(np.arange(n_holes), n_stations)
+    station_number = np.arange(n_stations.sum()) - np.repeat(np.cumsum(n_stations) - n_stations, n_stations)
+    survey = pd.DataFrame({
+        'HOLEID': hole_ids[station_hole],
+        'DEPTH': station_number * 30.0,
+        'AZIMUTH': (rng.uniform(0, 360, n_holes)[station_hole] + station_number * rng.normal(0, 0.5, len(station_hole))) % 360,
+        'DIP': np.clip(rng.uniform(-85, -50, n_holes)[station_hole] + station_number * rng.normal(0.2, 0.3, len(station_hole)), -89, -5),
+    })
+    return collar, survey, drill
+
+
+def reference_error():
+    # A hole whose dip builds at a constant rate in a vertical east-west plane is a circular arc,
+    # which minimum curvature must reproduce exactly
+    start_dip, build_rate = np.radians(-70.0), np.radians(3.0) / 30  # 3 degrees per 30 m
+    station_depths = np.arange(0.0, 301.0, 30.0)
+    collar = pd.DataFrame({'HOLEID': ['REF'], 'EAST': [1000.0], 'NORTH': [2000.0], 'RL': [300.0], 'DEPTH': [300.0]})
+    survey = pd.DataFrame({
+        'HOLEID': 'REF', 'DEPTH': station_depths, 'AZIMUTH': 90.0,
+        'DIP': np.degrees(start_dip + build_rate * station_depths),
+    })
+
+    depths = np.linspace(0.0, 300.0, 301)
+    dips = start_dip + build_rate * depths
+    expected = np.column_stack((
+        1000.0 + (np.sin(dips) - np.sin(start_dip)) / build_rate,
+        np.full(len(depths), 2000.0),
+        300.0 - (np.cos(dips) - np.cos(start_dip)) / build_rate,
+    ))
+
+    # Both the point model and the interval table (1 m intervals, plus the collar row)
+    model = DesurveyModel(collar, survey, COLS, 'MINIMUM_CURVATURE')
+    model_xyz = model.locate(np.full(len(depths), 'REF'), depths)
+    drill = pd.DataFrame({'HOLEID': 'REF', 'FROM': depths[:-1], 'TO': depths[1:]})
+    table = run_desurvey(collar, survey, drill, 'MINIMUM_CURVATURE')
+    return max(np.abs(model_xyz - expected).max(), np.abs(table[['x', 'y', 'z']].to_numpy() - expected).max())
+
+
+def hand_survey_error(method):
+    # Largest distance from the hand desurveyed positions of HAND_EXPECTED, table and model
+    collar_xyz = np.array([1000.0, 2000.0, 300.0])
+    collar = pd.DataFrame({'HOLEID': ['HAND'], 'EAST': [collar_xyz[0]], 'NORTH': [collar_xyz[1]], 'RL': [collar_xyz[2]],
+                           'DEPTH': [HAND_DEPTHS[-1]]})
+    survey = pd.DataFrame(HAND_STATIONS, columns=['DEPTH', 'AZIMUTH', 'DIP']).assign(HOLEID='HAND')
+    depths = np.array(HAND_DEPTHS)
+    table_expected, model_expected = (collar_xyz + np.array(offsets) for offsets in HAND_EXPECTED[method])
+
+    drill = pd.DataFrame({'HOLEID': 'HAND', 'FROM': depths[:-1], 'TO': depths[1:]})
+    table = run_desurvey(collar, survey, drill, method)
+    model_xyz = DesurveyModel(collar, survey, COLS, method).locate(np.full(len(depths), 'HAND'), depths)
+    return max(np.abs(table[['x', 'y', 'z']].to_numpy() - table_expected).max(), np.abs(model_xyz - model_expected).max())
+
+
+def run_desurvey(collar, survey, drill, method):
+    collar_index, survey_index = index_collar_survey(collar, survey, COLS)
+    return desurvey_table(drill, collar_index, survey_index, COLS, method)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--holes', type=int, nargs='+', default=[100, 1000, 10000])
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    error = reference_error()
+    print(f"Analytic reference hole (MINIMUM_CURVATURE): max error {error:.2e} m")
+    if error > REFERENCE_TOLERANCE:
+        sys.exit(f"Accuracy regression: error above {REFERENCE_TOLERANCE:g} m")
+    for method in HAND_EXPECTED:
+        error = hand_survey_error(method)
+        print(f"Hand desurveyed hole ({method}): max error {error:.2e} m")
+        if error > REFERENCE_TOLERANCE:
+            sys.exit(f"Accuracy regression in {method}: error above {REFERENCE_TOLERANCE:g} m")
+
+    print(f"{'holes':>7} {'rows':>9} {'method':>20} {'time (s)':>9} {'peak (MB)':>10} {'rows/s':>11}")
+    for n_holes in args.holes:
+        collar, survey, drill = make_campaign(n_holes, seed=args.seed)
+        for method in METHODS:
+            start = time.perf_counter()
+            result = run_desurvey(collar, survey, drill, method)
+            elapsed = time.perf_counter() - start
+
+            # Memory is traced in a second run so tracing does not slow down the timed one
+            tracemalloc.start()
+            run_desurvey(collar, survey, drill, method)
+            peak = tracemalloc.get_traced_memory()[1]
+            tracemalloc.stop()
+
+            print(f"{n_holes:>7} {len(result):>9} {method:>20} {elapsed:>9.3f} {peak / 2**20:>10.1f} {len(result) / elapsed:>11,.0f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,65 @@
+# Compares per-hole lookups by boolean mask (one scan of the table per hole) with the grouped
+# HoleIndex used by the desurvey pipeline (one sort, then a slice per hole).
+# Run from the repository root: python benchmarks/bench_hole_index.py
+
+import os
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from desurvey_engine import HoleIndex
+
+
+def make_survey(n_holes, stations_per_hole=20, seed=0):
+    rng = np.random.default_rng(seed)
+    hole_ids = np.repeat([f"DH{i:06d}" for i in range(n_holes)], stations_per_hole)
+    depths = np.tile(np.arange(stations_per_hole) * 10.0, n_holes)
+    survey = pd.DataFrame({
+        'HOLEID': hole_ids,
+        'DEPTH': depths,
+        'AZIMUTH': rng.uniform(0, 360, len(hole_ids)),
+        'DIP': rng.uniform(-90, -45, len(hole_ids)),
+    })
+    # Shuffle so the index has to do the grouping itself
+    return survey.sample(frac=1, random_state=seed).reset_index(drop=True)
+
+
+def lookup_by_mask(survey, hole_ids):
+    total = 0
+    for hole_id in hole_ids:
+        total += len(survey[survey['HOLEID'] == hole_id])
+    return total
+
+
+def lookup_by_index(survey, hole_ids):
+    index = HoleIndex(survey, 'HOLEID', 'DEPTH')
+    total = 0
+    for hole_id in hole_ids:
+        total += len(index.rows(hole_id))
+    return total
+
+
+def main():
+    print(f"{'holes':>8} {'rows':>10} {'mask (s)':>10} {'index (s)':>10} {'speedup':>8}")
+    for n_holes in (100, 1000, 3000):
+        survey = make_survey(n_holes)
+        hole_ids = survey['HOLEID'].unique()
+
+        start = time.perf_counter()
+        mask_rows = lookup_by_mask(survey, hole_ids)
+        mask_time = time.perf_counter() - start
+
+        start = time.perf_counter()
+        index_rows = lookup_by_index(survey, hole_ids)
+        index_time = time.perf_counter() - start
+
+        assert mask_rows == index_rows == len(survey)
+        print(f"{n_holes:>8} {len(survey):>10} {mask_time:>10.3f} {index_time:>10.3f} {mask_time / index_time:>7.1f}x")
+
+
+if __name__ == '__main__':
+    main()
@@ -1,12 +1,46 @@
 import bpy
+import os
 import pandas as pd
-import numpy as np
+from .desurvey_engine import (
+    desurvey_table, desurvey_table_incremental, desurvey_csv_stream, index_collar_survey, HOLE_KEY_COL,
+    validate_tables
+)
+from ..data_io import process_pool, write_table, read_npz, write_npz, read_csv_table, TABLE_FORMATS, TABLE_EXTENSIONS
 
 
 # Global variables to store the loaded data
 drill_data = pd.DataFrame()
 survey_data = pd.DataFrame()
 collar_data = pd.DataFrame()
+desurveyed_data = pd.DataFrame()  # result of the last Generate, kept apart from the uploaded intervals
+
+def get_desurvey_columns(scene):
+    # Column names picked in the UI, keyed the same way as the scene properties
+    return {
+        'drill_hole_id': scene.drill_hole_id,
+        'drill_from_depth': scene.drill_from_depth,
+        'drill_to_depth': scene.drill_to_depth,
+        'survey_hole_id': scene.survey_hole_id,
+        'survey_depth': scene.survey_depth,
+        'survey_azimuth': scene.survey_azimuth,
+        'survey_dip': scene.survey_dip,
+        'collar_hole_id': scene.collar_hole_id,
+        'collar_easting': scene.collar_easting,
+        'collar_northing': scene.collar_northing,
+        'collar_elevation': scene.collar_elevation,
+        'collar_start_depth': scene.collar_start_depth,
+        'collar_final_depth': scene.collar_final_depth,
+    }
+
+def report_table_checks(operator, drill, cols):
+    # Checks the uploaded tables before desurveying (drill is None when streaming) and reports what
+    # was found. Returns False when the desurvey would fail.
+    errors, warnings = validate_tables(drill, collar_data, survey_data, cols)
+    for message in warnings:
+        operator.report({'WARNING'}, message)
+    for message in errors:
+        operator.report({'ERROR'}, message)
+    return not errors
 
 def update_drill_columns(self, context):
     return [(col, col, "") for col in context.scene.drill_columns.split(',') if col]
@@ -32,6 +66,7 @@ class ContinuousDesurveyCalcPanel(bpy.types.Panel):
         layout = self.layout
 
         # Drill hole data
+        layout.prop(context.scene, "desurvey_streaming")
         layout.operator("desurvey.upload_drill_data", text="Upload Drill Hole Data", icon='FILE')
 
         # Select columns for drill data
@@ -62,7 +97,14 @@ class ContinuousDesurveyCalcPanel(bpy.types.Panel):
         layout.prop(context.scene, "collar_start_depth")
         layout.prop(context.scene, "collar_final_depth")
 
+        # Desurvey method
+        layout.prop(context.scene, "desurvey_method")
+        layout.prop(context.scene, "desurvey_max_infill")
+        layout.prop(context.scene, "desurvey_workers")
+        layout.prop(context.scene, "desurvey_cache_path")
+
         # Get Desurveyed CSV
+        layout.prop(context.scene, "desurvey_output_format")
         layout.operator("desurvey.generate_csv", text="Get Desurveyed CSV", icon='PLAY')
 
 
@@ -74,7 +116,11 @@ class UploadDrillDataOperator(bpy.types.Operator):
 
     def execute(self, context):
         global drill_data
-        drill_data = pd.read_csv(self.filepath)
+        context.scene.drill_file_path = self.filepath
+        if context.scene.desurvey_streaming:
+            drill_data = pd.read_csv(self.filepath, nrows=0)  # header only, rows are read while saving
+        else:
+            drill_data = read_csv_table(self.filepath, workers=context.scene.desurvey_workers)
         context.scene.drill_columns = ','.join(drill_data.columns)
         return {'FINISHED'}
 
@@ -91,7 +137,7 @@ class UploadSurveyDataOperator(bpy.types.Operator):
 
     def execute(self, context):
         global survey_data
-        survey_data = pd.read_csv(self.filepath)
+        survey_data = read_csv_table(self.filepath, workers=context.scene.desurvey_workers)
         context.scene.survey_columns = ','.join(survey_data.columns)
         return {'FINISHED'}
 
@@ -108,7 +154,7 @@ class UploadCollarDataOperator(bpy.types.Operator):
 
     def execute(self, context):
         global collar_data
-        collar_data = pd.read_csv(self.filepath)
+        collar_data = read_csv_table(self.filepath, workers=context.scene.desurvey_workers)
         context.scene.collar_columns = ','.join(collar_data.columns)
         return {'FINISHED'}
 
@@ -122,6 +168,11 @@ class GenerateCSVOperator(bpy.types.Operator):
     bl_label = "Generate CSV"
 
     def execute(self, context):
+        if context.scene.desurvey_streaming:
+            # Streaming desurvey writes while it reads, so ask for the output file first
+            bpy.ops.desurvey.save_csv('INVOKE_DEFAULT')
+            return {'FINISHED'}
+
         result_data = self.calculate_desurveyed_data(context)
 
         if not result_data.empty:
@@ -133,212 +184,56 @@ class GenerateCSVOperator(bpy.types.Operator):
         return {'FINISHED'}
 
     def calculate_desurveyed_data(self, context):
-        global drill_data, survey_data, collar_data
-        
-        # Extracting data from the UI elements
-        hole_id_col_drill = context.scene.drill_hole_id
-        from_depth_col_drill = context.scene.drill_from_depth
-        to_depth_col_drill = context.scene.drill_to_depth
-        
-        hole_id_col_survey = context.scene.survey_hole_id
-        depth_col_survey = context.scene.survey_depth
-        azimuth_col_survey = context.scene.survey_azimuth
-        dip_col_survey = context.scene.survey_dip
-
-        hole_id_col_collar = context.scene.collar_hole_id
-        easting_col_collar = context.scene.collar_easting
-        northing_col_collar = context.scene.collar_northing
-        elevation_col_collar = context.scene.collar_elevation
-        start_depth_collar = 0 if context.scene.collar_start_depth == 'None' else context.scene.collar_start_depth
-        final_depth_collar = context.scene.collar_final_depth
-        
-        # Ensure the data is sorted by 'hole_id' and 'to_depth'
-        drill_data.sort_values(by=[hole_id_col_drill, to_depth_col_drill], inplace=True)
-        drill_data.reset_index(drop=True, inplace=True)
-        
-        # Function to emulate the behavior of VLOOKUP with TRUE flag for approximate match.
-        def vlookup_approx(value, lookup_array, result_array):
-            matches = [i for i, x in enumerate(lookup_array) if x <= value]
-            if matches:
-                index = matches[-1]
-                return result_array[index]
-            else:
-                return result_array[-1]  # Return the last value if no match is found
-
-        # Generate the infill rows and get the updated drill data
-        def generate_correct_infill_rows(max_infill=25):
-            if drill_data is None:
-                print("Error: drill_data is not loaded.")
-                return None  # Early exit if drill_data is not loaded
-
-            all_result_rows = []  # To hold all rows including infill rows
-
-            unique_holes = drill_data[hole_id_col_drill].unique()
-
-            for hole_id in unique_holes:
-                drill_data_filtered = drill_data[drill_data[hole_id_col_drill] == hole_id]
-                print(f"Number of rows for hole_id {hole_id}: {len(drill_data_filtered)}")
-
-                start_depth = 0 if context.scene.collar_start_depth == 'None' else collar_data[collar_data[hole_id_col_collar] == hole_id][start_depth_collar].iloc[0]
-                final_depth = collar_data[collar_data[hole_id_col_collar] == hole_id][final_depth_collar].iloc[0]
-                
-                collar_matches = collar_data[collar_data[hole_id_col_collar] == hole_id]
-                print(f"Length of collar_matches for hole_id {hole_id}: {len(collar_matches)}")
-                if not collar_matches.empty:
-                    start_depth = 0 if context.scene.collar_start_depth == 'None' else collar_matches[start_depth_collar].iloc[0]
-                    final_depth = collar_matches[final_depth_collar].iloc[0]
-                else:
-                    print(f"No collar data found for hole_id {hole_id}, skipping...")
-                    continue
-
-                last_to_m = start_depth
-
-                for _, row in drill_data_filtered.iterrows():
-                    from_depth_col = from_depth_col_drill
-                    to_depth_col = to_depth_col_drill
-                    
-
-                    if row[from_depth_col] - last_to_m > 0:
-                        infill_from = last_to_m
-                        while infill_from < row[from_depth_col]:
-                            infill_to = min(infill_from + max_infill, row[from_depth_col])
-                            # Use the column names for keys in infill_row
-                            infill_row = {hole_id_col_drill: hole_id, from_depth_col: infill_from, to_depth_col: infill_to}
-                            for col in drill_data_filtered.columns:
-                                if col not in [from_depth_col, to_depth_col, hole_id_col_drill]:
-                                    infill_row[col] = None  # Set default value for other columns
-                            all_result_rows.append(infill_row)
-                            infill_from = infill_to
-
-                    # Add the existing row with updated 'last_to_m' value
-                    row_dict = row.to_dict()
-                    row_dict[hole_id_col_drill] = hole_id
-                    all_result_rows.append(row_dict)
-                    last_to_m = row[to_depth_col]
-
-                # Infill after the last depth 
-                if last_to_m < final_depth:
-                    print(f"Adding infill rows after the last recorded depth for hole_id {hole_id}")
-                    infill_from = last_to_m
-                    while infill_from < final_depth:
-                        infill_to = min(infill_from + max_infill, final_depth)
-                        # Correctly use the column names for keys in infill_row
-                        infill_row = {hole_id_col_drill: hole_id, from_depth_col: infill_from, to_depth_col: infill_to}
-                        for col in drill_data_filtered.columns:
-                            if col not in [from_depth_col, to_depth_col, hole_id_col_drill]:
-                                infill_row[col] = None  # Set default value for other columns
-                        all_result_rows.append(infill_row)
-                        infill_from = infill_to
-
-            result_df = pd.DataFrame(all_result_rows)
-            
-            # Iterate over each unique hole ID to add a new row based on min from_depth
-            for hole_id in unique_holes:
-                hole_data = result_df[result_df[hole_id_col_drill] == hole_id]
-                if hole_data.empty:
-                    continue
-
-                min_from_depth = hole_data[from_depth_col_drill].min()
-
-                # Converting new_row to a DataFrame before appending
-                new_row_df = pd.DataFrame([{
-                    hole_id_col_drill: hole_id,
-                    from_depth_col_drill: min_from_depth,
-                    to_depth_col_drill: min_from_depth,
-                    'x': np.nan, 'y': np.nan, 'z': np.nan
-                }])
-                
-                result_df = pd.concat([result_df, new_row_df], ignore_index=True)
-
-            result_df = result_df.sort_values(by=[hole_id_col_drill, to_depth_col_drill]).reset_index(drop=True)
-
-            return result_df
-        
-        # Generate the infill rows and get the updated drill data
-        result_df = generate_correct_infill_rows(max_infill=25) # set to 25 meter intervals
+        # Desurveys the uploaded tables into desurveyed_data. drill_data keeps the uploaded intervals, so
+        # a later run (after uploading a new survey, say) starts from them again and the cache can match.
+        global drill_data, desurveyed_data
 
-        if result_df is None:
-            self.report({'WARNING'}, "Failed to generate infill rows!")
-            return pd.DataFrame()
-        
-        drill_data = result_df
+        # Load the drill hole data now if only its header was read for streaming
+        if drill_data.empty and context.scene.drill_file_path:
+            drill_data = read_csv_table(context.scene.drill_file_path, workers=context.scene.desurvey_workers)
 
-        drill_data['x'] = np.nan
-        drill_data['y'] = np.nan
-        drill_data['z'] = np.nan
-        
-        unique_holes = drill_data[hole_id_col_drill].unique()
-        print(f"Found {len(unique_holes)} unique hole IDs: {unique_holes}")
-        
-        # Check for missing hole IDs in collar and survey data
-        missing_in_collar = set(unique_holes) - set(collar_data[hole_id_col_collar].unique())
-        missing_in_survey = set(unique_holes) - set(survey_data[hole_id_col_survey].unique())
-        if missing_in_collar or missing_in_survey:
-            missing_ids_message = "Missing hole IDs in collar data: {} and/or in survey data: {}.".format(
-                ", ".join(missing_in_collar), ", ".join(missing_in_survey))
-            self.report({'WARNING'}, missing_ids_message)
-            return pd.DataFrame()
-        
         try:
-            for hole_id in unique_holes:
-                # Filter collar, survey, and drill data by hole ID
-                collar_data_filtered = collar_data[collar_data[hole_id_col_collar] == hole_id]
-                survey_data_filtered = survey_data[survey_data[hole_id_col_survey] == hole_id]
-                
-                # Use result_df to filter drill data by hole_id
-                drill_data_filtered = result_df[result_df[hole_id_col_drill] == hole_id]
-                
-
-                # Identify the minimum depth value for this hole
-                min_depth = drill_data_filtered[to_depth_col_drill].min()
-
-                # Initial coordinates for each hole
-                prev_x = collar_data_filtered.iloc[0][easting_col_collar]
-                prev_y = collar_data_filtered.iloc[0][northing_col_collar]
-                prev_z = collar_data_filtered.iloc[0][elevation_col_collar]
-
-                # Populate the row corresponding to the minimum depth value with collar coordinates
-                idx_in_main_df = drill_data.index[(drill_data[hole_id_col_drill] == hole_id) & (drill_data[to_depth_col_drill] == min_depth)].tolist()[0]
-                drill_data.at[idx_in_main_df, 'x'] = prev_x
-                drill_data.at[idx_in_main_df, 'y'] = prev_y
-                drill_data.at[idx_in_main_df, 'z'] = prev_z
-            
-                # Initialize coordinates
-                prev_depth_F2 = min_depth
-                # Loop through drill data for the current hole
-                for index in range(len(drill_data_filtered)):
-                    next_row = drill_data_filtered.iloc[index]  
-                    depth_F3 = next_row[to_depth_col_drill]
-
-                    # Get values for depth using the vlookup approximation
-                    azimuth_F3 = vlookup_approx(depth_F3, survey_data_filtered[depth_col_survey].values, survey_data_filtered[azimuth_col_survey].values)
-                    dip_F3 = vlookup_approx(depth_F3, survey_data_filtered[depth_col_survey].values, survey_data_filtered[dip_col_survey].values)
-
-                    # Apply the calculation for x, y, z using the depth difference
-                    delta_x = (depth_F3 - prev_depth_F2) * np.sin(np.radians(azimuth_F3)) * np.cos(np.radians(dip_F3))
-                    delta_y = (depth_F3 - prev_depth_F2) * np.cos(np.radians(azimuth_F3)) * np.cos(np.radians(dip_F3))
-                    delta_z = (depth_F3 - prev_depth_F2) * np.sin(np.radians(dip_F3))
-
-                    # Cumulatively add the deltas to the previous coordinates
-                    new_x = prev_x + delta_x
-                    new_y = prev_y + delta_y
-                    new_z = prev_z + delta_z
-
-                    # Store these new values for the next iteration
-                    prev_x, prev_y, prev_z = new_x, new_y, new_z
-                    prev_depth_F2 = depth_F3  # Update depth for next iteration
-
-                    # Update the original DataFrame with new x, y, and z values
-                    idx_in_main_df = drill_data.index[(drill_data[hole_id_col_drill] == hole_id) & (drill_data[to_depth_col_drill] == depth_F3)].tolist()[0]
-                    drill_data.at[idx_in_main_df, 'x'] = new_x
-                    drill_data.at[idx_in_main_df, 'y'] = new_y
-                    drill_data.at[idx_in_main_df, 'z'] = new_z
-
+            # Infill gaps up to the maximum infill length, then vectorized desurvey of every row
+            cols = get_desurvey_columns(context.scene)
+            if not report_table_checks(self, drill_data, cols):
+                return pd.DataFrame()
+            collar_index, survey_index = index_collar_survey(collar_data, survey_data, cols)
+            with process_pool(context.scene.desurvey_workers) as pool:
+                if context.scene.desurvey_cache_path:
+                    desurveyed_data = self.desurvey_with_cache(context, drill_data, collar_index, survey_index, cols, pool)
+                else:
+                    desurveyed_data = desurvey_table(
+                        drill_data, collar_index, survey_index, cols,
+                        method=context.scene.desurvey_method, pool=pool,
+                        max_infill=context.scene.desurvey_max_infill
+                    )
         except Exception as e:
             self.report({'WARNING'}, f"Failed to generate desurveyed data! Error: {str(e)}")
             return pd.DataFrame()
 
-        return drill_data
+        return desurveyed_data
+
+    def desurvey_with_cache(self, context, data, collar_index, survey_index, cols, pool):
+        # Only holes whose collar, survey or interval rows changed since the last run are desurveyed,
+        # the rest come from the cache file, which is then updated
+        cache_path = bpy.path.abspath(context.scene.desurvey_cache_path)
+        cached = None
+        if os.path.exists(cache_path):
+            try:
+                cached = read_npz(cache_path)
+            except Exception as e:
+                print("Failed to read desurvey cache, desurveying all holes:", e)
+
+        result_df, recomputed = desurvey_table_incremental(
+            data, collar_index, survey_index, cols, cached,
+            method=context.scene.desurvey_method, pool=pool,
+            max_infill=context.scene.desurvey_max_infill
+        )
+        write_npz(result_df, cache_path)
+
+        total = result_df[cols['drill_hole_id']].nunique()
+        self.report({'INFO'}, f"Desurveyed {recomputed} changed holes, {max(total - recomputed, 0)} unchanged holes from the cache.")
+        return result_df.drop(columns=HOLE_KEY_COL)
 
 
 class SaveCSVOperator(bpy.types.Operator):
@@ -348,17 +243,52 @@ class SaveCSVOperator(bpy.types.Operator):
     filepath: bpy.props.StringProperty(subtype="FILE_PATH")
 
     def execute(self, context):
-        global drill_data
-
-        if not drill_data.empty:
-            file_path = bpy.path.ensure_ext(self.filepath, ".csv")
-            drill_data.to_csv(file_path, index=False)
+        if context.scene.desurvey_streaming:
+            return self.save_streaming(context)
+
+        if not desurveyed_data.empty:
+            output_format = context.scene.desurvey_output_format
+            file_path = bpy.path.ensure_ext(self.filepath, TABLE_EXTENSIONS[output_format])
+            try:
+                write_table(desurveyed_data, file_path, output_format)
+            except Exception as e:
+                self.report({'WARNING'}, f"Failed to save desurveyed data! Error: {str(e)}")
+                return {'CANCELLED'}
             self.report({'INFO'}, "Desurveyed data saved successfully!")
         else:
             self.report({'WARNING'}, "No desurveyed data to save!")
 
         return {'FINISHED'}
 
+    def save_streaming(self, context):
+        if not context.scene.drill_file_path:
+            self.report({'WARNING'}, "No drill hole data uploaded!")
+            return {'CANCELLED'}
+        if context.scene.desurvey_output_format != 'CSV':
+            self.report({'WARNING'}, "Stream Large Files writes CSV only!")
+            return {'CANCELLED'}
+
+        file_path = bpy.path.ensure_ext(self.filepath, ".csv")
+        try:
+            # The interval rows are only read while streaming, so only the collar and survey are checked first
+            cols = get_desurvey_columns(context.scene)
+            if not report_table_checks(self, None, cols):
+                return {'CANCELLED'}
+            rows_written = desurvey_csv_stream(
+                context.scene.drill_file_path, file_path, collar_data, survey_data,
+                cols, method=context.scene.desurvey_method,
+                workers=context.scene.desurvey_workers, max_infill=context.scene.desurvey_max_infill
+            )
+        except Exception as e:
+            self.report({'WARNING'}, f"Failed to generate desurveyed data! Error: {str(e)}")
+            return {'CANCELLED'}
+
+        if rows_written:
+            self.report({'INFO'}, f"Desurveyed data saved successfully! ({rows_written} rows)")
+        else:
+            self.report({'WARNING'}, "No desurveyed data to save!")
+        return {'FINISHED'}
+
     def invoke(self, context, event):
         context.window_manager.fileselect_add(self)
         return {'RUNNING_MODAL'}
@@ -385,6 +315,47 @@ def register():
     bpy.types.Scene.collar_elevation = bpy.props.EnumProperty(items=update_collar_columns)
     bpy.types.Scene.collar_start_depth = bpy.props.EnumProperty(items=update_collar_columns)
     bpy.types.Scene.collar_final_depth = bpy.props.EnumProperty(items=update_collar_columns)
+    bpy.types.Scene.desurvey_method = bpy.props.EnumProperty(
+        name="Method",
+        description="How the hole path is calculated between survey measurements",
+        items=[
+            ('TANGENTIAL', "Tangential", "Azimuth and dip at the bottom of each interval applied over its whole length"),
+            ('BALANCED_TANGENTIAL', "Balanced Tangential", "Each survey segment split in half along the directions at both ends"),
+            ('MINIMUM_CURVATURE', "Minimum Curvature", "Smooth circular arc between survey measurements")
+        ],
+        default='TANGENTIAL'
+    )
+    bpy.types.Scene.desurvey_max_infill = bpy.props.FloatProperty(
+        name="Max Infill Length",
+        description="Longest infill interval added where the drill hole data has gaps",
+        default=25.0,
+        min=0.1,
+        unit='LENGTH'
+    )
+    bpy.types.Scene.desurvey_cache_path = bpy.props.StringProperty(
+        name="Cache File",
+        description="Optional .npz file keeping the last desurvey result. Only holes whose data changed are desurveyed again",
+        subtype='FILE_PATH'
+    )
+    bpy.types.Scene.desurvey_output_format = bpy.props.EnumProperty(
+        name="Output Format",
+        description="File format of the desurveyed data. The typed formats are smaller and faster to import than CSV",
+        items=TABLE_FORMATS,
+        default='CSV'
+    )
+    bpy.types.Scene.desurvey_workers = bpy.props.IntProperty(
+        name="Worker Processes",
+        description="Number of CPU cores used to read large CSV files and desurvey holes in parallel. 1 runs everything in Blender",
+        default=1,
+        min=1,
+        max=64
+    )
+    bpy.types.Scene.desurvey_streaming = bpy.props.BoolProperty(
+        name="Stream Large Files",
+        description="Desurvey the drill hole file hole by hole while saving instead of loading it all into memory. Rows of each hole must be together in the file",
+        default=False
+    )
+    bpy.types.Scene.drill_file_path = bpy.props.StringProperty()
     bpy.types.Scene.drill_columns = bpy.props.StringProperty()
     bpy.types.Scene.survey_columns = bpy.props.StringProperty()
     bpy.types.Scene.collar_columns = bpy.props.StringProperty()
@@ -411,6 +382,13 @@ def unregister():
     del bpy.types.Scene.collar_elevation
     del bpy.types.Scene.collar_start_depth
     del bpy.types.Scene.collar_final_depth
+    del bpy.types.Scene.desurvey_method
+    del bpy.types.Scene.desurvey_max_infill
+    del bpy.types.Scene.desurvey_workers
+    del bpy.types.Scene.desurvey_output_format
+    del bpy.types.Scene.desurvey_cache_path
+    del bpy.types.Scene.desurvey_streaming
+    del bpy.types.Scene.drill_file_path
     del bpy.types.Scene.drill_columns
     del bpy.types.Scene.survey_columns
     del bpy.types.Scene.collar_columns
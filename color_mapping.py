@@ -0,0 +1,67 @@
+import bpy
+import numpy as np
+import pandas as pd
+import matplotlib.pyplot as plt
+
+# Colormap evaluation and the Object Colour material shared by the drill hole and point managers.
+# The bounds and the colours are computed once per colouring run for the values of every object,
+# not once per object.
+
+OBJECT_COLOR_MATERIAL = "ObjectColorMaterial"
+
+
+def get_object_color_material():
+    # One material shared by everything coloured with Object Colour. It shows each object's own colour
+    # (obj.color), so re-colouring writes the colours and never touches a material.
+    material = bpy.data.materials.get(OBJECT_COLOR_MATERIAL)
+    if material is None:
+        material = bpy.data.materials.new(name=OBJECT_COLOR_MATERIAL)
+        material.use_nodes = True
+        nodes = material.node_tree.nodes
+        object_info = nodes.new(type='ShaderNodeObjectInfo')
+        emission = nodes.new(type='ShaderNodeEmission')
+        material.node_tree.links.new(object_info.outputs['Color'], emission.inputs['Color'])
+        material.node_tree.links.new(emission.outputs['Emission'], nodes.get('Material Output').inputs['Surface'])
+    return material
+
+
+def color_bounds(property_data, adjust_for_outliers=False, scaling_factor=3.0):
+    # (min, max) the colours are spread over. With adjust_for_outliers, values further than
+    # scaling_factor times the IQR outside the quartiles are left out.
+    if not adjust_for_outliers:
+        return property_data['min'], property_data['max']
+    values = np.asarray(property_data['values'], dtype=float)
+    q75, q25 = np.percentile(values, [75, 25])
+    iqr = q75 - q25
+    kept = values[(values >= q25 - scaling_factor * iqr) & (values <= q75 + scaling_factor * iqr)]
+    if not len(kept):
+        return q25, q75
+    return kept.min(), kept.max()
+
+
+def map_colors(values, cmap_name, property_type, property_data, adjust_for_outliers=False, scaling_factor=3.0):
+    # Colours of all values in one colormap call. Returns (colors, mapped, norm): RGBA tuples, the mask
+    # of values that have a colour (numbers for NUMERICAL, known categories for CATEGORICAL) and the
+    # Normalize of numerical values for the legend (None otherwise).
+    cmap = plt.get_cmap(cmap_name)
+    norm = None
+    if property_type == 'NUMERICAL' and 'values' in property_data:
+        numbers = pd.to_numeric(pd.Series(values, dtype=object), errors='coerce').to_numpy(dtype=float)
+        mapped = ~np.isnan(numbers)
+        min_val, max_val = color_bounds(property_data, adjust_for_outliers, scaling_factor)
+        norm = plt.Normalize(min_val, max_val)
+        normalized = np.asarray(norm(numbers)) if max_val > min_val else np.zeros(len(numbers))
+    elif property_type == 'CATEGORICAL':
+        categories = {}
+        for index, category in enumerate(property_data['values']):
+            categories.setdefault(category, index)
+        positions = np.array([categories.get(value, -1) for value in values], dtype=float)
+        mapped = positions >= 0
+        count = len(property_data['values'])
+        normalized = positions / (count - 1) if count > 1 else np.zeros(len(positions))
+    else:
+        mapped = np.ones(len(values), dtype=bool)
+        normalized = np.full(len(values), 0.5)
+
+    colors = cmap(np.where(mapped, normalized, 0.0)) if len(mapped) else np.zeros((0, 4))
+    return [tuple(color) for color in colors.tolist()], mapped, norm
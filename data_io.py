@@ -0,0 +1,476 @@
+import importlib
+import io
+import multiprocessing
+import os
+import sys
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import contextmanager
+
+import numpy as np
+import pandas as pd
+
+# Table reading shared by the importers and the desurvey tool. This module must not import bpy (or
+# anything from the add-on) so worker processes can import it on its own.
+
+# CSV files smaller than this are parsed in Blender, starting worker processes costs more than it saves
+PARALLEL_MIN_BYTES = 64 * 2**20
+
+# Largest byte range of a CSV file parsed by one task, and the tasks per worker running or waiting to
+# be collected at a time, which bounds the memory of a parallel read
+RANGE_BYTES = 32 * 2**20
+RANGES_PER_WORKER = 2
+
+# Formats the desurveyed table can be written in, as EnumProperty items
+TABLE_FORMATS = [
+    ('CSV', "CSV (.csv)", "Plain text, readable everywhere"),
+    ('NPZ', "NumPy (.npz)", "Typed columns with a string table for text columns, no extra packages needed"),
+    ('PARQUET', "Parquet (.parquet)", "Compressed typed columns, needs pyarrow"),
+    ('FEATHER', "Feather (.feather)", "Uncompressed typed columns, fastest to read, needs pyarrow"),
+]
+
+TABLE_EXTENSIONS = {'CSV': ".csv", 'NPZ': ".npz", 'PARQUET': ".parquet", 'FEATHER': ".feather"}
+
+# filter_glob for file browsers that can open any of the formats above
+TABLE_FILTER_GLOB = ";".join(f"*{ext}" for ext in TABLE_EXTENSIONS.values())
+
+
+class ReadCancelled(Exception):
+    # Raised by the readers below when their cancel event is set, between chunks and byte ranges
+    pass
+
+
+def check_cancel(cancel):
+    # cancel: a threading.Event set from another thread to stop a read, or None
+    if cancel is not None and cancel.is_set():
+        raise ReadCancelled("Reading cancelled.")
+
+
+def table_format(file_path):
+    # Format of a table file from its extension, CSV for anything unknown
+    ext = os.path.splitext(file_path)[1].lower()
+    for name, format_ext in TABLE_EXTENSIONS.items():
+        if ext == format_ext:
+            return name
+    return 'CSV'
+
+
+def _require_pyarrow():
+    try:
+        import pyarrow  # noqa: F401
+    except ImportError:
+        raise ImportError("Parquet and Feather files need the pyarrow package. Install it or use CSV or NPZ.")
+
+
+def write_table(df, file_path, file_format='CSV'):
+    if file_format == 'NPZ':
+        write_npz(df, file_path)
+    elif file_format == 'PARQUET':
+        _require_pyarrow()
+        df.to_parquet(file_path, index=False)
+    elif file_format == 'FEATHER':
+        _require_pyarrow()
+        df.reset_index(drop=True).to_feather(file_path)
+    else:
+        df.to_csv(file_path, index=False)
+
+
+def write_npz(df, file_path):
+    # Numeric columns are stored as they are. Text columns are stored as integer codes into a table of
+    # their unique strings, with -1 for missing values, so no pickled objects end up in the file.
+    arrays = {'columns': np.array([str(col) for col in df.columns])}
+    for i, col in enumerate(df.columns):
+        values = df[col]
+        if pd.api.types.is_numeric_dtype(values) or pd.api.types.is_bool_dtype(values):
+            arrays[f'values_{i}'] = values.to_numpy()
+        else:
+            codes, strings = pd.factorize(values.map(lambda value: None if pd.isna(value) else str(value)))
+            arrays[f'codes_{i}'] = codes.astype(np.int32)
+            arrays[f'strings_{i}'] = np.array(strings, dtype=str)
+    with open(file_path, 'wb') as file:
+        np.savez(file, **arrays)
+
+
+def write_npz_arrays(arrays, file_path):
+    # Columns in the read_arrays layout (float arrays or (codes, strings) pairs) in the write_npz format
+    arrays_out = {'columns': np.array([str(col) for col in arrays])}
+    for i, values in enumerate(arrays.values()):
+        if isinstance(values, tuple):
+            arrays_out[f'codes_{i}'] = np.asarray(values[0], dtype=np.int32)
+            arrays_out[f'strings_{i}'] = np.array(values[1], dtype=str)
+        else:
+            arrays_out[f'values_{i}'] = values
+    with open(file_path, 'wb') as file:
+        np.savez(file, **arrays_out)
+
+
+def read_npz_arrays(file_path):
+    # A write_npz file as columns in the read_arrays layout, without building a DataFrame
+    arrays = {}
+    with np.load(file_path, allow_pickle=False) as npz:
+        for i, col in enumerate(str(col) for col in npz['columns']):
+            if f'values_{i}' in npz:
+                arrays[col] = npz[f'values_{i}']
+            else:
+                arrays[col] = (npz[f'codes_{i}'], [str(value) for value in npz[f'strings_{i}']])
+    return arrays
+
+
+def read_npz(file_path, columns=None):
+    with np.load(file_path, allow_pickle=False) as npz:
+        names = [str(col) for col in npz['columns']]
+        data = {}
+        for i, col in enumerate(names):
+            if columns is not None and col not in columns:
+                continue
+            if f'values_{i}' in npz:
+                data[col] = npz[f'values_{i}']
+            else:
+                strings = npz[f'strings_{i}'].astype(object)
+                codes = npz[f'codes_{i}']
+                values = strings[codes] if len(strings) else np.full(len(codes), None, dtype=object)
+                values[codes < 0] = None
+                data[col] = values
+    return pd.DataFrame(data, columns=[col for col in names if columns is None or col in columns])
+
+
+def read_table(file_path, columns=None):
+    # Reads a table written by write_table (or any CSV) into a DataFrame
+    file_format = table_format(file_path)
+    if file_format == 'NPZ':
+        return read_npz(file_path, columns)
+    if file_format == 'PARQUET':
+        _require_pyarrow()
+        return pd.read_parquet(file_path, columns=columns)
+    if file_format == 'FEATHER':
+        _require_pyarrow()
+        return pd.read_feather(file_path, columns=columns)
+    return pd.read_csv(file_path, usecols=columns, dtype=str, keep_default_na=False)
+
+
+def read_table_columns(file_path):
+    # Column names only, without reading the rows
+    file_format = table_format(file_path)
+    if file_format == 'NPZ':
+        with np.load(file_path, allow_pickle=False) as npz:
+            return [str(col) for col in npz['columns']]
+    if file_format == 'PARQUET':
+        _require_pyarrow()
+        import pyarrow.parquet as pq
+        return list(pq.read_schema(file_path).names)
+    if file_format == 'FEATHER':
+        _require_pyarrow()
+        import pyarrow.feather as feather
+        return list(feather.read_table(file_path, memory_map=True).schema.names)
+    return list(pd.read_csv(file_path, nrows=0).columns)
+
+
+def _as_text(values):
+    # Column values as the strings a CSV round trip gives, '' for missing values
+    if pd.api.types.is_string_dtype(values):
+        return values.fillna('')
+    text = values.astype(object).map(str)
+    return text.where(values.notna(), '')
+
+
+def standalone_module(module_file):
+    # Worker processes unpickle tasks by importing the module of the task function. Importing it by its
+    # own file name keeps them from importing the add-on package, whose __init__ needs bpy.
+    directory = os.path.dirname(os.path.abspath(module_file))
+    if directory not in sys.path:
+        sys.path.append(directory)
+    return importlib.import_module(os.path.splitext(os.path.basename(module_file))[0])
+
+
+@contextmanager
+def process_pool(workers):
+    # Process pool for the parallel readers and the desurvey, or None when running on a single core
+    if workers <= 1:
+        yield None
+        return
+    executor = ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context('spawn'))
+    try:
+        yield executor
+    finally:
+        executor.shutdown()
+
+
+def use_parallel_csv(file_path, workers):
+    return workers > 1 and table_format(file_path) == 'CSV' and os.path.getsize(file_path) >= PARALLEL_MIN_BYTES
+
+
+def csv_byte_ranges(file_path, parts):
+    # Splits the rows of a CSV file into up to `parts` byte ranges that start and end on line breaks,
+    # so each can be parsed on its own. Quoted values that contain line breaks are not supported.
+    size = os.path.getsize(file_path)
+    with open(file_path, 'rb') as file:
+        file.readline()  # header
+        bounds = [file.tell()]
+        for part in range(1, parts):
+            position = bounds[0] + (size - bounds[0]) * part // parts
+            if position <= bounds[-1]:
+                continue
+            file.seek(position - 1)
+            file.readline()  # to the end of the line the range would otherwise cut
+            if bounds[-1] < file.tell() < size:
+                bounds.append(file.tell())
+    bounds.append(size)
+    return [(start, stop) for start, stop in zip(bounds[:-1], bounds[1:]) if stop > start]
+
+
+def _read_csv_range(file_path, start, stop, names, read_options):
+    # Rows of one byte range of a CSV file, parsed by a worker process
+    with open(file_path, 'rb') as file:
+        file.seek(start)
+        data = file.read(stop - start)
+    return pd.read_csv(io.BytesIO(data), header=None, names=names, **read_options)
+
+
+def _read_csv_range_arrays(file_path, start, stop, names, float_cols, text_cols, usecols=None):
+    chunk = _read_csv_range(file_path, start, stop, names, {'usecols': usecols, 'dtype': str, 'keep_default_na': False})
+    skipped = {}
+    return _typed_columns(chunk, float_cols, text_cols, skipped), skipped
+
+
+def _csv_ranges(file_path, workers):
+    # A few ranges per worker so a slow range does not hold up the others, and none over RANGE_BYTES
+    return csv_byte_ranges(file_path, max(4 * workers, -(-os.path.getsize(file_path) // RANGE_BYTES)))
+
+
+def _read_csv_ranges(file_path, workers, worker_name, *args, ranges=None, cancel=None):
+    # Results of a worker function for each byte range of the file, in file order. Ranges are submitted
+    # as results are collected, at most RANGES_PER_WORKER per worker at a time. Once cancel is set no
+    # more ranges are submitted, the waiting ones are dropped and ReadCancelled is raised.
+    if ranges is None:
+        ranges = _csv_ranges(file_path, workers)
+    with process_pool(workers) as pool:
+        worker = getattr(standalone_module(__file__), worker_name)
+        pending = deque()
+        try:
+            for start, stop in ranges:
+                check_cancel(cancel)
+                pending.append(pool.submit(worker, file_path, start, stop, *args))
+                if len(pending) >= RANGES_PER_WORKER * workers:
+                    yield pending.popleft().result()
+            while pending:
+                check_cancel(cancel)
+                yield pending.popleft().result()
+        finally:
+            # the pool waits for the running ranges only
+            for future in pending:
+                future.cancel()
+
+
+def read_csv_table(file_path, workers=1):
+    # pd.read_csv with its usual type inference. Large files are parsed in parallel byte ranges.
+    if not use_parallel_csv(file_path, workers):
+        return pd.read_csv(file_path)
+    names = list(pd.read_csv(file_path, nrows=0).columns)
+    ranges = _csv_ranges(file_path, workers)
+    frames = list(_read_csv_ranges(file_path, workers, '_read_csv_range', names, {}, ranges=ranges))
+    if not frames:
+        return pd.DataFrame(columns=names)
+    # A column with text in some ranges only is text throughout, as it is when read in one go. The
+    # ranges that read it as numbers are read again as text for those columns, formatting the parsed
+    # numbers would change the values ('0007' would become '7').
+    is_number = [{col: pd.api.types.is_numeric_dtype(frame[col]) for col in names} for frame in frames]
+    mixed = [col for col in names if len({numbers[col] for numbers in is_number}) > 1]
+    number_ranges = [i for i, numbers in enumerate(is_number) if any(numbers[col] for col in mixed)]
+    texts = _read_csv_ranges(file_path, workers, '_read_csv_range', names, {'usecols': mixed, 'dtype': str},
+                             ranges=[ranges[i] for i in number_ranges])
+    for i, text in zip(number_ranges, texts):
+        for col in mixed:
+            frames[i][col] = text[col]
+    return pd.concat(frames, ignore_index=True)
+
+
+def iter_table_chunks(file_path, columns=None, chunksize=200000, workers=1, cancel=None):
+    # A table in chunks of rows. CSV files are parsed chunk by chunk (as text, like csv.DictReader),
+    # so only one chunk of text is in memory at a time; the typed formats are read whole and sliced.
+    # With workers, large CSV files are parsed in parallel byte ranges, each range one chunk.
+    # Raises ReadCancelled between chunks once cancel is set (see check_cancel).
+    if use_parallel_csv(file_path, workers):
+        names = read_table_columns(file_path)
+        yield from _read_csv_ranges(file_path, workers, '_read_csv_range', names,
+                                    {'usecols': columns, 'dtype': str, 'keep_default_na': False}, cancel=cancel)
+        return
+    if table_format(file_path) == 'CSV':
+        for chunk in pd.read_csv(file_path, usecols=columns, dtype=str, keep_default_na=False, chunksize=chunksize):
+            check_cancel(cancel)
+            yield chunk
+        return
+    table = read_table(file_path, columns)
+    for start in range(0, len(table), chunksize):
+        check_cancel(cancel)
+        yield table.iloc[start:start + chunksize]
+
+
+def _add_counts(total, counts):
+    for key, count in counts.items():
+        total[key] = total.get(key, 0) + count
+
+
+def _valid_coordinates(chunk, float_cols, skipped=None):
+    # float_cols of a chunk as floats and the mask of rows where all of them are numbers. The rows left
+    # out are counted in skipped: 'rows' in total and (column, 'missing' or 'non-numeric') per column.
+    coords = {col: pd.to_numeric(chunk[col], errors='coerce').astype(float) for col in float_cols}
+    valid = np.ones(len(chunk), dtype=bool)
+    for values in coords.values():
+        valid &= values.notna().to_numpy()
+    if skipped is not None and not valid.all():
+        counts = {'rows': int((~valid).sum())}
+        for col, values in coords.items():
+            missing = (_as_text(chunk[col]).str.strip() == '').to_numpy()
+            counts[(col, 'missing')] = int(missing.sum())
+            counts[(col, 'non-numeric')] = int((values.isna().to_numpy() & ~missing).sum())
+        _add_counts(skipped, counts)
+    return coords, valid
+
+
+def skipped_rows_message(skipped, float_cols):
+    # The rows read_arrays left out as one line for a report, '' when there are none
+    if not skipped.get('rows'):
+        return ''
+    reasons = [
+        f"{skipped[(col, reason)]:,} {reason} {col}"
+        for col in float_cols for reason in ('missing', 'non-numeric') if skipped.get((col, reason))
+    ]
+    return f"Skipped {skipped['rows']:,} rows without valid coordinates ({', '.join(reasons)})."
+
+
+def hole_list(hole_ids, limit=5):
+    # The first few unique hole IDs for a report line
+    hole_ids = pd.unique(np.asarray(hole_ids))
+    names = ", ".join(map(str, hole_ids[:limit]))
+    return names + (f" and {len(hole_ids) - limit:,} more" if len(hole_ids) > limit else "")
+
+
+def hole_row_messages(hole_ids, xyz):
+    # Checks of drill hole rows in import order, as report lines: holes whose rows are not together,
+    # holes with a single row and rows that repeat the point before them (zero length intervals)
+    codes, names = pd.factorize(np.asarray(hole_ids))
+    if not len(codes):
+        return []
+    messages = []
+    run_starts = np.flatnonzero(np.diff(codes, prepend=-1))
+    split = np.flatnonzero(np.bincount(codes[run_starts], minlength=len(names)) > 1)
+    if len(split):
+        messages.append(f"{len(split):,} holes have rows that are not together in the file, their traces are drawn in pieces "
+                        f"(holes: {hole_list(names[split])}).")
+    single = np.flatnonzero(np.bincount(codes, minlength=len(names)) == 1)
+    if len(single):
+        messages.append(f"{len(single):,} holes have a single row and no interval to draw (holes: {hole_list(names[single])}).")
+    repeated = np.flatnonzero((codes[1:] == codes[:-1]) & (xyz[1:] == xyz[:-1]).all(axis=1)) + 1
+    if len(repeated):
+        messages.append(f"{len(repeated):,} rows repeat the point of the row before them, giving zero length intervals "
+                        f"(holes: {hole_list(pd.unique(names[codes[repeated]]))}).")
+    return messages
+
+
+def duplicate_points_message(xyz):
+    # Points that share their coordinates with an earlier point, as a report line ('' when there are none)
+    if not len(xyz):
+        return ''
+    duplicates = len(xyz) - len(np.unique(xyz, axis=0))
+    if not duplicates:
+        return ''
+    return f"{duplicates:,} points have the same coordinates as an earlier point and are drawn on top of it."
+
+
+def _typed_columns(chunk, float_cols, text_cols, skipped=None):
+    # The columns of one chunk of text rows: float_cols and any other column where every value is a
+    # number (or empty) as float64, the rest as (int32 codes, unique strings). Rows where a float
+    # column is missing are left out.
+    coords, valid = _valid_coordinates(chunk, float_cols, skipped)
+    chunk = chunk[valid]
+    typed = {}
+    for col in chunk.columns:
+        if col in float_cols:
+            typed[col] = coords[col][valid].to_numpy()
+            continue
+        text = _as_text(chunk[col])
+        if col not in text_cols:
+            values = pd.to_numeric(chunk[col], errors='coerce').astype(float)
+            if (values.notna() | (text == '')).all():
+                typed[col] = values.to_numpy()
+                continue
+        codes, strings = pd.factorize(text)
+        typed[col] = (codes.astype(np.int32), list(strings))
+    return typed
+
+
+def _merge_typed(columns, pieces, text_cols):
+    # Joins the _typed_columns of consecutive chunks, a column that is text in any chunk being text in
+    # all of them (see read_arrays). The codes of a text column are renumbered into one string table in
+    # order of first appearance.
+    arrays = {}
+    for col in columns:
+        parts = [piece[col] for piece in pieces]
+        if col not in text_cols and not any(isinstance(part, tuple) for part in parts):
+            arrays[col] = np.concatenate(parts) if parts else np.zeros(0)
+            continue
+        strings = {}  # string -> code
+        codes = []
+        for part in parts:
+            renumber = np.array([strings.setdefault(value, len(strings)) for value in part[1]], dtype=np.int32)
+            codes.append(renumber[part[0]] if len(renumber) else np.zeros(0, dtype=np.int32))
+        arrays[col] = (np.concatenate(codes) if codes else np.zeros(0, dtype=np.int32), list(strings))
+    return arrays
+
+
+def read_arrays(file_path, float_cols, text_cols=(), chunksize=200000, workers=1, skipped=None, cancel=None):
+    # Columns of a table as arrays, parsed chunk by chunk: float_cols and any other column where every
+    # value is a number (or empty) as float64, the rest as a (codes, strings) pair of int32 codes into
+    # the column's unique strings. text_cols are always text. Rows where a float column is missing are
+    # left out. Only the typed arrays are kept, never the text of the whole file. With workers, large
+    # CSV files are parsed and typed in parallel byte ranges and merged here. The rows left out are
+    # counted in skipped when it is given (see _valid_coordinates). Setting cancel stops the read with
+    # ReadCancelled (see check_cancel).
+    columns = read_table_columns(file_path)
+    text_cols = set(text_cols)
+    skipped = {} if skipped is None else skipped
+    pieces = []
+    parallel = use_parallel_csv(file_path, workers)
+    if parallel:
+        ranges = _csv_ranges(file_path, workers)
+        for typed, range_skipped in _read_csv_ranges(file_path, workers, '_read_csv_range_arrays', columns,
+                                                     list(float_cols), list(text_cols), ranges=ranges, cancel=cancel):
+            pieces.append(typed)
+            _add_counts(skipped, range_skipped)
+    else:
+        for chunk in iter_table_chunks(file_path, chunksize=chunksize, cancel=cancel):
+            pieces.append(_typed_columns(chunk, float_cols, text_cols, skipped))
+            # once a column holds text there is no need to try the next chunks as numbers
+            text_cols.update(col for col, values in pieces[-1].items() if isinstance(values, tuple))
+
+    # A column with text in some chunks only is text throughout. The chunks that read it as numbers are
+    # read again as text for those columns, formatting the parsed numbers would change the values
+    # ('0007' would become '7').
+    mixed = [col for col in columns if len({isinstance(piece[col], tuple) for piece in pieces}) > 1]
+    number_pieces = [i for i, piece in enumerate(pieces) if any(not isinstance(piece[col], tuple) for col in mixed)]
+    usecols = list(float_cols) + mixed
+    if parallel:
+        texts = (typed for typed, _ in _read_csv_ranges(file_path, workers, '_read_csv_range_arrays', columns, list(float_cols),
+                                                        mixed, usecols, ranges=[ranges[i] for i in number_pieces], cancel=cancel))
+    else:
+        chunks = iter_table_chunks(file_path, columns=usecols, chunksize=chunksize, cancel=cancel)
+        texts = (_typed_columns(chunk, float_cols, mixed) for i, chunk in enumerate(chunks) if i in number_pieces)
+    for i, text in zip(number_pieces, texts):
+        for col in mixed:
+            pieces[i][col] = text[col]
+    return _merge_typed(columns, pieces, text_cols.union(mixed))
+
+
+def array_row(columns, row, cols=None):
+    # One row of read_arrays columns (or of the cols among them) as a dict: numbers as floats, text as
+    # strings and '' where a value is missing
+    values = {}
+    for col in columns if cols is None else cols:
+        column = columns[col]
+        if isinstance(column, tuple):
+            code = column[0][row]
+            values[col] = column[1][code] if code >= 0 else ''
+        else:
+            value = float(column[row])
+            values[col] = '' if np.isnan(value) else value
+    return values
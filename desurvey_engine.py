@@ -0,0 +1,647 @@
+import os
+import sys
+import hashlib
+from multiprocessing import shared_memory
+import numpy as np
+import pandas as pd
+
+try:
+    from ..data_io import hole_list, process_pool, standalone_module
+except ImportError:
+    # Imported on its own, by worker processes and the benchmarks. data_io sits next to this file in
+    # the repository and one folder up in the installed add-on.
+    parent = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    if parent not in sys.path:
+        sys.path.append(parent)
+    from data_io import hole_list, process_pool, standalone_module
+
+# Vectorized desurvey routines used by bldesurvey. This module must not import bpy (data_io does not
+# either) so the same code can run outside Blender.
+
+# Below this many rows starting worker processes costs more than it saves
+PARALLEL_MIN_ROWS = 50000
+
+
+def hole_slices(hole_ids):
+    # Map each hole_id to the slice it occupies in an array that is already grouped by hole_id
+    hole_ids = np.asarray(hole_ids)
+    if len(hole_ids) == 0:
+        return {}
+    starts = np.flatnonzero(hole_ids[1:] != hole_ids[:-1]) + 1
+    starts = np.concatenate(([0], starts))
+    stops = np.concatenate((starts[1:], [len(hole_ids)]))
+    return {hole_ids[start]: slice(start, stop) for start, stop in zip(starts, stops)}
+
+
+class HoleIndex:
+    # A table sorted once by hole_id (then sort_col) with each hole's rows as a contiguous slice, so
+    # looking up a hole is a dict access instead of a scan of the whole table. The sort is stable,
+    # so the first row of a hole is the first one in the original table.
+
+    def __init__(self, table, hole_id_col, sort_col=None):
+        by = [hole_id_col] if sort_col is None else [hole_id_col, sort_col]
+        self.table = table.sort_values(by=by, kind='mergesort').reset_index(drop=True)
+        self.slices = hole_slices(self.table[hole_id_col].to_numpy())
+
+    def __contains__(self, hole_id):
+        return hole_id in self.slices
+
+    def hole_ids(self):
+        return self.slices.keys()
+
+    def rows(self, hole_id):
+        return self.table.iloc[self.slices[hole_id]]
+
+    def first_row(self, hole_id):
+        return self.slices[hole_id].start
+
+    def values(self, columns):
+        return self.table[columns].to_numpy(dtype=float)
+
+
+def index_collar_survey(collar_data, survey_data, cols):
+    # Indexes built once per desurvey run and shared by every stage
+    collar_index = HoleIndex(collar_data, cols['collar_hole_id'])
+    survey_index = HoleIndex(survey_data, cols['survey_hole_id'], cols['survey_depth'])
+    return collar_index, survey_index
+
+
+def lookup_survey(depths, survey_depths, survey_values):
+    # Vectorized VLOOKUP with approximate match: value of the deepest station at or above each depth.
+    # Depths above the first station take the last station, same as the original spreadsheet logic.
+    index = np.searchsorted(survey_depths, depths, side='right') - 1
+    index[index < 0] = len(survey_depths) - 1
+    return survey_values[index]
+
+
+def desurvey_hole_tangential(depths, collar_xyz, survey_depths, survey_azimuths, survey_dips):
+    # Desurvey one hole. depths are the sorted 'to' depths of the hole, the first one being the collar.
+    azimuth = np.radians(lookup_survey(depths, survey_depths, survey_azimuths))
+    dip = np.radians(lookup_survey(depths, survey_depths, survey_dips))
+
+    lengths = np.diff(depths, prepend=depths[0])
+    deltas = (
+        lengths * np.sin(azimuth) * np.cos(dip),
+        lengths * np.cos(azimuth) * np.cos(dip),
+        lengths * np.sin(dip),
+    )
+
+    # Accumulate from the collar so each step is added in the same order as the row by row calculation
+    return [np.cumsum(np.concatenate(([start], delta)))[1:] for start, delta in zip(collar_xyz, deltas)]
+
+
+def direction_vectors(azimuths, dips):
+    # Unit vectors (east, north, up) for azimuths and dips in degrees, dip negative downwards
+    azimuth = np.radians(azimuths)
+    dip = np.radians(dips)
+    return np.column_stack((np.sin(azimuth) * np.cos(dip), np.cos(azimuth) * np.cos(dip), np.sin(dip)))
+
+
+def segment_offsets(start_dirs, end_dirs, segment_lengths, lengths, method):
+    # Offset after travelling 'lengths' into survey segments that run from start_dirs to end_dirs
+    # over segment_lengths. All methods reduce to a straight line when the two directions match.
+    lengths = lengths[:, None]
+    if method == 'TANGENTIAL':
+        # Direction of the upper station over the whole segment
+        return lengths * start_dirs
+    if method == 'BALANCED_TANGENTIAL':
+        # First half of the segment along the upper station, second half along the lower one
+        half = segment_lengths[:, None] / 2
+        return np.minimum(lengths, half) * start_dirs + np.maximum(lengths - half, 0) * end_dirs
+
+    # Minimum curvature: circular arc between the stations, the partial direction found by slerp
+    cos_angle = np.clip(np.sum(start_dirs * end_dirs, axis=1), -1.0, 1.0)
+    angle = np.arccos(cos_angle)
+    curved = angle > 1e-9
+    fraction = np.divide(lengths[:, 0], segment_lengths, out=np.zeros(len(lengths)), where=segment_lengths > 0)
+    partial_angle = fraction * angle
+
+    sin_angle = np.where(curved, np.sin(angle), 1.0)
+    weight_start = np.where(curved, np.sin(angle - partial_angle) / sin_angle, 1.0)
+    weight_end = np.where(curved, np.sin(partial_angle) / sin_angle, 0.0)
+    partial_dirs = weight_start[:, None] * start_dirs + weight_end[:, None] * end_dirs
+
+    ratio_factor = np.ones(len(partial_angle))
+    bent = partial_angle > 1e-9
+    ratio_factor[bent] = 2 / partial_angle[bent] * np.tan(partial_angle[bent] / 2)
+    return lengths / 2 * (start_dirs + partial_dirs) * ratio_factor[:, None]
+
+
+def desurvey_hole_stations(depths, collar_xyz, survey_depths, survey_azimuths, survey_dips, method):
+    # Desurvey one hole along the path through its survey stations. Positions are exact at any
+    # depth, so results do not depend on how densely the hole is sampled. The first depth is the collar.
+    dirs = direction_vectors(survey_azimuths, survey_dips)
+    last = len(survey_depths) - 1
+
+    station_lengths = np.diff(survey_depths)
+    station_offsets = segment_offsets(dirs[:-1], dirs[1:], station_lengths, station_lengths, method)
+    station_xyz = np.vstack((np.zeros(3), np.cumsum(station_offsets, axis=0)))
+
+    # Above the first station and below the last one the hole continues straight
+    index = np.clip(np.searchsorted(survey_depths, depths, side='right') - 1, 0, last)
+    inside = (index < last) & (depths >= survey_depths[0])
+    next_index = np.where(inside, index + 1, index)
+    segment_lengths = np.where(inside, survey_depths[next_index] - survey_depths[index], 0.0)
+
+    xyz = station_xyz[index] + segment_offsets(
+        dirs[index], dirs[next_index], segment_lengths, depths - survey_depths[index], method
+    )
+    xyz += np.asarray(collar_xyz) - xyz[0]
+    return [xyz[:, 0], xyz[:, 1], xyz[:, 2]]
+
+
+def desurvey_holes(depths, hole_rows, collar_xyz, collar_index, survey, survey_rows, method):
+    # Numeric desurvey kernel. hole_rows and survey_rows hold (start, stop) rows of each hole in depths
+    # and in survey (depth, azimuth, dip rows), collar_index the row of each hole in collar_xyz.
+    xyz = np.full((3, len(depths)), np.nan)
+    offset = hole_rows[0][0] if len(hole_rows) else 0
+    for (start, stop), collar_row, (survey_start, survey_stop) in zip(hole_rows, collar_index, survey_rows):
+        hole_args = (
+            depths[start - offset:stop - offset], collar_xyz[collar_row],
+            survey[0, survey_start:survey_stop], survey[1, survey_start:survey_stop], survey[2, survey_start:survey_stop]
+        )
+        if method == 'TANGENTIAL':
+            hole_xyz = desurvey_hole_tangential(*hole_args)
+        else:
+            hole_xyz = desurvey_hole_stations(*hole_args, method)
+        for axis in range(3):
+            xyz[axis, start - offset:stop - offset] = hole_xyz[axis]
+    return xyz
+
+
+def _desurvey_shard(shared, depths, hole_rows, collar_index, survey_rows, method):
+    # Worker process entry point. The collar and survey arrays are read from shared memory.
+    blocks = [shared_memory.SharedMemory(name=name) for name, _ in shared]
+    try:
+        collar_xyz, survey = [np.ndarray(shape, dtype=float, buffer=block.buf) for block, (_, shape) in zip(blocks, shared)]
+        xyz = desurvey_holes(depths, hole_rows, collar_xyz, collar_index, survey, survey_rows, method)
+        del collar_xyz, survey  # release the buffers before closing
+    finally:
+        for block in blocks:
+            block.close()
+    return xyz
+
+
+def _desurvey_parallel(pool, depths, hole_rows, collar_xyz, collar_index, survey, survey_rows, method):
+    # Shards holes across the pool in contiguous groups of similar row counts and merges in hole order
+    shards = min(len(hole_rows), 4 * (os.cpu_count() or 1))
+    bounds = np.searchsorted(hole_rows[:, 1], np.linspace(0, len(depths), shards + 1)[1:-1])
+    bounds = np.unique(np.concatenate(([0], bounds, [len(hole_rows)])))
+
+    blocks = []
+    try:
+        shared = []
+        for array in (collar_xyz, survey):
+            block = shared_memory.SharedMemory(create=True, size=max(array.nbytes, 1))
+            np.ndarray(array.shape, dtype=float, buffer=block.buf)[...] = array
+            blocks.append(block)
+            shared.append((block.name, array.shape))
+
+        worker = standalone_module(__file__)._desurvey_shard
+        futures = [
+            pool.submit(
+                worker, shared, depths[hole_rows[first, 0]:hole_rows[last - 1, 1]],
+                hole_rows[first:last], collar_index[first:last], survey_rows[first:last], method
+            )
+            for first, last in zip(bounds[:-1], bounds[1:])
+        ]
+        return np.concatenate([future.result() for future in futures], axis=1)
+    finally:
+        for block in blocks:
+            block.close()
+            block.unlink()
+
+
+def desurvey_intervals(drill_data, collar_index, survey_index, cols, method='TANGENTIAL', pool=None):
+    # Returns x, y, z arrays for drill_data, which must be sorted by hole_id and to depth.
+    # Only the first row of repeated hole/depth pairs receives coordinates, the others stay NaN.
+    # Holes are split across the processes of pool when one is given (see process_pool).
+    hole_ids = drill_data[cols['drill_hole_id']].to_numpy()
+    depths = drill_data[cols['drill_to_depth']].to_numpy(dtype=float)
+
+    collar_xyz = collar_index.values([cols['collar_easting'], cols['collar_northing'], cols['collar_elevation']])
+    survey = survey_index.values([cols['survey_depth'], cols['survey_azimuth'], cols['survey_dip']]).T.copy()
+
+    holes = hole_slices(hole_ids)
+    hole_rows = np.array([(rows.start, rows.stop) for rows in holes.values()], dtype=np.int64).reshape(-1, 2)
+    collar_rows = np.array([collar_index.first_row(hole_id) for hole_id in holes], dtype=np.int64)
+    survey_rows = np.array(
+        [(survey_index.slices[hole_id].start, survey_index.slices[hole_id].stop) for hole_id in holes], dtype=np.int64
+    ).reshape(-1, 2)
+
+    if pool is not None and len(depths) >= PARALLEL_MIN_ROWS:
+        xyz = _desurvey_parallel(pool, depths, hole_rows, collar_xyz, collar_rows, survey, survey_rows, method)
+    else:
+        xyz = desurvey_holes(depths, hole_rows, collar_xyz, collar_rows, survey, survey_rows, method)
+
+    repeated = np.zeros(len(depths), dtype=bool)
+    repeated[1:] = (hole_ids[1:] == hole_ids[:-1]) & (depths[1:] == depths[:-1])
+    xyz[:, repeated] = np.nan
+
+    return xyz[0], xyz[1], xyz[2]
+
+
+def infill_pieces(gap_start, gap_end, max_infill):
+    # Splits each gap into pieces of at most max_infill, returned as (gap, from, to) ordered by gap and depth.
+    # Every step adds max_infill to the previous piece end, the same additions as walking a gap piece by piece.
+    gaps, starts, ends = [np.zeros(0, dtype=np.int64)], [np.zeros(0)], [np.zeros(0)]
+    active = np.arange(len(gap_start))
+    piece_from = np.asarray(gap_start, dtype=float)
+    while active.size:
+        keep = piece_from < gap_end[active]
+        active, piece_from = active[keep], piece_from[keep]
+        piece_to = np.minimum(piece_from + max_infill, gap_end[active])
+        gaps.append(active)
+        starts.append(piece_from)
+        ends.append(piece_to)
+        piece_from = piece_to
+    gaps = np.concatenate(gaps)
+    order = np.argsort(gaps, kind='stable')
+    return gaps[order], np.concatenate(starts)[order], np.concatenate(ends)[order]
+
+
+def generate_infill_rows(drill_data, collar_index, cols, max_infill=25):
+    # Pads every hole with empty intervals from the collar start depth to the final depth, filling
+    # gaps between logged intervals with pieces of at most max_infill, and adds one zero length row
+    # at the top of each hole for the collar. Rows are built as arrays and the table is allocated once.
+    # drill_data must be sorted by hole_id and to depth. Holes without a collar row are dropped.
+    hole_id_col_drill = cols['drill_hole_id']
+    from_depth_col = cols['drill_from_depth']
+    to_depth_col = cols['drill_to_depth']
+    start_depth_collar = cols['collar_start_depth']
+    final_depth_collar = cols['collar_final_depth']
+
+    holes = hole_slices(drill_data[hole_id_col_drill].to_numpy())
+    for hole_id in holes:
+        if hole_id not in collar_index:
+            print(f"No collar data found for hole_id {hole_id}, skipping...")
+    kept = [rows for hole_id, rows in holes.items() if hole_id in collar_index]
+    if not kept:
+        return pd.DataFrame(columns=list(drill_data.columns) + ['x', 'y', 'z'])
+    if len(kept) < len(holes):
+        drill_data = drill_data.iloc[np.concatenate([np.arange(rows.start, rows.stop) for rows in kept])]
+    drill_data = drill_data.reset_index(drop=True)
+
+    # Start and final depth of each hole from its first collar row
+    collar_rows = np.array([collar_index.first_row(hole_id) for hole_id in holes if hole_id in collar_index])
+    final_depth = collar_index.table[final_depth_collar].to_numpy(dtype=float)[collar_rows]
+    if start_depth_collar == 'None':
+        start_depth = np.zeros(len(collar_rows))
+    else:
+        start_depth = collar_index.table[start_depth_collar].to_numpy(dtype=float)[collar_rows]
+
+    hole_ids = drill_data[hole_id_col_drill].to_numpy()
+    from_depths = drill_data[from_depth_col].to_numpy(dtype=float)
+    to_depths = drill_data[to_depth_col].to_numpy(dtype=float)
+    n_rows = len(drill_data)
+    counts = np.array([rows.stop - rows.start for rows in kept])
+    first = np.concatenate([[0], np.cumsum(counts)[:-1]])
+    last = first + counts - 1
+
+    # Gaps above each row (from the previous to depth, or the collar start depth for the first row)
+    # and below the last row of each hole down to the final depth
+    previous_to = np.empty(n_rows)
+    previous_to[1:] = to_depths[:-1]
+    previous_to[first] = start_depth
+    above = np.flatnonzero(from_depths - previous_to > 0)
+    below = np.flatnonzero(to_depths[last] < final_depth)
+    gap_start = np.concatenate([previous_to[above], to_depths[last][below]])
+    gap_end = np.concatenate([from_depths[above], final_depth[below]])
+    gap_row = np.concatenate([above, last[below]])
+    # Sort slot of each gap: 3 * row for infill above a row, 3 * row + 2 for infill below the last row
+    gap_slot = np.concatenate([3 * above, 3 * last[below] + 2])
+    gaps, piece_from, piece_to = infill_pieces(gap_start, gap_end, max_infill)
+
+    # Logged rows, infill pieces and collar rows in one set of arrays, put in hole order with a stable sort
+    n_holes = len(kept)
+    source = np.concatenate([np.arange(n_rows), np.full(len(gaps) + n_holes, -1)])
+    slot = np.concatenate([3 * np.arange(n_rows) + 1, gap_slot[gaps], 3 * n_rows + np.arange(n_holes)])
+    hole_row = np.concatenate([np.arange(n_rows), gap_row[gaps], first])
+    from_all = np.concatenate([from_depths, piece_from, np.zeros(n_holes)])
+    to_all = np.concatenate([to_depths, piece_to, np.zeros(n_holes)])
+
+    # Collar row at the minimum from depth of the hole
+    hole_of = np.repeat(np.arange(n_holes), counts)[hole_row[:n_rows + len(gaps)]]
+    min_from = np.full(n_holes, np.inf)
+    np.fmin.at(min_from, hole_of, from_all[:n_rows + len(gaps)])
+    min_from[np.isinf(min_from)] = np.nan
+    from_all[n_rows + len(gaps):] = min_from
+    to_all[n_rows + len(gaps):] = min_from
+
+    order = np.argsort(slot, kind='stable')
+    result_df = drill_data.reindex(source[order]).reset_index(drop=True)
+    result_df[hole_id_col_drill] = hole_ids[hole_row[order]]
+    result_df[from_depth_col] = from_all[order]
+    result_df[to_depth_col] = to_all[order]
+    for col in ['x', 'y', 'z']:
+        result_df[col] = np.nan
+
+    return result_df.sort_values(by=[hole_id_col_drill, to_depth_col]).reset_index(drop=True)
+
+
+def desurvey_table(drill_data, collar_index, survey_index, cols, method='TANGENTIAL', pool=None, max_infill=25):
+    # Full desurvey of an interval table: infill, hole ID checks and x, y, z for every row.
+    # collar_index and survey_index come from index_collar_survey.
+    # Raises ValueError when holes are missing from the collar or survey data.
+    hole_id_col = cols['drill_hole_id']
+    drill_data = drill_data.sort_values(by=[hole_id_col, cols['drill_to_depth']]).reset_index(drop=True)
+
+    result_df = generate_infill_rows(drill_data, collar_index, cols, max_infill)
+    if result_df.empty:
+        return result_df
+
+    # Check for missing hole IDs in collar and survey data
+    unique_holes = set(result_df[hole_id_col].unique())
+    missing_in_collar = unique_holes - collar_index.hole_ids()
+    missing_in_survey = unique_holes - survey_index.hole_ids()
+    if missing_in_collar or missing_in_survey:
+        raise ValueError("Missing hole IDs in collar data: {} and/or in survey data: {}.".format(
+            ", ".join(map(str, missing_in_collar)), ", ".join(map(str, missing_in_survey))))
+
+    result_df['x'], result_df['y'], result_df['z'] = desurvey_intervals(result_df, collar_index, survey_index, cols, method, pool)
+    return result_df
+
+
+def _number_checks(table, columns, hole_id_col, table_name, errors, warnings):
+    # Values of columns that are not numbers stop the desurvey, missing ones give rows without coordinates
+    for col in columns:
+        numbers = pd.to_numeric(table[col], errors='coerce').to_numpy(dtype=float)
+        missing = table[col].isna().to_numpy()
+        non_numeric = np.isnan(numbers) & ~missing
+        if non_numeric.any():
+            errors.append(f"{non_numeric.sum():,} {table_name} rows have a non-numeric {col} "
+                          f"(holes: {hole_list(table[hole_id_col].to_numpy()[non_numeric])}).")
+        if missing.any():
+            warnings.append(f"{missing.sum():,} {table_name} rows have no {col} "
+                            f"(holes: {hole_list(table[hole_id_col].to_numpy()[missing])}).")
+
+
+def validate_tables(drill_data, collar_data, survey_data, cols):
+    # Vectorized checks of the uploaded tables, run before desurveying. Returns (errors, warnings) as
+    # report lines: errors would make the desurvey fail part way, warnings are rows it skips or
+    # handles by a rule (first row wins). drill_data may be None to check the collar and survey only.
+    errors, warnings = [], []
+    collar_hole_col, survey_hole_col = cols['collar_hole_id'], cols['survey_hole_id']
+
+    collar_cols = [cols['collar_easting'], cols['collar_northing'], cols['collar_elevation'], cols['collar_final_depth']]
+    if cols['collar_start_depth'] != 'None':
+        collar_cols.append(cols['collar_start_depth'])
+    _number_checks(collar_data, collar_cols, collar_hole_col, "collar", errors, warnings)
+    repeated = collar_data[collar_hole_col].duplicated().to_numpy()
+    if repeated.any():
+        warnings.append(f"{repeated.sum():,} collar rows repeat a hole ID, the first row of each hole is used "
+                        f"(holes: {hole_list(collar_data[collar_hole_col].to_numpy()[repeated])}).")
+
+    _number_checks(survey_data, [cols['survey_depth'], cols['survey_azimuth'], cols['survey_dip']], survey_hole_col, "survey", errors, warnings)
+    repeated = survey_data.duplicated(subset=[survey_hole_col, cols['survey_depth']]).to_numpy()
+    if repeated.any():
+        warnings.append(f"{repeated.sum():,} survey rows repeat a hole and depth "
+                        f"(holes: {hole_list(survey_data[survey_hole_col].to_numpy()[repeated])}).")
+
+    if drill_data is None:
+        return errors, warnings
+
+    hole_col, from_col, to_col = cols['drill_hole_id'], cols['drill_from_depth'], cols['drill_to_depth']
+    _number_checks(drill_data, [from_col, to_col], hole_col, "interval", errors, warnings)
+    hole_ids = drill_data[hole_col].to_numpy()
+    from_depths = pd.to_numeric(drill_data[from_col], errors='coerce').to_numpy(dtype=float)
+    to_depths = pd.to_numeric(drill_data[to_col], errors='coerce').to_numpy(dtype=float)
+
+    reversed_rows = from_depths > to_depths
+    if reversed_rows.any():
+        warnings.append(f"{reversed_rows.sum():,} intervals have a from depth below their to depth "
+                        f"(holes: {hole_list(hole_ids[reversed_rows])}).")
+    repeated = drill_data.duplicated(subset=[hole_col, to_col]).to_numpy()
+    if repeated.any():
+        warnings.append(f"{repeated.sum():,} intervals repeat a hole and to depth, only the first gets coordinates "
+                        f"(holes: {hole_list(hole_ids[repeated])}).")
+
+    # Intervals that start above the end of the previous interval of their hole, by from depth
+    order = np.lexsort((to_depths, from_depths, pd.factorize(hole_ids)[0]))
+    sorted_holes = hole_ids[order]
+    overlapping = (sorted_holes[1:] == sorted_holes[:-1]) & (from_depths[order][1:] < to_depths[order][:-1])
+    if overlapping.any():
+        warnings.append(f"{overlapping.sum():,} intervals overlap the interval above them "
+                        f"(holes: {hole_list(sorted_holes[1:][overlapping])}).")
+
+    drill_holes = pd.Series(pd.unique(hole_ids))
+    in_collar = drill_holes.isin(collar_data[collar_hole_col]).to_numpy()
+    no_collar = drill_holes[~in_collar].to_numpy()
+    if len(no_collar):
+        warnings.append(f"{len(no_collar):,} holes are missing from the collar data and are skipped (holes: {hole_list(no_collar)}).")
+    with_collar = drill_holes[in_collar]
+    no_survey = with_collar[~with_collar.isin(survey_data[survey_hole_col])].to_numpy()
+    if len(no_survey):
+        errors.append(f"{len(no_survey):,} holes are missing from the survey data (holes: {hole_list(no_survey)}).")
+    return errors, warnings
+
+
+class DesurveyModel:
+    # Hole paths built once from collar and survey tables, for finding where holes are at any depth
+    # without desurveying an interval table. Positions follow the survey stations with the chosen
+    # method (TANGENTIAL holds each station's direction down to the next station), so they do not
+    # depend on which depths are asked for. The collar coordinates are at the collar start depth.
+
+    def __init__(self, collar_data, survey_data, cols, method='MINIMUM_CURVATURE'):
+        self.method = method
+        collar_index, survey_index = index_collar_survey(collar_data, survey_data, cols)
+        self.hole_ids = pd.Index([hole_id for hole_id in survey_index.hole_ids() if hole_id in collar_index])
+
+        survey_rows = [survey_index.slices[hole_id] for hole_id in self.hole_ids]
+        rows = np.concatenate([np.arange(s.start, s.stop) for s in survey_rows]) if survey_rows else np.zeros(0, dtype=np.int64)
+        survey = survey_index.values([cols['survey_depth'], cols['survey_azimuth'], cols['survey_dip']])[rows]
+        counts = np.array([s.stop - s.start for s in survey_rows], dtype=np.int64)
+        self.first_station = np.concatenate(([0], np.cumsum(counts)[:-1])).astype(np.int64)
+        self.last_station = self.first_station + counts - 1
+        self.station_hole = np.repeat(np.arange(len(counts)), counts)
+        self.station_depths = survey[:, 0]
+        self.dirs = direction_vectors(survey[:, 1], survey[:, 2])
+
+        # Station positions relative to the first station of each hole
+        lengths = np.diff(self.station_depths)
+        offsets = segment_offsets(self.dirs[:-1], self.dirs[1:], lengths, lengths, method)
+        offsets[self.station_hole[1:] != self.station_hole[:-1]] = 0
+        totals = np.vstack((np.zeros(3), np.cumsum(offsets, axis=0)))
+        self.station_xyz = totals - totals[self.first_station[self.station_hole]]
+
+        # Shift each path so the collar start depth lands on the collar coordinates
+        collar_rows = [collar_index.first_row(hole_id) for hole_id in self.hole_ids]
+        collar_xyz = collar_index.values([cols['collar_easting'], cols['collar_northing'], cols['collar_elevation']])[collar_rows]
+        if cols['collar_start_depth'] == 'None':
+            start_depths = np.zeros(len(self.hole_ids))
+        else:
+            start_depths = collar_index.values([cols['collar_start_depth']])[collar_rows, 0]
+        self.origins = np.zeros((len(self.hole_ids), 3))  # measured from the first stations meanwhile
+        self.origins = collar_xyz - self._path_xyz(np.arange(len(self.hole_ids)), start_depths)
+
+    def __contains__(self, hole_id):
+        return hole_id in self.hole_ids
+
+    def _path_xyz(self, holes, depths):
+        # Positions for hole numbers (rows of self.hole_ids) and depths, all holes in one pass.
+        # Queries and stations are sorted together by hole and depth, so the running maximum of the
+        # station numbers gives the deepest station at or above each query.
+        n_stations = len(self.station_depths)
+        keys_hole = np.concatenate((self.station_hole, holes))
+        keys_depth = np.concatenate((self.station_depths, depths))
+        keys_query = np.concatenate((np.zeros(n_stations, dtype=bool), np.ones(len(depths), dtype=bool)))
+        order = np.lexsort((keys_query, keys_depth, keys_hole))
+
+        station = np.where(keys_query, -1, np.arange(len(keys_query)))[order]
+        station = np.maximum.accumulate(station) if len(station) else station
+        index = np.empty(len(depths), dtype=np.int64)
+        index[order[keys_query[order]] - n_stations] = station[keys_query[order]]
+
+        # Above the first station and below the last one the hole continues straight
+        above = (index < 0) | (self.station_hole[np.maximum(index, 0)] != holes)
+        index[above] = self.first_station[holes[above]]
+        inside = (index < self.last_station[holes]) & (depths >= self.station_depths[index])
+        next_index = np.where(inside, index + 1, index)
+        segment_lengths = np.where(inside, self.station_depths[next_index] - self.station_depths[index], 0.0)
+
+        return self.station_xyz[index] + segment_offsets(
+            self.dirs[index], self.dirs[next_index], segment_lengths, depths - self.station_depths[index], self.method
+        ) + self.origins[holes]
+
+    def locate(self, hole_ids, depths):
+        # (n, 3) array of x, y, z for each hole ID and depth pair. Rows for unknown holes or missing
+        # depths are NaN.
+        depths = np.asarray(depths, dtype=float)
+        holes = self.hole_ids.get_indexer(np.asarray(hole_ids, dtype=object))
+        xyz = np.full((len(depths), 3), np.nan)
+        valid = (holes >= 0) & ~np.isnan(depths)
+        if valid.any():
+            xyz[valid] = self._path_xyz(holes[valid], depths[valid])
+        return xyz
+
+
+# Column of the cached table holding the input hash of each row's hole
+HOLE_KEY_COL = '_hole_key'
+
+
+def _slice_digests(table, slices):
+    # One digest per hole from the hashes of its rows, in row order
+    row_hashes = pd.util.hash_pandas_object(table, index=False).to_numpy()
+    return {hole_id: hashlib.blake2b(row_hashes[rows].tobytes(), digest_size=16).digest() for hole_id, rows in slices.items()}
+
+
+def hole_keys(drill_data, collar_index, survey_index, cols, method, max_infill):
+    # Hash of everything the desurvey of a hole depends on: its collar, survey and interval rows,
+    # the drill hole columns and the desurvey settings. drill_data must be sorted by hole_id and to depth.
+    holes = hole_slices(drill_data[cols['drill_hole_id']].to_numpy())
+    drill_digests = _slice_digests(drill_data, holes)
+    collar_digests = _slice_digests(collar_index.table, collar_index.slices)
+    survey_digests = _slice_digests(survey_index.table, survey_index.slices)
+    settings = repr((method, float(max_infill), list(drill_data.columns), sorted(cols.items()))).encode()
+
+    keys = {}
+    for hole_id in holes:
+        digest = hashlib.blake2b(settings, digest_size=16)
+        digest.update(drill_digests[hole_id])
+        digest.update(collar_digests.get(hole_id, b''))
+        digest.update(survey_digests.get(hole_id, b''))
+        keys[hole_id] = digest.hexdigest()
+    return keys
+
+
+def desurvey_table_incremental(drill_data, collar_index, survey_index, cols, cached=None, method='TANGENTIAL', pool=None,
+                               max_infill=25):
+    # desurvey_table that reuses the rows of holes whose inputs are unchanged since cached was made.
+    # cached is a previous result of this function (or None). The result carries the key of every
+    # row's hole in HOLE_KEY_COL so it can be cached in turn. Returns the result and the number of
+    # holes that were desurveyed again.
+    hole_id_col = cols['drill_hole_id']
+    drill_data = drill_data.sort_values(by=[hole_id_col, cols['drill_to_depth']]).reset_index(drop=True)
+    keys = hole_keys(drill_data, collar_index, survey_index, cols, method, max_infill)
+
+    reused = {}
+    if cached is not None and HOLE_KEY_COL in cached.columns:
+        cached_keys = cached[HOLE_KEY_COL].to_numpy()
+        for hole_id, rows in hole_slices(cached[hole_id_col].to_numpy()).items():
+            if keys.get(hole_id) == cached_keys[rows.start]:
+                reused[hole_id] = rows
+
+    changed = [hole_id for hole_id in keys if hole_id not in reused]
+    changed_rows = drill_data[hole_id_col].isin(changed).to_numpy()
+    result_df = desurvey_table(drill_data[changed_rows], collar_index, survey_index, cols, method, pool, max_infill)
+    result_df[HOLE_KEY_COL] = result_df[hole_id_col].map(keys)
+
+    if reused:
+        reused_rows = np.concatenate([np.arange(rows.start, rows.stop) for rows in reused.values()])
+        parts = [cached.iloc[reused_rows]] + ([result_df] if not result_df.empty else [])
+        result_df = pd.concat(parts, ignore_index=True)[result_df.columns]
+        result_df = result_df.sort_values(by=hole_id_col, kind='mergesort').reset_index(drop=True)
+    return result_df, len(changed)
+
+
+def hole_ids_like(hole_ids, hole_dtype):
+    # Hole IDs read as text, as numbers when the collar table has them as numbers, so they match its keys
+    # the way they do when the whole interval table is read at once. IDs with text stay text (and are
+    # reported missing from the collar data).
+    if not pd.api.types.is_numeric_dtype(hole_dtype):
+        return hole_ids
+    numbers = pd.to_numeric(hole_ids, errors='coerce')
+    if (numbers.isna() & hole_ids.notna()).any():
+        return hole_ids
+    return numbers
+
+
+def iter_hole_chunks(file_path, hole_id_col, chunksize=100000, hole_dtype=object):
+    # Reads an interval CSV in chunks of roughly chunksize rows, always yielding whole holes.
+    # The file must list the rows of each hole together, which is how drill databases export.
+    # The hole IDs are read as text, a chunk of numeric IDs would otherwise be read as numbers while
+    # the chunk after it is text, then given the collar's hole_dtype (see hole_ids_like).
+    finished_holes = set()
+    carry = None
+    for chunk in pd.read_csv(file_path, chunksize=chunksize, dtype={hole_id_col: str}):
+        if carry is not None:
+            chunk = pd.concat([carry, chunk], ignore_index=True)
+
+        hole_ids = chunk[hole_id_col].to_numpy()
+        last_hole = hole_ids[-1]
+        tail_start = len(hole_ids)
+        while tail_start > 0 and hole_ids[tail_start - 1] == last_hole:
+            tail_start -= 1
+
+        # The last hole may continue in the next chunk
+        carry = chunk.iloc[tail_start:]
+        complete = chunk.iloc[:tail_start]
+        if complete.empty:
+            continue
+
+        holes = set(complete[hole_id_col].unique())
+        if holes & finished_holes:
+            raise ValueError(f"Rows of the same hole are not together in {os.path.basename(file_path)}. Sort the file by hole ID first.")
+        finished_holes.update(holes)
+        yield complete.assign(**{hole_id_col: hole_ids_like(complete[hole_id_col], hole_dtype)})
+
+    if carry is not None and not carry.empty:
+        if carry[hole_id_col].iloc[0] in finished_holes:
+            raise ValueError(f"Rows of the same hole are not together in {os.path.basename(file_path)}. Sort the file by hole ID first.")
+        yield carry.assign(**{hole_id_col: hole_ids_like(carry[hole_id_col], hole_dtype)})
+
+
+def desurvey_csv_stream(drill_path, output_path, collar_data, survey_data, cols, method='TANGENTIAL', chunksize=100000, workers=1,
+                        max_infill=25):
+    # Desurveys an interval CSV hole group by hole group and appends each result to output_path,
+    # so memory use depends on the chunk size instead of the size of the file. Returns the row count.
+    # Holes keep their order from the input file. The partial output is removed if a chunk fails.
+    collar_index, survey_index = index_collar_survey(collar_data, survey_data, cols)
+    columns = None
+    rows_written = 0
+    try:
+        with process_pool(workers) as pool:
+            hole_dtype = collar_index.table[cols['collar_hole_id']].dtype
+            for chunk in iter_hole_chunks(drill_path, cols['drill_hole_id'], chunksize, hole_dtype):
+                result_df = desurvey_table(chunk, collar_index, survey_index, cols, method, pool, max_infill)
+                if result_df.empty:
+                    continue
+                if columns is None:
+                    columns = list(result_df.columns)
+                result_df.reindex(columns=columns).to_csv(output_path, mode='a' if rows_written else 'w', header=not rows_written, index=False)
+                rows_written += len(result_df)
+    except Exception:
+        if rows_written:
+            os.remove(output_path)
+        raise
+    return rows_written
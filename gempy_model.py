@@ -13,6 +13,7 @@ from gempy_engine.core.data.stack_relation_type import StackRelationType
 print("Import successful:", StackRelationType.FAULT)
 import re  
 from bpy.props import CollectionProperty, BoolProperty, EnumProperty
+from ..attribute_store import object_values, ORIENTATION_PROPERTIES
 
 
 
@@ -61,6 +62,32 @@ def update_formations_collection(self, context):
     if collection_name:
         create_formations_csv(collection_name)
         
+def contact_point_rows(obj):
+    # Rows of a contact point set (one mesh, a vertex per contact): world coordinates of the points,
+    # their formation names and the polarity, azimuth and dip point attributes
+    mesh = obj.data
+    point_count = len(mesh.vertices)
+    coords = np.empty(point_count * 3, dtype=np.float32)
+    mesh.vertices.foreach_get("co", coords)
+    coords = coords.reshape(-1, 3).astype(float)
+    matrix = np.array(obj.matrix_world)
+    coords = coords @ matrix[:3, :3].T + matrix[:3, 3]
+
+    codes = np.empty(point_count, dtype=np.int32)
+    mesh.attributes['formation'].data.foreach_get('value', codes)
+    formations = np.array(list(mesh.get('formation', [])), dtype=object)[codes]
+
+    rows = pd.DataFrame({'formation': formations, 'x': coords[:, 0], 'y': coords[:, 1], 'z': coords[:, 2]})
+    for prop, default in (('polarity', 1.0), ('azimuth', 0.0), ('dip', 0.0)):
+        values = np.full(point_count, default, dtype=np.float32)
+        if prop in mesh.attributes:
+            mesh.attributes[prop].data.foreach_get('value', values)
+        rows[prop] = values.astype(float)
+    return rows
+
+def is_contact_points(obj):
+    return obj.type == 'MESH' and 'formation' in obj.data.attributes
+
 def create_formations_csv(collection_name):
     col = bpy.data.collections.get(collection_name)
     if not col:
@@ -73,7 +100,10 @@ def create_formations_csv(collection_name):
         formation_name = re.sub(r"\.\d+$", "", obj.name)  # Standardize name format
         formation_name = re.sub(r"\.$", "", formation_name)
         
-        if obj.type == 'CURVE':
+        if is_contact_points(obj):
+            data.extend(contact_point_rows(obj)[['formation', 'x', 'y', 'z']].values.tolist())
+            continue
+        elif obj.type == 'CURVE':
             curve = obj.data
             if curve.splines and len(curve.splines[0].points) >= 2:
                 spline = curve.splines[0]
@@ -112,6 +142,11 @@ def update_orientations_collection(self, context):
         create_orientations_csv(collection_name)
 
 
+def number_or_default(value, default):
+    # An object_values number, the default when the object has no value or it is not a number
+    return default if value is None or np.isnan(value) else value
+
+
 def create_orientations_csv(collection_name):
     col = bpy.data.collections.get(collection_name)
     if not col:
@@ -120,13 +155,23 @@ def create_orientations_csv(collection_name):
 
     data = []
     geo_props = bpy.context.scene.geo_modeller
+
+    # Orientation of each object from its custom properties or its attribute store row, as floats
+    objects = list(col.objects)
+    orientations = {prop: object_values(objects, prop, numbers=True) for prop in ORIENTATION_PROPERTIES}
     
-    for obj in col.objects:
+    for index, obj in enumerate(objects):
         coords = []
         formation_name = re.sub(r"\.\d+$", "", obj.name)  # Standardize name format
         formation_name = re.sub(r"\.$", "", formation_name)
         
-        if obj.type == 'CURVE':
+        if is_contact_points(obj):
+            rows = contact_point_rows(obj)
+            if geo_props.orientation_mode == 'RIGHT_HAND_RULE':
+                rows['azimuth'] = (rows['azimuth'] + 90) % 360
+            data.extend(rows[['formation', 'x', 'y', 'z', 'polarity', 'azimuth', 'dip']].values.tolist())
+            continue
+        elif obj.type == 'CURVE':
             curve = obj.data
             if curve.splines and len(curve.splines[0].points) >= 2:
                 spline = curve.splines[0]
@@ -137,9 +182,9 @@ def create_orientations_csv(collection_name):
             coords = obj.location  
         
         if coords:
-            polarity = float(obj.get('polarity', 1.0))  # Default to 1.0 if not set
-            azimuth = float(obj.get('azimuth', 0.0))  # Convert to float and default to 0.0 if not set
-            dip = float(obj.get('dip', 0.0)) # Convert to float and default to 0.0 if not set
+            polarity = number_or_default(orientations['polarity'][index], 1.0)  # Default to 1.0 if not set
+            azimuth = number_or_default(orientations['azimuth'][index], 0.0)  # Default to 0.0 if not set
+            dip = number_or_default(orientations['dip'][index], 0.0)  # Default to 0.0 if not set
             
             if geo_props.orientation_mode == 'RIGHT_HAND_RULE':
                 azimuth = (azimuth + 90) % 360
@@ -2,23 +2,18 @@ import bpy
 from bpy.props import EnumProperty, StringProperty
 from bpy_extras.io_utils import ImportHelper
 from bpy.types import Operator, Panel
-import csv
-import math
+import numpy as np
+import os
 from mathutils import Vector
-from ..preferences import get_preferences  
+from ..preferences import get_preferences, copy_preferences
+from ..data_io import read_arrays, array_row, read_table_columns, skipped_rows_message, hole_row_messages, TABLE_FILTER_GLOB
+from ..attribute_store import save_store, link_row, HOLE_COLUMNS_PROP, ORIENTATION_PROPERTIES
+from ..modal_import import ModalImport
 
 
-# Global variables to hold CSV data and columns
-csv_data = []
+# Column names of the loaded file, the rows are only read when importing
 csv_columns = []
 
-def read_csv(filepath):
-    global csv_columns, csv_data
-    with open(filepath, newline='') as csvfile:
-        reader = csv.DictReader(csvfile)
-        csv_columns = reader.fieldnames
-        csv_data = [row for row in reader]
-
 def get_csv_column_names(self, context):
     return [(col, col, "") for col in csv_columns]
 
@@ -42,13 +37,14 @@ class DrillHoleRenderPanel(bpy.types.Panel): # UI Panel
                 for col_name in ['hole_id', 'x', 'y', 'z']:
                     prop_name = f"csv_column_{col_name}"
                     layout.prop(context.scene, prop_name, text=col_name.capitalize())
+            layout.prop(context.scene, "drill_import_mode")
             layout.operator("import.drill_holes", text="Import Drill Holes", icon='PLAY')
 
 
 class LoadCSVOperator(bpy.types.Operator, ImportHelper): # Load CSV file
     bl_idname = "import.load_csv"
     bl_label = "Load CSV"
-    filter_glob: bpy.props.StringProperty(default="*.csv", options={'HIDDEN'}, maxlen=255)
+    filter_glob: bpy.props.StringProperty(default=TABLE_FILTER_GLOB, options={'HIDDEN'}, maxlen=255)
 
     def execute(self, context):
         context.scene.csv_file_path = self.filepath
@@ -56,7 +52,7 @@ class LoadCSVOperator(bpy.types.Operator, ImportHelper): # Load CSV file
         return {'FINISHED'}
 
 
-def create_curve(start, end, curve_name, row_data):
+def create_curve(start, end, curve_name, orientation):
     curve_data = bpy.data.curves.new(curve_name, type='CURVE')
     curve_data.dimensions = '3D'
     curve_data.bevel_depth = 1.5  # Fixed radius to start
@@ -64,67 +60,46 @@ def create_curve(start, end, curve_name, row_data):
 
     spline = curve_data.splines.new(type='POLY')
     spline.points.add(1)
-    spline.points[0].co = (start[0], start[1], start[2], 1)
-    spline.points[1].co = (end[0], end[1], end[2], 1)
+    spline.points.foreach_set("co", (start[0], start[1], start[2], 1, end[0], end[1], end[2], 1))
 
     curve_obj = bpy.data.objects.new(curve_name, curve_data)
     bpy.context.collection.objects.link(curve_obj)
     
-    # Add custom properties polarity az dip (for modeling)
+    # Add custom properties polarity az dip (for modeling), from the row when the file has them. The
+    # other values are read from the attribute store row the curve references.
     add_custom_properties(curve_obj)
-    
-    # Add custom properties based on CSV column headers and row data
-    for key, value in row_data.items():
-        curve_obj[key] = value
+    for key, value in orientation.items():
+        if value != '':
+            curve_obj[key] = value
     
     return curve_obj
 
-def read_csv_data(file_path, hole_id_col, x_col, y_col, z_col):
-    data = []
-    lowest_z_per_hole = {}
-    with open(file_path, 'r') as file:
-        csv_reader = csv.DictReader(file)
-        for row in csv_reader:
-            try:
-                hole_id = row[hole_id_col]
-                x, y, z = float(row[x_col]), float(row[y_col]), float(row[z_col])
-                
-                # Check if x, y, or z is NaN and skip the row 
-                if math.isnan(x) or math.isnan(y) or math.isnan(z):
-                    continue  # Skip to the next row
-
-                curve_name = f"DrillHole_{hole_id}"
-                row_data = {key: row[key] for key in row}  # Creating a full copy of the row data
-                row_data.update({
-                    x_col: x,  # Overwrite x, y, z using dynamic column names
-                    y_col: y,
-                    z_col: z,
-                    'curve_name': curve_name
-                })
-
-                if hole_id not in lowest_z_per_hole or z < lowest_z_per_hole[hole_id][z_col]:
-                    lowest_z_per_hole[hole_id] = row_data
-
-                data.append(row_data)
-            except ValueError:
-                continue
+def read_interval_arrays(file_path, hole_id_col, x_col, y_col, z_col, preferences=None, skipped=None, cancel=None):
+    # CSV, NPZ, Parquet or Feather as columns (see read_arrays) with the hole IDs as text, in file order or
+    # sorted by hole ID and then by descending z with the preference. Returns the columns and the lowest
+    # point of each hole.
+    # preferences: the add-on preferences, a copy of them when reading on a background thread.
+    # skipped counts the rows left out and cancel stops the read (see read_arrays).
+    preferences = preferences or get_preferences()
+    columns = read_arrays(file_path, [x_col, y_col, z_col], text_cols=[hole_id_col], workers=preferences.import_workers,
+                          skipped=skipped, cancel=cancel)
+    hole_codes, hole_names = columns[hole_id_col]
+
+    # The first row of each hole by ascending z is its lowest point (the first in the file on ties)
+    by_z = np.lexsort((columns[z_col], hole_codes))
+    lowest_z_per_hole = {
+        hole_names[hole_codes[row]]: {x_col: columns[x_col][row], y_col: columns[y_col][row], z_col: columns[z_col][row]}
+        for row in by_z[np.flatnonzero(np.diff(hole_codes[by_z], prepend=-1))]
+    }
 
     # Sorting the data if 'use_z_descending' is enabled
-    preferences = get_preferences()
     if preferences.use_z_descending:
-        # group data by hole_id
-        from itertools import groupby
-        data.sort(key=lambda row: row[hole_id_col])  
-        grouped_data = []
-        
-        # for each hole_id group, sort by Z in descending order
-        for hole_id, group in groupby(data, key=lambda row: row[hole_id_col]):
-            sorted_group = sorted(group, key=lambda row: row[z_col], reverse=True)  
-            grouped_data.extend(sorted_group)  # Append sorted group to final list
-        
-        data = grouped_data  # Update data with sorted groups
+        name_rank = np.argsort(np.argsort(np.array(hole_names, dtype=object), kind='stable'))
+        order = np.lexsort((-columns[z_col], name_rank[hole_codes]))
+        for col, values in columns.items():
+            columns[col] = (values[0][order], values[1]) if isinstance(values, tuple) else values[order]
 
-    return data, lowest_z_per_hole
+    return columns, lowest_z_per_hole
 
 
 def add_custom_properties(obj):
@@ -143,11 +118,26 @@ def add_custom_properties(obj):
         obj["dip"] = 0
         obj["_RNA_UI"]["dip"] = {"max": 90, "description": "Dip (0-90)", "override_library_create": True}
 
-def create_marker_cube(location, name, size=0.1): # for drill hole Ids, bottom of each drill trace
-    bpy.ops.mesh.primitive_cube_add(size=size, location=location)
-    cube = bpy.context.object
-    cube.name = name
+MARKER_MESH = "Hole ID Marker"
+
+def get_marker_mesh(size=0.1):
+    # One cube mesh shared by every hole ID marker
+    mesh = bpy.data.meshes.get(MARKER_MESH)
+    if mesh is None:
+        mesh = bpy.data.meshes.new(MARKER_MESH)
+        half = size / 2
+        vertices = [(x, y, z) for x in (-half, half) for y in (-half, half) for z in (-half, half)]
+        faces = [(0, 1, 3, 2), (4, 6, 7, 5), (0, 4, 5, 1), (2, 3, 7, 6), (0, 2, 6, 4), (1, 5, 7, 3)]
+        mesh.from_pydata(vertices, [], faces)
+        mesh.update()
+    return mesh
+
+def create_marker_cube(location, name, collection): # for drill hole Ids, bottom of each drill trace
+    # Straight into the marker collection, no operator call or scene update per hole
+    cube = bpy.data.objects.new(name, get_marker_mesh())
+    cube.location = location
     cube.show_name = True
+    collection.objects.link(cube)
 
     return cube
 
@@ -208,29 +198,32 @@ def create_collections(base_name="Drill Hole Collection"):
     return main_collection, marker_collection, hole_id_collections, trace_collection
 
 
-def link_to_appropriate_collection(curve_obj, hole_id, main_collection, hole_id_collections):
+def link_to_appropriate_collection(curve_obj, hole_id, main_collection, hole_id_collections, created=None):
     # If there's no sub-collection for this hole_id, create it and link to the main collection
     if hole_id not in hole_id_collections:
         hole_id_collection_name = f"{hole_id}"
         hole_id_collection = bpy.data.collections.new(hole_id_collection_name)
         main_collection.children.link(hole_id_collection)  # Link the sub-collection to the main collection
         hole_id_collections[hole_id] = hole_id_collection
+        if created is not None:
+            created.append(hole_id_collection)
     
     # Link the curve object to its respective hole_id collection
     hole_id_collections[hole_id].objects.link(curve_obj)
 
-def merge_curves(curve_objs, merged_curve_name): # creates drill hole trace per hole_id
+def create_trace(runs, merged_curve_name): # creates drill hole trace per hole_id
+    # runs holds the point coordinates of each unbroken run of rows of the hole, one spline per run
     merged_curve_data = bpy.data.curves.new(merged_curve_name, type='CURVE')
     merged_curve_data.dimensions = '3D'
     merged_curve_data.bevel_depth = 0  # No bevel for the drill trace
     merged_curve_data.use_fill_caps = False
 
-    for curve_obj in curve_objs:
-        for spline in curve_obj.data.splines:
-            new_spline = merged_curve_data.splines.new(type='POLY')
-            new_spline.points.add(len(spline.points) - 1)
-            for i, point in enumerate(spline.points):
-                new_spline.points[i].co = point.co
+    for run in runs:
+        points = np.ones((len(run), 4))
+        points[:, :3] = run
+        new_spline = merged_curve_data.splines.new(type='POLY')
+        new_spline.points.add(len(run) - 1)
+        new_spline.points.foreach_set("co", points.ravel())
 
     merged_curve_obj = bpy.data.objects.new(merged_curve_name, merged_curve_data)
     merged_curve_obj.display_type = 'WIRE'  # Display as wire
@@ -243,98 +236,290 @@ def merge_curves(curve_objs, merged_curve_name): # creates drill hole trace per
 
     return merged_curve_obj
 
-def execute_import(context, data, main_collection, hole_id_collections, trace_collection, hole_id_col, x_col, y_col, z_col):
+def import_intervals(context, columns, main_collection, hole_id_collections, trace_collection, hole_id_col, x_col, y_col, z_col, created, created_stores):
+    # Generator: creates the interval curves and traces, adding them to created (the store to
+    # created_stores), and yields (rows done, total rows) as it goes so the import can run in time slices.
+    # Returns the offset when done.
     # Set scene units to metric and scale
     bpy.context.scene.unit_settings.system = 'METRIC' # ensure blender units are set to meters
     bpy.context.scene.unit_settings.scale_length = 1  # 1 Blender unit = 1 meter
 
-    offset = calculate_offset(data, x_col, y_col, z_col)
-
-    previous_row = None  # Initialize previous_row to handle the first point
-    hole_id_to_curves = {}  # Dictionary to store curves by hole_id
-    for row_data in data:
-        if previous_row is not None and previous_row[hole_id_col] == row_data[hole_id_col]:
-            # Calculate start and end points using offset
-            start = Vector((previous_row[x_col] + offset[0], previous_row[y_col] + offset[1], previous_row[z_col] + offset[2]))
-            end = Vector((row_data[x_col] + offset[0], row_data[y_col] + offset[1], row_data[z_col] + offset[2]))
-            curve_name = row_data['curve_name']  
-            
+    xyz = np.column_stack((columns[x_col], columns[y_col], columns[z_col]))
+    top = np.argmax(xyz[:, 2])
+    offset = calculate_offset([{x_col: xyz[top, 0], y_col: xyz[top, 1], z_col: xyz[top, 2]}], x_col, y_col, z_col)
+    points = xyz + offset
+
+    # The columns as they are, each interval curve references the row it was made from
+    store_path = save_store(columns, main_collection.name)
+    created_stores.append(store_path)
+
+    hole_codes, hole_names = columns[hole_id_col]
+    orientation_cols = [col for col in ORIENTATION_PROPERTIES if col in columns]
+    hole_id_to_runs = {}  # Trace points by hole_id, one list per unbroken run of rows
+    run_end = {}  # Last row added to the current run of each hole_id
+    for row in range(len(points)):
+        if row > 0 and hole_codes[row - 1] == hole_codes[row]:
+            hole_id = hole_names[hole_codes[row]]
+            start = Vector(points[row - 1])
+            end = Vector(points[row])
+
             # Create curve and link to appropriate collection
-            curve_obj = create_curve(start, end, curve_name, row_data)
+            curve_obj = create_curve(start, end, f"DrillHole_{hole_id}", array_row(columns, row, orientation_cols))
+            created.append(curve_obj)
+            link_row(curve_obj, store_path, row)
             bpy.context.collection.objects.unlink(curve_obj)  # Unlink from the default collection
-            link_to_appropriate_collection(curve_obj, row_data[hole_id_col], main_collection, hole_id_collections)
+            link_to_appropriate_collection(curve_obj, hole_id, main_collection, hole_id_collections, created)
 
-            # Store the curve object in the dictionary by hole_id
-            if row_data[hole_id_col] not in hole_id_to_curves:
-                hole_id_to_curves[row_data[hole_id_col]] = []
-            hole_id_to_curves[row_data[hole_id_col]].append(curve_obj)
-        
-        # Update previous_row to the current row for the next iteration
-        previous_row = row_data
+            # Trace points straight from the coordinates, a new run when the previous row ended another one
+            runs = hole_id_to_runs.setdefault(hole_id, [])
+            if run_end.get(hole_id) != row - 1:
+                runs.append([start])
+            runs[-1].append(end)
+            run_end[hole_id] = row
+        yield row + 1, len(points)
 
 
-    # Merge curves for each hole_id and link to the trace collection
-    for hole_id, curve_objs in hole_id_to_curves.items():
+    # Build one trace for each hole_id and link to the trace collection
+    for hole_id, runs in hole_id_to_runs.items():
         merged_curve_name = f"{hole_id} trace"
-        merged_curve_obj = merge_curves(curve_objs, merged_curve_name)
+        merged_curve_obj = create_trace(runs, merged_curve_name)
+        created.append(merged_curve_obj)
         
         # Unlink from the main collection and link to the trace collection
         bpy.context.collection.objects.unlink(merged_curve_obj)  
         trace_collection.objects.link(merged_curve_obj)  # Link to the trace collection
+        yield len(points), len(points)
+
+    return offset
         
+def read_hole_arrays(file_path, hole_id_col, x_col, y_col, z_col, preferences=None, skipped=None, cancel=None):
+    # Columns as arrays (see read_arrays) with the rows of each hole together, in file order or by
+    # descending z with the preference. Returns the columns and the row slice of each hole.
+    preferences = preferences or get_preferences()
+    columns = read_arrays(file_path, [x_col, y_col, z_col], text_cols=[hole_id_col], workers=preferences.import_workers,
+                          skipped=skipped, cancel=cancel)
+    hole_codes, hole_names = columns[hole_id_col]
+
+    if preferences.use_z_descending:
+        order = np.lexsort((-columns[z_col], hole_codes))
+    else:
+        order = np.argsort(hole_codes, kind='stable')
+    for col, values in columns.items():
+        columns[col] = (values[0][order], values[1]) if isinstance(values, tuple) else values[order]
+
+    hole_codes = columns[hole_id_col][0]
+    starts = np.flatnonzero(np.diff(hole_codes, prepend=-1))
+    stops = np.append(starts[1:], len(hole_codes))
+    holes = {hole_names[hole_codes[start]]: slice(start, stop) for start, stop in zip(starts, stops)}
+    return columns, holes
+
+def set_edge_attributes(mesh, columns, rows):
+    # Interval values on the edges of a hole mesh. Each edge ends at a row and takes its values, like
+    # the interval curves. Text columns are stored as integer codes, with the strings for the codes
+    # in a custom property of the mesh under the column name.
+    for col, values in columns.items():
+        if isinstance(values, tuple):
+            used, codes = np.unique(values[0][rows], return_inverse=True)
+            attribute = mesh.attributes.new(name=col, type='INT', domain='EDGE')
+            attribute.data.foreach_set('value', codes.astype(np.int32))
+            mesh[col] = [values[1][code] for code in used]
+        else:
+            attribute = mesh.attributes.new(name=col, type='FLOAT', domain='EDGE')
+            attribute.data.foreach_set('value', values[rows].astype(np.float32))
+
+def create_hole_mesh(name, coords):
+    # One vertex per row and an edge between consecutive rows
+    mesh = bpy.data.meshes.new(name)
+    mesh.vertices.add(len(coords))
+    mesh.vertices.foreach_set("co", coords.astype(np.float32).ravel())
+    mesh.edges.add(len(coords) - 1)
+    vertex_index = np.arange(len(coords), dtype=np.int32)
+    mesh.edges.foreach_set("vertices", np.column_stack((vertex_index[:-1], vertex_index[1:])).ravel())
+    mesh.update()
+    return mesh
+
+SWEEP_NODE_GROUP = "Drill Hole Sweep"
+ATTRIBUTE_MATERIAL = "DrillHoleAttributeMaterial"
+
+def get_attribute_material():
+    # One material for every swept hole, coloured by the 'color' attribute of the geometry
+    material = bpy.data.materials.get(ATTRIBUTE_MATERIAL)
+    if material is None:
+        material = bpy.data.materials.new(name=ATTRIBUTE_MATERIAL)
+        material.use_nodes = True
+        nodes = material.node_tree.nodes
+        attribute = nodes.new("ShaderNodeAttribute")
+        attribute.attribute_name = "color"
+        attribute.location = (-300, 300)
+        material.node_tree.links.new(attribute.outputs["Color"], nodes["Principled BSDF"].inputs["Base Color"])
+    return material
+
+def get_sweep_node_group():
+    # Shared Geometry Nodes tree that turns the edges of a hole mesh into tubes. Each interval is swept
+    # on its own, its radius is the Radius input times the 'radius' attribute (when there is one).
+    node_group = bpy.data.node_groups.get(SWEEP_NODE_GROUP)
+    if node_group is not None:
+        return node_group
+
+    node_group = bpy.data.node_groups.new(SWEEP_NODE_GROUP, 'GeometryNodeTree')
+    node_group.interface.new_socket(name="Geometry", in_out='INPUT', socket_type='NodeSocketGeometry')
+    radius_socket = node_group.interface.new_socket(name="Radius", in_out='INPUT', socket_type='NodeSocketFloat')
+    radius_socket.default_value = 1.5  # same as the bevel of the interval curves
+    radius_socket.min_value = 0.0
+    node_group.interface.new_socket(name="Geometry", in_out='OUTPUT', socket_type='NodeSocketGeometry')
+
+    nodes = node_group.nodes
+    links = node_group.links
+    group_input = nodes.new("NodeGroupInput")
+    split_edges = nodes.new("GeometryNodeSplitEdges")
+    mesh_to_curve = nodes.new("GeometryNodeMeshToCurve")
+    radius_attribute = nodes.new("GeometryNodeInputNamedAttribute")
+    radius_attribute.data_type = 'FLOAT'
+    radius_attribute.inputs["Name"].default_value = "radius"
+    radius_switch = nodes.new("GeometryNodeSwitch")
+    radius_switch.input_type = 'FLOAT'
+    radius_switch.inputs["False"].default_value = 1.0
+    radius_scale = nodes.new("ShaderNodeMath")
+    radius_scale.operation = 'MULTIPLY'
+    set_radius = nodes.new("GeometryNodeSetCurveRadius")
+    profile = nodes.new("GeometryNodeCurvePrimitiveCircle")
+    profile.inputs["Resolution"].default_value = 8
+    profile.inputs["Radius"].default_value = 1.0
+    curve_to_mesh = nodes.new("GeometryNodeCurveToMesh")
+    curve_to_mesh.inputs["Fill Caps"].default_value = True
+    set_material = nodes.new("GeometryNodeSetMaterial")
+    set_material.inputs["Material"].default_value = get_attribute_material()
+    group_output = nodes.new("NodeGroupOutput")
+
+    for x, node in enumerate([group_input, split_edges, mesh_to_curve, set_radius, curve_to_mesh, set_material, group_output]):
+        node.location = (x * 200, 0)
+    radius_attribute.location = (200, -250)
+    radius_switch.location = (400, -250)
+    radius_scale.location = (600, -250)
+    profile.location = (600, -450)
+
+    links.new(group_input.outputs[0], split_edges.inputs["Mesh"])
+    links.new(split_edges.outputs["Mesh"], mesh_to_curve.inputs["Mesh"])
+    links.new(mesh_to_curve.outputs["Curve"], set_radius.inputs["Curve"])
+    links.new(radius_attribute.outputs["Exists"], radius_switch.inputs["Switch"])
+    links.new(radius_attribute.outputs["Attribute"], radius_switch.inputs["True"])
+    links.new(radius_switch.outputs[0], radius_scale.inputs[0])
+    links.new(group_input.outputs[1], radius_scale.inputs[1])
+    links.new(radius_scale.outputs[0], set_radius.inputs["Radius"])
+    links.new(set_radius.outputs["Curve"], curve_to_mesh.inputs["Curve"])
+    links.new(profile.outputs["Curve"], curve_to_mesh.inputs["Profile Curve"])
+    links.new(curve_to_mesh.outputs["Mesh"], set_material.inputs["Geometry"])
+    links.new(set_material.outputs["Geometry"], group_output.inputs[0])
+    return node_group
+
+def import_holes(context, columns, holes, main_collection, hole_id_collections, hole_id_col, x_col, y_col, z_col, created, sweep=False):
+    # One mesh object per hole instead of one curve per interval. Interval values are edge attributes.
+    # With sweep the shared Geometry Nodes tree draws the intervals as tubes. A generator like
+    # import_intervals, it returns the lowest point of each hole and the offset when done.
+    bpy.context.scene.unit_settings.system = 'METRIC' # ensure blender units are set to meters
+    bpy.context.scene.unit_settings.scale_length = 1  # 1 Blender unit = 1 meter
+
+    xyz = np.column_stack((columns[x_col], columns[y_col], columns[z_col]))
+    if not len(xyz):
+        return {}, (0, 0, 0)
+    top = np.argmax(xyz[:, 2])
+    offset = calculate_offset([{x_col: xyz[top, 0], y_col: xyz[top, 1], z_col: xyz[top, 2]}], x_col, y_col, z_col)
+    attribute_columns = {col: values for col, values in columns.items() if col not in (hole_id_col, x_col, y_col, z_col)}
+
+    lowest_z_per_hole = {}
+    for hole_id, rows in holes.items():
+        lowest = rows.start + np.argmin(xyz[rows, 2])
+        lowest_z_per_hole[hole_id] = {x_col: xyz[lowest, 0], y_col: xyz[lowest, 1], z_col: xyz[lowest, 2]}
+        if rows.stop - rows.start < 2:
+            continue  # a single row has no interval to draw
+
+        mesh = create_hole_mesh(f"DrillHole_{hole_id}", xyz[rows] + offset)
+        set_edge_attributes(mesh, attribute_columns, np.arange(rows.start + 1, rows.stop))
+        mesh[HOLE_COLUMNS_PROP] = list(attribute_columns)  # read by the manage tool
+        hole_obj = bpy.data.objects.new(f"DrillHole_{hole_id}", mesh)
+        created.append(hole_obj)
+        hole_obj[hole_id_col] = hole_id
+        if sweep:
+            modifier = hole_obj.modifiers.new(name="Drill Hole Sweep", type='NODES')
+            modifier.node_group = get_sweep_node_group()
+        link_to_appropriate_collection(hole_obj, hole_id, main_collection, hole_id_collections, created)
+        yield rows.stop, len(xyz)
+
+    return lowest_z_per_hole, offset
+
 def update_csv_columns(filepath): # update with CSV upload
     try:
-        with open(filepath, newline='') as csvfile:
-            reader = csv.DictReader(csvfile)
-            global csv_columns
-            csv_columns = reader.fieldnames
-            items = [(col, col, "") for col in csv_columns]
-            for col_name in ['hole_id', 'x', 'y', 'z']:
-                prop_name = f"csv_column_{col_name}"
-                setattr(bpy.types.Scene, prop_name, bpy.props.EnumProperty(items=items, name=col_name.capitalize()))
+        global csv_columns
+        csv_columns = read_table_columns(filepath)
+        items = [(col, col, "") for col in csv_columns]
+        for col_name in ['hole_id', 'x', 'y', 'z']:
+            prop_name = f"csv_column_{col_name}"
+            setattr(bpy.types.Scene, prop_name, bpy.props.EnumProperty(items=items, name=col_name.capitalize()))
     except Exception as e:
         print("Failed to read CSV columns:", e)
 
-class IMPORT_OT_drill_holes(bpy.types.Operator):
+class IMPORT_OT_drill_holes(ModalImport, bpy.types.Operator):
     bl_idname = "import.drill_holes"
     bl_label = "Upload Drill Holes"
     bl_options = {'REGISTER', 'UNDO'}
+    import_label = "Importing drill holes"
 
-    def execute(self, context):
+    def check_inputs(self, context):
         # Retrieve the filepath and column identifiers from the scene properties
-        filepath = context.scene.csv_file_path
-        hole_id_col = context.scene.csv_column_hole_id
-        x_col = context.scene.csv_column_x
-        y_col = context.scene.csv_column_y
-        z_col = context.scene.csv_column_z
+        self.filepath = context.scene.csv_file_path
+        self.hole_id_col = context.scene.csv_column_hole_id
+        self.x_col = context.scene.csv_column_x
+        self.y_col = context.scene.csv_column_y
+        self.z_col = context.scene.csv_column_z
+        self.import_mode = context.scene.drill_import_mode
+        self.preferences = copy_preferences()
 
         # Ensure all necessary data is present 
-        if not filepath:
+        if not self.filepath:
             self.report({'ERROR'}, "No file selected.")
-            return {'CANCELLED'}
-        if not all([hole_id_col, x_col, y_col, z_col]):
+            return False
+        if not all([self.hole_id_col, self.x_col, self.y_col, self.z_col]):
             self.report({'ERROR'}, "One or more column identifiers are missing.")
-            return {'CANCELLED'}
-
-        # Call the data reading function with all required parameters
-        try:
-            data, lowest_z_per_hole = read_csv_data(filepath, hole_id_col, x_col, y_col, z_col)
-            main_collection, marker_collection, hole_id_collections, trace_collection = create_collections()
-            execute_import(context, data, main_collection, hole_id_collections, trace_collection, hole_id_col, x_col, y_col, z_col)
-
-            # Create marker cubes at the lowest points (drill hole IDs)
-            marker_offset = 0.5  
-            offset = calculate_offset(data, x_col, y_col, z_col)
-            for hole_id, lowest_data in lowest_z_per_hole.items():
-                marker_location = (lowest_data[x_col] + offset[0], lowest_data[y_col] + offset[1], lowest_data[z_col] + offset[2] - marker_offset)
-                marker_cube = create_marker_cube(marker_location, hole_id)
-                bpy.context.collection.objects.unlink(marker_cube)  # Unlink from current collection
-                marker_collection.objects.link(marker_cube)
-                
-            return {'FINISHED'}
-        except Exception as e:
-            self.report({'ERROR'}, str(e))
-            return {'CANCELLED'}
+            return False
+        return True
+
+    def read_data(self):
+        self.skipped = {}
+        if self.import_mode in {'HOLE_MESH', 'HOLE_TUBES'}:
+            return read_hole_arrays(self.filepath, self.hole_id_col, self.x_col, self.y_col, self.z_col, self.preferences,
+                                    self.skipped, self.cancel)
+        return read_interval_arrays(self.filepath, self.hole_id_col, self.x_col, self.y_col, self.z_col, self.preferences,
+                                    self.skipped, self.cancel)
+
+    def check_data(self, data):
+        # Rows left out while reading and problems with the rows that were read, before anything is created
+        skipped = skipped_rows_message(self.skipped, [self.x_col, self.y_col, self.z_col])
+        columns = data[0]
+        hole_codes, hole_names = columns[self.hole_id_col]
+        hole_ids = np.array(hole_names, dtype=object)[hole_codes]
+        xyz = np.column_stack((columns[self.x_col], columns[self.y_col], columns[self.z_col]))
+        if not len(xyz):
+            raise ValueError(f"No rows with valid coordinates in {os.path.basename(self.filepath)}. {skipped}".strip())
+        return [message for message in [skipped] if message] + hole_row_messages(hole_ids, xyz)
+
+    def create_geometry(self, context, data):
+        hole_id_col, x_col, y_col, z_col = self.hole_id_col, self.x_col, self.y_col, self.z_col
+        main_collection, marker_collection, hole_id_collections, trace_collection = create_collections()
+        if self.import_mode in {'HOLE_MESH', 'HOLE_TUBES'}:
+            columns, holes = data
+            lowest_z_per_hole, offset = yield from import_holes(
+                context, columns, holes, main_collection, hole_id_collections, hole_id_col, x_col, y_col, z_col,
+                self.created, sweep=self.import_mode == 'HOLE_TUBES'
+            )
+        else:
+            columns, lowest_z_per_hole = data
+            offset = yield from import_intervals(context, columns, main_collection, hole_id_collections, trace_collection, hole_id_col, x_col, y_col, z_col, self.created, self.created_stores)
+
+        # Create marker cubes at the lowest points (drill hole IDs)
+        marker_offset = 0.5  
+        for hole_id, lowest_data in lowest_z_per_hole.items():
+            marker_location = (lowest_data[x_col] + offset[0], lowest_data[y_col] + offset[1], lowest_data[z_col] + offset[2] - marker_offset)
+            self.created.append(create_marker_cube(marker_location, hole_id, marker_collection))
 
 def register():
     bpy.utils.register_class(DrillHoleRenderPanel)
@@ -345,6 +530,16 @@ def register():
     bpy.types.Scene.csv_column_x = bpy.props.EnumProperty(items=get_csv_column_names, name="X")
     bpy.types.Scene.csv_column_y = bpy.props.EnumProperty(items=get_csv_column_names, name="Y")
     bpy.types.Scene.csv_column_z = bpy.props.EnumProperty(items=get_csv_column_names, name="Z")
+    bpy.types.Scene.drill_import_mode = bpy.props.EnumProperty(
+        name="Import As",
+        description="How the drill hole intervals are created in the scene",
+        items=[
+            ('INTERVALS', "Curve per Interval", "One curve object per interval, the row values in an attribute store each curve references"),
+            ('HOLE_MESH', "Mesh per Hole", "One mesh object per hole with the row values as edge attributes, for large data sets"),
+            ('HOLE_TUBES', "Tubes per Hole", "Mesh per hole drawn as tubes by a shared Geometry Nodes tree, radius and colour from the 'radius' and 'color' attributes")
+        ],
+        default='INTERVALS'
+    )
     
 
 def unregister():
@@ -356,6 +551,7 @@ def unregister():
     del bpy.types.Scene.csv_column_x
     del bpy.types.Scene.csv_column_y
     del bpy.types.Scene.csv_column_z
+    del bpy.types.Scene.drill_import_mode
     
 
 if __name__ == "__main__":
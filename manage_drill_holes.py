@@ -5,6 +5,12 @@ import bmesh
 import matplotlib.pyplot as plt
 from matplotlib.colors import LinearSegmentedColormap
 import numpy as np
+import pandas as pd
+from ..attribute_store import (
+    collection_store, store_properties, value_summary, property_type_and_data, hole_meshes, hole_mesh_store,
+    object_values, set_color_attribute, HOLE_COLUMNS_PROP
+)
+from ..color_mapping import map_colors, get_object_color_material
 from collections import defaultdict
 
 magenta_colors = ["blue", "lightgreen", "yellow", "orange", "red", "magenta"]
@@ -12,7 +18,12 @@ magenta_continuous_cmap = LinearSegmentedColormap.from_list("magenta_continuous_
 plt.register_cmap(name="magenta_continuous_ramp", cmap=magenta_continuous_cmap)
 
 def get_unique_properties(collection): # find properties for drill hole curve objects
+    found = collection_store(collection, 'CURVE')
+    if found:  # imported with an attribute store, the column names are already known
+        return store_properties(found[0], found[1])
     unique_props = set()
+    for obj in hole_meshes(collection):  # mesh per hole imports, the columns are edge attributes
+        unique_props.update(obj.data[HOLE_COLUMNS_PROP])
     for obj in collection.all_objects:
         if obj.type == 'CURVE':
             for key in obj.keys():
@@ -41,16 +52,26 @@ def get_color_ramp_items(self, context):
 def update_property_type_and_color_ramp(props, context): # dynamic color ramp options
     collection = bpy.data.collections.get(props.collection_name)
     if collection and props.selected_property:
-        values = [obj[props.selected_property] for obj in collection.all_objects if props.selected_property in obj and obj[props.selected_property] not in [None, '', 'N/A']]
         global color_ramp_items
-        converted_values = []
-        for value in values:
-            try:
-                converted_values.append(float(value))
-            except ValueError:
-                converted_values.append(value)
-
-        if all(isinstance(value, (float, int)) for value in converted_values):  # drop-down list for numerical color ramps ##### can add any matplotlib color-ramp 
+        found = collection_store(collection, 'CURVE')
+        meshes = hole_meshes(collection)
+        if found and props.selected_property in found[0].columns:
+            # from the attribute store, numerical when every value is a number
+            is_numerical = value_summary(found[0], props.selected_property, found[2])[0] != 'CATEGORICAL'
+        elif meshes:
+            store, rows = hole_mesh_store(meshes, props.selected_property)
+            is_numerical = value_summary(store, props.selected_property, rows)[0] != 'CATEGORICAL'
+        else:
+            values = [obj[props.selected_property] for obj in collection.all_objects if props.selected_property in obj and obj[props.selected_property] not in [None, '', 'N/A']]
+            converted_values = []
+            for value in values:
+                try:
+                    converted_values.append(float(value))
+                except ValueError:
+                    converted_values.append(value)
+            is_numerical = all(isinstance(value, (float, int)) for value in converted_values)
+
+        if is_numerical:  # drop-down list for numerical color ramps ##### can add any matplotlib color-ramp 
             props.selected_property_type = 'NUMERICAL'
             color_ramp_items = [
                 ('viridis', 'viridis', ''),
@@ -74,6 +95,146 @@ def update_property_type_and_color_ramp(props, context): # dynamic color ramp op
     if context.area:
         context.area.tag_redraw()
 
+def get_palette_material(color):
+    # One emission material per colour, made the first time the colour is used and reused by later
+    # colouring runs. Colours are rounded to 3 decimals, so there are at most as many materials as
+    # the colormaps have entries (256) instead of one per curve.
+    color_key = tuple(round(float(c), 3) for c in color[:3])
+    material_name = f"CurveMaterial_{color_key}"
+    material = bpy.data.materials.get(material_name)
+    if material is None:
+        material = bpy.data.materials.new(name=material_name)
+        material.use_nodes = True
+        emission = material.node_tree.nodes.new(type='ShaderNodeEmission')
+        material.node_tree.links.new(emission.outputs['Emission'], material.node_tree.nodes.get('Material Output').inputs['Surface'])
+        emission.inputs['Color'].default_value = (*color_key, 1)
+    return material
+
+CONTACT_DISC_MESH = "Contact Disc"
+
+# Colour of the intervals of hole meshes without a value for the coloured attribute
+HOLE_TRACE_COLOR = (0.8, 0.8, 0.8, 1.0)
+
+CONTACT_NODE_GROUP = "Contact Disc Instances"
+
+# Orientation properties the contacts take from their interval, with the defaults of add_custom_properties
+CONTACT_ORIENTATION = {'azimuth': 0.0, 'dip': 0.0, 'polarity': 1.0}
+
+def get_contact_node_group():
+    # Shared Geometry Nodes tree that puts a disc instance on every contact point, turned by the point's
+    # 'rotation' attribute. The disc is the same size as the contact disc objects.
+    node_group = bpy.data.node_groups.get(CONTACT_NODE_GROUP)
+    if node_group is not None:
+        return node_group
+
+    node_group = bpy.data.node_groups.new(CONTACT_NODE_GROUP, 'GeometryNodeTree')
+    node_group.interface.new_socket(name="Geometry", in_out='INPUT', socket_type='NodeSocketGeometry')
+    radius_socket = node_group.interface.new_socket(name="Radius", in_out='INPUT', socket_type='NodeSocketFloat')
+    radius_socket.default_value = 20.0
+    radius_socket.min_value = 0.0
+    node_group.interface.new_socket(name="Geometry", in_out='OUTPUT', socket_type='NodeSocketGeometry')
+
+    nodes = node_group.nodes
+    links = node_group.links
+    group_input = nodes.new("NodeGroupInput")
+    disc = nodes.new("GeometryNodeMeshCircle")
+    disc.fill_type = 'NGON'
+    disc.inputs["Vertices"].default_value = 32
+    rotation_attribute = nodes.new("GeometryNodeInputNamedAttribute")
+    rotation_attribute.data_type = 'FLOAT_VECTOR'
+    rotation_attribute.inputs["Name"].default_value = "rotation"
+    instance_on_points = nodes.new("GeometryNodeInstanceOnPoints")
+    group_output = nodes.new("NodeGroupOutput")
+
+    group_input.location = (0, 0)
+    disc.location = (200, -200)
+    rotation_attribute.location = (200, -400)
+    instance_on_points.location = (400, 0)
+    group_output.location = (600, 0)
+
+    links.new(group_input.outputs[0], instance_on_points.inputs["Points"])
+    links.new(group_input.outputs[1], disc.inputs["Radius"])
+    links.new(disc.outputs["Mesh"], instance_on_points.inputs["Instance"])
+    links.new(rotation_attribute.outputs["Attribute"], instance_on_points.inputs["Rotation"])
+    links.new(instance_on_points.outputs["Instances"], group_output.inputs[0])
+    return node_group
+
+def create_contact_points(name, locations, values, sources, collection):
+    # Every contact as a vertex of one mesh instead of an object each. Point attributes: 'formation'
+    # (integer codes, the names in a custom property of the mesh, as the contact objects are named),
+    # azimuth, dip and polarity of the interval and the disc 'rotation' (as the structural discs use them).
+    mesh = bpy.data.meshes.new(name)
+    mesh.vertices.add(len(locations))
+    mesh.vertices.foreach_set("co", np.asarray(locations, dtype=np.float32).ravel())
+
+    codes, formations = pd.factorize(pd.Series([f"{value}_contact" for value in values], dtype=object))
+    attribute = mesh.attributes.new(name="formation", type='INT', domain='POINT')
+    attribute.data.foreach_set('value', codes.astype(np.int32))
+    mesh["formation"] = list(formations)
+
+    orientation = {
+        prop: np.array([float(source.get(prop, default)) for source in sources], dtype=np.float32)
+        for prop, default in CONTACT_ORIENTATION.items()
+    }
+    for prop, prop_values in orientation.items():
+        attribute = mesh.attributes.new(name=prop, type='FLOAT', domain='POINT')
+        attribute.data.foreach_set('value', prop_values)
+    rotation = np.column_stack((
+        np.radians(orientation['dip']), np.zeros(len(locations)), np.radians(-(orientation['azimuth'] + 180))
+    ))
+    attribute = mesh.attributes.new(name="rotation", type='FLOAT_VECTOR', domain='POINT')
+    attribute.data.foreach_set('vector', rotation.astype(np.float32).ravel())
+    mesh.update()
+
+    contacts = bpy.data.objects.new(name, mesh)
+    modifier = contacts.modifiers.new(name="Contact Disc Instances", type='NODES')
+    modifier.node_group = get_contact_node_group()
+    collection.objects.link(contacts)
+    return contacts
+
+def interval_end_points(objects):
+    # Upper and lower end points of the two point interval curves as (N, 3) arrays, read with one
+    # foreach_get per curve. Returns the curves too, in the same order.
+    curves = [obj for obj in objects if obj.data.splines and len(obj.data.splines[0].points) == 2]
+    co = np.empty((len(curves), 8), dtype=np.float32)
+    for row, obj in zip(co, curves):
+        obj.data.splines[0].points.foreach_get("co", row)
+    points = co.reshape(-1, 2, 4)[:, :, :3].astype(float)
+    first_upper = points[:, 0, 2] > points[:, 1, 2]
+    first_lower = points[:, 0, 2] < points[:, 1, 2]
+    upper = np.where(first_upper[:, None], points[:, 0], points[:, 1])
+    lower = np.where(first_lower[:, None], points[:, 0], points[:, 1])
+    return curves, upper, lower
+
+def contact_mask(values, upper, lower):
+    # Intervals whose lower end point is the upper end point of an interval with another value. End
+    # points are matched on coordinates rounded to 6 decimals by sorting them together, instead of a
+    # lookup and a comparison of objects per interval. Empty values never make a contact.
+    n = len(values)
+    has_value = np.array([bool(value) for value in values], dtype=bool)
+    if not has_value.any():
+        return has_value
+    codes = pd.factorize(pd.Series(values, dtype=object))[0]
+
+    # Number every distinct end point: sort by x, y, z and start a new number where a point differs
+    points = np.round(np.concatenate((upper, lower)), 6)
+    order = np.lexsort((points[:, 2], points[:, 1], points[:, 0]))
+    new_point = np.any(points[order][1:] != points[order][:-1], axis=1)
+    position = np.empty(2 * n, dtype=np.int64)
+    position[order] = np.concatenate(([0], np.cumsum(new_point)))
+    upper_position, lower_position = position[:n], position[n:]
+
+    # Number of different values with an upper end at each position, and one of them
+    value_range = codes.max() + 1
+    pairs = pd.unique(upper_position[has_value] * value_range + codes[has_value])
+    pair_position, pair_value = np.divmod(pairs, value_range)
+    value_count = np.bincount(pair_position, minlength=2 * n)
+    upper_value = np.full(2 * n, -1)
+    upper_value[pair_position] = pair_value
+
+    above_count = value_count[lower_position]
+    return has_value & ((above_count > 1) | ((above_count == 1) & (upper_value[lower_position] != codes)))
+
 class OBJECT_OT_apply_color_changes(bpy.types.Operator): # main operator, misleading name here
     bl_idname = "object.apply_color_changes"
     bl_label = "Apply Color Changes"
@@ -86,18 +247,16 @@ class OBJECT_OT_apply_color_changes(bpy.types.Operator): # main operator, mislea
             self.report({'ERROR'}, "Collection not found")
             return {'CANCELLED'}
 
-        # Cache all curve objects that have the selected property
-        all_objects = [
-            obj for obj in collection.all_objects 
-            if obj.type == 'CURVE' and props.selected_property in obj
-        ]
+        # Cache all curve objects that have the selected property, their values from the custom
+        # properties or the attribute store rows
+        curve_objects = [obj for obj in collection.all_objects if obj.type == 'CURVE']
+        curve_values = object_values(curve_objects, props.selected_property)
+        all_objects = [obj for obj, value in zip(curve_objects, curve_values) if value is not None]
 
         property_type, property_data = self.get_property_type_and_data(collection, props.selected_property)
         log_scale_property_type, log_scale_property_data = self.get_property_type_and_data(collection, props.log_scale_property)
 
         if props.contacts_to_point and property_type == 'CATEGORICAL':
-            from collections import defaultdict
-
             # Create collection name based on the selected property
             contacts_collection_name = f"Conatacts_{props.selected_property}"
 
@@ -107,85 +266,71 @@ class OBJECT_OT_apply_color_changes(bpy.types.Operator): # main operator, mislea
                 contacts_collection = bpy.data.collections.new(contacts_collection_name)
                 bpy.context.scene.collection.children.link(contacts_collection)
 
-            # Build a map of upper vertex positions to objects
-            upper_vertex_map = defaultdict(list)
-
-            for obj in all_objects:
-                curve = obj.data
-                if curve.splines and len(curve.splines[0].points) == 2:
-                    spline = curve.splines[0]
-                    points = spline.points
-                    upper_vertex = points[0] if points[0].co.z > points[1].co.z else points[1]
-                    position = tuple(round(coord, 6) for coord in upper_vertex.co.xyz)
-                    upper_vertex_map[position].append(obj)
-
-            # iterate over all objects to find contacts
-            for obj in all_objects:
-                obj_property_value = obj.get(props.selected_property, None)
-                curve = obj.data
-
-                if curve.splines and len(curve.splines[0].points) == 2:
-                    spline = curve.splines[0]
-                    points = spline.points
-
-                    lower_vertex = points[0] if points[0].co.z < points[1].co.z else points[1]
-                    position = tuple(round(coord, 6) for coord in lower_vertex.co.xyz)
-                    contact = False
-
-                    # Retrieve objects with upper vertices at the same position
-                    potential_contacts = upper_vertex_map.get(position, [])
-                    for other_obj in potential_contacts:
-                        if other_obj != obj:
-                            other_obj_property_value = other_obj.get(props.selected_property, None)
-                            if obj_property_value and other_obj_property_value and obj_property_value != other_obj_property_value:
-                                contact = True
-                                break
-
-                    # Create disc if contact detected
-                    if contact:
-                        self.create_disc_at_vertex(lower_vertex.co, obj_property_value, contacts_collection, obj)
+            # End points of every interval as arrays, contacts from one pass over them
+            curves, upper, lower = interval_end_points(all_objects)
+            values = object_values(curves, props.selected_property)
+            contacts = np.flatnonzero(contact_mask(values, upper, lower))
+
+            if props.contacts_mode == 'POINTS':
+                create_contact_points(
+                    f"{props.selected_property}_contacts", lower[contacts], [values[index] for index in contacts],
+                    [curves[index] for index in contacts], contacts_collection
+                )
+            else:
+                # Every disc has a mesh of its own, copied from one disc built here, so editing a disc
+                # (its material, size) leaves the others as they are
+                template = self.create_disc_mesh(20, CONTACT_DISC_MESH)
+                for index in contacts:
+                    self.create_disc_at_vertex(lower[index], values[index], contacts_collection, curves[index], template)
+                bpy.data.meshes.remove(template)
         
 
-        color_map = {}
-        normalization = None
-        for obj in collection.all_objects:
-            if obj.type == 'CURVE' and props.selected_property in obj:
-                value = obj.get(props.selected_property, "").strip()
+        # Objects with a value, their colours from one colormap call over all of them
+        colored = []
+        for obj, value in zip(curve_objects, curve_values):
+            if value is not None:
+                value = str(value).strip()
                 if value:
-                    try:
-                        float_value = float(value) if property_type == 'NUMERICAL' else value
-                        color, cmap, norm = self.map_color(float_value, props.color_ramp_options, property_type, property_data, props)
-                        color_map[value] = color  # Store color for legend creation
-                        self.apply_color(obj, color)
-                        if norm:  # Store the normalization used only if it's defined
-                            normalization = norm
-                        if props.log_scale and props.log_scale_property in obj:
-                            size_value_str = obj[props.log_scale_property]
-                            try:
-                                size_value = float(size_value_str)
-                                max_value = max(log_scale_property_data['values'])
-                                min_value = min(log_scale_property_data['values'])
-                                min_size = 2 * props.size_multiplier # 2 and 12 set as bounds to start, maybe make this a user input?
-                                max_size = 12 * props.size_multiplier
-
-                                if props.use_full_data_range:
-                                    size_value = min_size + ((size_value - min_value) / (max_value - min_value)) * (max_size - min_size)
-                                else:
-                                    size_value = min_size + (np.log1p(size_value) / np.log1p(max_value)) * (max_size - min_size)
-                                
-                                obj.data.bevel_depth = size_value
-                            except ValueError:
-                                # If size_value_str cannot be converted to float, use default size
-                                obj.data.bevel_depth = props.size
-                        else:
-                            obj.data.bevel_depth = props.size
-                        obj.name = value
-                    except ValueError:
-                        continue
+                    colored.append((obj, value))
                 else:
                     self.apply_default_settings(obj)
                     obj.name = "Drill Trace"
-            
+        colors, mapped, normalization = map_colors(
+            [value for obj, value in colored], props.color_ramp_options, property_type, property_data,
+            props.adjust_for_outliers, props.scaling_factor
+        )
+        size_values = log_scale_property_data['values']
+        if props.log_scale and len(size_values):
+            min_value, max_value = min(size_values), max(size_values)
+
+        size_values_str = object_values([obj for obj, value in colored], props.log_scale_property)
+
+        color_map = {}
+        self.color_hole_meshes(collection, props, property_type, property_data, color_map)
+        for (obj, value), color, has_color, size_value_str in zip(colored, colors, mapped, size_values_str):
+            if not has_color:
+                continue  # not a number, or not one of the categories
+            color_map[value] = color  # Store color for legend creation
+            self.apply_color(obj, color, props.color_mode)
+            if props.log_scale and size_value_str is not None:
+                try:
+                    size_value = float(size_value_str)
+                    min_size = 2 * props.size_multiplier # 2 and 12 set as bounds to start, maybe make this a user input?
+                    max_size = 12 * props.size_multiplier
+
+                    if props.use_full_data_range:
+                        size_value = min_size + ((size_value - min_value) / (max_value - min_value)) * (max_size - min_size)
+                    else:
+                        size_value = min_size + (np.log1p(size_value) / np.log1p(max_value)) * (max_size - min_size)
+                    
+                    obj.data.bevel_depth = size_value
+                except ValueError:
+                    # If size_value_str cannot be converted to float, use default size
+                    obj.data.bevel_depth = props.size
+            else:
+                obj.data.bevel_depth = props.size
+            obj.name = value
+
 
         
         bpy.context.view_layer.update()
@@ -196,14 +341,37 @@ class OBJECT_OT_apply_color_changes(bpy.types.Operator): # main operator, mislea
 
         return {'FINISHED'}
 
-    def create_disc_at_vertex(self, location, obj_property_value, contacts_collection, source_obj):
+    def color_hole_meshes(self, collection, props, property_type, property_data, color_map):
+        # Mesh per hole imports: a colour per interval in the 'color' edge attribute, which the tubes
+        # show. Intervals without a value are drawn in the trace colour.
+        meshes = hole_meshes(collection)
+        if not meshes:
+            return
+        store, rows = hole_mesh_store(meshes, props.selected_property)
+        values = store.text(props.selected_property, rows)
+        colors, mapped, _ = map_colors(
+            values, props.color_ramp_options, property_type, property_data,
+            props.adjust_for_outliers, props.scaling_factor
+        )
+        colors = np.array(colors, dtype=np.float32).reshape(-1, 4)
+        colors[~mapped] = HOLE_TRACE_COLOR
+        for value, color in zip(values[mapped], colors[mapped]):
+            color_map.setdefault(value, tuple(color))
+        start = 0
+        for obj in meshes:
+            stop = start + len(obj.data.edges)
+            set_color_attribute(obj, colors[start:stop], 'EDGE')
+            start = stop
+
+    def create_disc_at_vertex(self, location, obj_property_value, contacts_collection, source_obj, template):
         
-        disc_mesh = self.create_disc_mesh(20, f"{obj_property_value}_contact")
+        disc_mesh = template.copy()
+        disc_mesh.name = f"{obj_property_value}_contact"
         disc_obj = bpy.data.objects.new(f"{obj_property_value}_contact", disc_mesh)
         contacts_collection.objects.link(disc_obj)
         
         # Set the location of the disc
-        disc_obj.location = (location.x, location.y, location.z)
+        disc_obj.location = (location[0], location[1], location[2])
 
         # Add the custom property 'name' to the disc
         disc_obj['name'] = obj_property_value
@@ -256,6 +424,13 @@ class OBJECT_OT_apply_color_changes(bpy.types.Operator): # main operator, mislea
         obj.data.materials.clear()
 
     def get_property_type_and_data(self, collection, prop_name):
+        found = collection_store(collection, 'CURVE')
+        if found and prop_name in found[0].columns:
+            return property_type_and_data(found[0], prop_name, found[2])
+        meshes = hole_meshes(collection)
+        if meshes:
+            store, rows = hole_mesh_store(meshes, prop_name)
+            return property_type_and_data(store, prop_name, rows)
         raw_values = [obj[prop_name] for obj in collection.all_objects if prop_name in obj and obj[prop_name] not in [None, '', 'N/A']]
         converted_values = []
         for value in raw_values:
@@ -274,51 +449,18 @@ class OBJECT_OT_apply_color_changes(bpy.types.Operator): # main operator, mislea
             unique_values = list(set(raw_values))
             return ('CATEGORICAL', {'values': unique_values})
 
-    def map_color(self, value, cmap_name, property_type, property_data, props):
-        cmap = plt.get_cmap(cmap_name)
-        norm = None  # Initialize norm to None
-        if property_type == 'NUMERICAL' and 'values' in property_data:
-            if props.adjust_for_outliers:
-                q75, q25 = np.percentile(property_data['values'], [75, 25])
-                iqr = q75 - q25
-                lower_bound = q25 - (props.scaling_factor * iqr)
-                upper_bound = q75 + (props.scaling_factor * iqr)
-
-                filtered_values = [v for v in property_data['values'] if lower_bound <= v <= upper_bound]
-                min_val = min(filtered_values) if filtered_values else q25
-                max_val = max(filtered_values) if filtered_values else q75
-            else:
-                min_val = property_data['min']
-                max_val = property_data['max']
-
-            norm = plt.Normalize(min_val, max_val)
-            normalized_value = norm(float(value)) if max_val > min_val else 0.0
-        elif property_type == 'CATEGORICAL':
-            unique_categories = property_data['values']
-            category_index = unique_categories.index(value)
-            normalized_value = category_index / (len(unique_categories) - 1) if len(unique_categories) > 1 else 0.0
+    def apply_color(self, object, color, color_mode='MATERIAL'):
+        # Curves share one material per palette colour, re-colouring only swaps the material in the slot.
+        # With Object Colour they all share one material and only the object colour changes.
+        if color_mode == 'OBJECT_COLOR':
+            object.color = (color[0], color[1], color[2], 1)
+            material = get_object_color_material()
         else:
-            normalized_value = 0.5
-
-        rgba_color = cmap(normalized_value)
-        return rgba_color, cmap, norm
-
-
-    def apply_color(self, object, color):
+            material = get_palette_material(color)
         if not object.data.materials:
-            material = bpy.data.materials.new(name="CurveMaterial")
-            material.use_nodes = True
-            emission = material.node_tree.nodes.new(type='ShaderNodeEmission')
-            material.node_tree.links.new(emission.outputs['Emission'], material.node_tree.nodes.get('Material Output').inputs['Surface'])
             object.data.materials.append(material)
-        else:
-            material = object.data.materials[0]
-
-        emission = material.node_tree.nodes.get('Emission')
-        if not emission:
-            emission = material.node_tree.nodes.new(type='ShaderNodeEmission')
-            material.node_tree.links.new(emission.outputs['Emission'], material.node_tree.nodes.get('Material Output').inputs['Surface'])
-        emission.inputs['Color'].default_value = (color[0], color[1], color[2], 1)
+        elif object.data.materials[0] != material:
+            object.data.materials[0] = material
 
     def create_legend_image(self, cmap_name, values, property_type, color_map, property_name, normalization):
         fig, ax = plt.subplots(figsize=(2, 2))  
@@ -391,9 +533,12 @@ class OBJECT_PT_custom_panel(bpy.types.Panel): # UI panel
             layout.prop(mytool, "selected_property", text="Attribute")
             if mytool.selected_property:
                 layout.prop(mytool, "color_ramp_options", text="Color Ramp")
+                layout.prop(mytool, "color_mode", text="Color With")
                 layout.prop(mytool, "size", text="Size")
                 if mytool.selected_property_type == 'CATEGORICAL':
                     layout.prop(mytool, "contacts_to_point", text="Contacts to Points")
+                    if mytool.contacts_to_point:
+                        layout.prop(mytool, "contacts_mode", text="Contacts As")
                 if mytool.selected_property_type == 'NUMERICAL':
                     layout.prop(mytool, "adjust_for_outliers", text="Colormap Normalization")
                     if mytool.adjust_for_outliers:
@@ -421,6 +566,15 @@ class MyProperties(bpy.types.PropertyGroup):
         description="Choose a color ramp",
         items=get_color_ramp_items
     )
+    color_mode: bpy.props.EnumProperty(
+        name="Color With",
+        description="How the colours are applied to the curves",
+        items=[
+            ('MATERIAL', "Material per Color", "One emission material for each colour of the color ramp"),
+            ('OBJECT_COLOR', "Object Color", "Write the colour to each curve's object colour, shown by one shared material (and by Solid shading set to Object color)")
+        ],
+        default='MATERIAL'
+    )
     adjust_for_outliers: bpy.props.BoolProperty(
         name="Adjust for Outliers",
         description="Enable to normalize color distribution by removing outliers",
@@ -472,6 +626,15 @@ class MyProperties(bpy.types.PropertyGroup):
         description="Create spheres at contacts between different curves",
         default=False
     )
+    contacts_mode: bpy.props.EnumProperty(
+        name="Contacts As",
+        description="How the contacts are added to the scene",
+        items=[
+            ('OBJECTS', "Disc per Contact", "One disc object per contact with the interval's azimuth, dip and polarity as custom properties"),
+            ('POINTS', "Instanced Points", "One mesh with a vertex per contact and the formation, azimuth, dip and polarity as point attributes, drawn as disc instances by Geometry Nodes, for many contacts")
+        ],
+        default='OBJECTS'
+    )
 
 def register():
     bpy.utils.register_class(MyProperties)
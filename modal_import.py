@@ -0,0 +1,153 @@
+import os
+import threading
+import time
+
+import bpy
+
+from .attribute_store import remove_store
+
+
+# Seconds of object creation per timer tick, the UI is redrawn and handles events in between
+BATCH_SECONDS = 0.1
+TIMER_SECONDS = 0.05
+
+
+class ModalImport:
+    # Import operators mix this in to run without blocking Blender. When started from the UI the file
+    # is read on a background thread, then the objects are created in time slices on timer ticks with
+    # progress and rows per second in the status bar. Esc or an error removes what was created. Undo and
+    # redo are blocked until the import is done.
+    # execute() runs the same steps in one go, for scripts and redo.
+    #
+    # The operator provides:
+    #   check_inputs(context) -> bool, reads the scene settings into the operator (main thread)
+    #   read_data() -> data, reads the file without touching bpy (background thread), passing
+    #       self.cancel (a threading.Event, set on Esc) to the readers so they stop between chunks
+    #   check_data(data) -> report lines, optional vectorized checks of what was read, also on the
+    #       background thread. The lines are reported as warnings before any object is created, and
+    #       raising an error here stops the import before it starts.
+    #   create_geometry(context, data), a generator that creates the objects, adds everything it creates
+    #       to self.created (and the stores it saves to self.created_stores) and yields (rows done, total rows) often
+    import_label = "Importing"
+
+    def execute(self, context):
+        if not self.check_inputs(context):
+            return {'CANCELLED'}
+        self.created = []
+        self.created_stores = []
+        self.cancel = threading.Event()
+        try:
+            data = self.read_data()
+            self.report_checks(self.check_data(data))
+            for _ in self.create_geometry(context, data):
+                pass
+        except Exception as e:
+            self.remove_created()
+            self.report({'ERROR'}, str(e))
+            return {'CANCELLED'}
+        return {'FINISHED'}
+
+    def invoke(self, context, event):
+        if not self.check_inputs(context):
+            return {'CANCELLED'}
+        self.created = []
+        self.created_stores = []
+        self.cancel = threading.Event()
+        self.data = None
+        self.checks = []
+        self.read_error = None
+        self.steps = None
+        self.progress = (0, 0)
+        self.reader = threading.Thread(target=self.read_in_background, daemon=True)
+        self.reader.start()
+
+        window_manager = context.window_manager
+        self.timer = window_manager.event_timer_add(TIMER_SECONDS, window=context.window)
+        window_manager.modal_handler_add(self)
+        context.workspace.status_text_set(f"{self.import_label}: reading {os.path.basename(self.filepath)}... (Esc to cancel)")
+        return {'RUNNING_MODAL'}
+
+    def read_in_background(self):
+        try:
+            self.data = self.read_data()
+            self.checks = self.check_data(self.data)
+        except Exception as e:
+            self.read_error = e
+
+    def check_data(self, data):
+        return []
+
+    def report_checks(self, messages):
+        for message in messages:
+            self.report({'WARNING'}, message)
+
+    def modal(self, context, event):
+        if event.type == 'ESC' and event.value == 'PRESS':
+            # The reader stops at its next chunk or byte range, submitting no more ranges to the workers
+            self.cancel.set()
+            self.finish(context)
+            self.remove_created()
+            self.report({'WARNING'}, "Import cancelled, the objects created so far were removed.")
+            return {'CANCELLED'}
+        if event.type == 'Z' and (event.ctrl or event.oskey):
+            # Undo, redo and undo history would reload the file under the reader and the created objects,
+            # leaving self.created and the create_geometry generator with invalid references
+            if event.value == 'PRESS':
+                self.report({'WARNING'}, "Undo is not available while importing, press Esc to cancel the import.")
+            return {'RUNNING_MODAL'}
+        if event.type != 'TIMER':
+            return {'PASS_THROUGH'}
+        if self.reader.is_alive():
+            return {'RUNNING_MODAL'}
+        if self.read_error is not None:
+            self.finish(context)
+            self.report({'ERROR'}, str(self.read_error))
+            return {'CANCELLED'}
+
+        if self.steps is None:
+            self.report_checks(self.checks)
+            self.steps = self.create_geometry(context, self.data)
+            self.data = None
+            self.start_time = time.perf_counter()
+            context.window_manager.progress_begin(0, 100)
+
+        # Create objects until this tick's time is up
+        deadline = time.perf_counter() + BATCH_SECONDS
+        try:
+            while time.perf_counter() < deadline:
+                self.progress = next(self.steps)
+        except StopIteration:
+            self.finish(context)
+            return {'FINISHED'}
+        except Exception as e:
+            self.finish(context)
+            self.remove_created()
+            self.report({'ERROR'}, str(e))
+            return {'CANCELLED'}
+
+        done, total = self.progress
+        rate = done / max(time.perf_counter() - self.start_time, 1e-6)
+        context.window_manager.progress_update(100 * done / max(total, 1))
+        context.workspace.status_text_set(f"{self.import_label}: {done:,} of {total:,} rows ({rate:,.0f} rows/s), Esc to cancel")
+        return {'RUNNING_MODAL'}
+
+    def finish(self, context):
+        window_manager = context.window_manager
+        window_manager.event_timer_remove(self.timer)
+        if self.steps is not None:
+            window_manager.progress_end()
+            self.steps.close()
+        context.workspace.status_text_set(None)
+
+    def remove_created(self):
+        # The objects, their data when nothing else uses it, the collections and the attribute stores made
+        # by this import
+        ids = set(self.created)
+        for item in self.created:
+            if isinstance(item, bpy.types.Object) and item.data is not None and item.data.users == 1:
+                ids.add(item.data)
+        bpy.data.batch_remove(ids)
+        self.created = []
+        for store_path in self.created_stores:
+            remove_store(store_path)
+        self.created_stores = []
@@ -1,9 +1,16 @@
 import bpy
+from ..attribute_store import collection_store, store_properties, value_summary, query_mask, collection_point_cloud, set_mesh_attribute
 
 
 def get_unique_properties(collection):
     unique_props = set()
     if collection:
+        found = collection_store(collection, 'MESH')
+        if found:  # imported with an attribute store, the column names are already known
+            return store_properties(found[0], found[1])
+        cloud = collection_point_cloud(collection)
+        if cloud:
+            return cloud[0].column_names()
         for obj in collection.all_objects:
             if obj and obj.type == 'MESH':
                 for key in obj.keys():
@@ -25,6 +32,12 @@ def update_properties_list(self, context):
 def update_query_values(props, context):
     collection = bpy.data.collections.get(props.collection_name)
     if collection and props.data_query_property:
+        found = collection_store(collection, 'MESH') or collection_point_cloud(collection)
+        if found and props.data_query_property in found[0].columns:
+            store, objects, rows = found
+            set_query_values(props, *value_summary(store, props.data_query_property, rows))
+            return
+
         values = [obj.get(props.data_query_property) for obj in collection.all_objects if obj and props.data_query_property in obj and obj[props.data_query_property] not in [None, '', 'N/A']]
         converted_values = []
         for value in values:
@@ -35,22 +48,28 @@ def update_query_values(props, context):
 
         if converted_values:
             if all(isinstance(value, (float, int)) for value in converted_values):
-                props.selected_property_type = 'NUMERICAL'
-                props.numerical_min = min(converted_values)
-                props.numerical_max = max(converted_values)
+                set_query_values(props, 'NUMERICAL', (min(converted_values), max(converted_values)))
             else:
-                props.selected_property_type = 'CATEGORICAL'
-                props.categorical_values.clear()
-                unique_values = set(converted_values)
-                for val in unique_values:
-                    item = props.categorical_values.add()
-                    item.name = val
-                    item.selected = True
+                set_query_values(props, 'CATEGORICAL', set(converted_values))
         else:
-            props.selected_property_type = ''
-            props.numerical_min = 0
-            props.numerical_max = 0
-            props.categorical_values.clear()
+            set_query_values(props, '', None)
+
+def set_query_values(props, property_type, values): # values is (min, max) for NUMERICAL, the categories for CATEGORICAL
+    if property_type == 'NUMERICAL':
+        props.selected_property_type = 'NUMERICAL'
+        props.numerical_min, props.numerical_max = values
+    elif property_type == 'CATEGORICAL':
+        props.selected_property_type = 'CATEGORICAL'
+        props.categorical_values.clear()
+        for val in values:
+            item = props.categorical_values.add()
+            item.name = val
+            item.selected = True
+    else:
+        props.selected_property_type = ''
+        props.numerical_min = 0
+        props.numerical_max = 0
+        props.categorical_values.clear()
 
 class CategoricalValue(bpy.types.PropertyGroup):
     name: bpy.props.StringProperty()
@@ -97,7 +116,29 @@ class OBJECT_OT_apply_data_query_mesh(bpy.types.Operator):
             self.report({'ERROR'}, f"An error occurred while clearing the query: {e}")
             return {'CANCELLED'}
 
-        # Apply new query
+        # Apply new query, on the attribute store in one go when the collection has one
+        found = collection_store(collection, 'MESH')
+        if found and props.data_query_property in found[0].columns:
+            store, objects, rows = found
+            selected = [item.name for item in props.categorical_values if item.selected]
+            visible = query_mask(store, props.data_query_property, rows, props.selected_property_type,
+                                 selected, props.numerical_min, props.numerical_max)
+            for obj, show in zip(objects, visible):
+                obj.hide_set(not show)
+            bpy.context.view_layer.update()
+            return {'FINISHED'}
+
+        # A point cloud hides its points through the 'visible' attribute the sphere instancer reads
+        cloud = collection_point_cloud(collection)
+        if cloud and props.data_query_property in cloud[0].columns:
+            store, obj, rows = cloud
+            selected = [item.name for item in props.categorical_values if item.selected]
+            visible = query_mask(store, props.data_query_property, rows, props.selected_property_type,
+                                 selected, props.numerical_min, props.numerical_max)
+            set_mesh_attribute(obj, "visible", visible, 'BOOLEAN', 'POINT')
+            bpy.context.view_layer.update()
+            return {'FINISHED'}
+
         try:
             for obj in collection.all_objects:
                 if obj is None or obj.type != 'MESH':
@@ -155,6 +196,10 @@ class OBJECT_OT_reset_query_mesh(bpy.types.Operator):
             for obj in collection.all_objects:
                 if obj and obj.type == 'MESH':
                     obj.hide_set(False)
+            cloud = collection_point_cloud(collection)
+            if cloud and "visible" in cloud[1].data.attributes:
+                cloud[1].data.attributes.remove(cloud[1].data.attributes["visible"])
+                cloud[1].data.update()
         except Exception as e:
             print(f"An error occurred: {e}")
             self.report({'ERROR'}, f"An error occurred: {e}")
@@ -4,8 +4,19 @@ from matplotlib.colors import LinearSegmentedColormap
 import tempfile
 import os
 import numpy as np
+from ..attribute_store import (
+    collection_store, store_properties, value_summary, property_type_and_data, collection_point_cloud, object_values,
+    set_color_attribute
+)
+from ..color_mapping import map_colors, get_object_color_material
 
 def get_unique_properties(collection):
+    found = collection_store(collection, 'MESH')
+    if found:  # imported with an attribute store, the column names are already known
+        return store_properties(found[0], found[1])
+    cloud = collection_point_cloud(collection)
+    if cloud:
+        return cloud[0].column_names()
     unique_props = set()
     for obj in collection.all_objects:
         if obj.type == 'MESH':
@@ -37,16 +48,22 @@ def get_color_ramp_items(self, context):
 def update_property_type_and_color_ramp(props, context): # dynamic color ramp options
     collection = bpy.data.collections.get(props.collection_name)
     if collection and props.selected_property:
-        values = [obj[props.selected_property] for obj in collection.all_objects if props.selected_property in obj and obj[props.selected_property] not in [None, '', 'N/A']]
         global color_ramp_items
-        converted_values = []
-        for value in values:
-            try:
-                converted_values.append(float(value))
-            except ValueError:
-                converted_values.append(value)
-
-        if all(isinstance(value, (float, int)) for value in converted_values):  # drop-down list for numerical color ramps ##### can add any matplotlib color-ramp 
+        found = collection_store(collection, 'MESH') or collection_point_cloud(collection)
+        if found and props.selected_property in found[0].columns:
+            # from the attribute store, numerical when every value is a number
+            is_numerical = value_summary(found[0], props.selected_property, found[2])[0] != 'CATEGORICAL'
+        else:
+            values = [obj[props.selected_property] for obj in collection.all_objects if props.selected_property in obj and obj[props.selected_property] not in [None, '', 'N/A']]
+            converted_values = []
+            for value in values:
+                try:
+                    converted_values.append(float(value))
+                except ValueError:
+                    converted_values.append(value)
+            is_numerical = all(isinstance(value, (float, int)) for value in converted_values)
+
+        if is_numerical:  # drop-down list for numerical color ramps ##### can add any matplotlib color-ramp 
             props.selected_property_type = 'NUMERICAL'
             color_ramp_items = [
                 ('viridis', 'viridis', ''),
@@ -70,6 +87,9 @@ def update_property_type_and_color_ramp(props, context): # dynamic color ramp op
     if context.area:
         context.area.tag_redraw()
 
+# Colour of the points of a point cloud without a value for the coloured attribute
+POINT_DEFAULT_COLOR = (0.8, 0.8, 0.8, 1.0)
+
 def get_viewport_clip_end():
     for area in bpy.context.screen.areas:
         if area.type == 'VIEW_3D':
@@ -98,64 +118,68 @@ class OBJECT_OT_apply_color_changes_mesh(bpy.types.Operator):
         property_type, property_data = self.get_property_type_and_data(collection, props.selected_property)
         log_scale_property_type, log_scale_property_data = self.get_property_type_and_data(collection, props.log_scale_property)
 
-        color_map = {}
-        normalization = None
-        for obj in collection.all_objects:
-            if obj.type == 'MESH' and props.selected_property in obj:
-                value = obj.get(props.selected_property, "")
+        # Objects with a value, their colours from one colormap call over all of them. The values come
+        # from the custom properties or the attribute store rows.
+        mesh_objects = [obj for obj in collection.all_objects if obj.type == 'MESH']
+        colored = []
+        for obj, value in zip(mesh_objects, object_values(mesh_objects, props.selected_property)):
+            if value is not None:
                 
                 if isinstance(value, str):
                     value = value.strip()
                 if value:
+                    colored.append((obj, value))
+                else:
+                    self.apply_default_settings(obj)
+                    obj.name = "Mesh Object"
+        colors, mapped, normalization = map_colors(
+            [value for obj, value in colored], props.color_ramp_options, property_type, property_data,
+            props.adjust_for_outliers, props.scaling_factor
+        )
+        size_values = log_scale_property_data['values']
+        if props.log_scale and len(size_values):
+            min_value, max_value = min(size_values), max(size_values)
+
+        size_values_str = object_values([obj for obj, value in colored], props.log_scale_property)
+
+        color_map = {}
+        self.color_point_cloud(collection, props, property_type, property_data, color_map)
+        for (obj, value), color, has_color, size_value_str in zip(colored, colors, mapped, size_values_str):
+            if not has_color:
+                continue  # not a number, or not one of the categories
+            color_map[value] = color  # Store color for legend creation
+            self.apply_color(obj, color, props.color_mode)
+
+            if props.use_size_scaling:  # if size scaling option is enabled
+                self.store_original_positions(obj)
+                self.reset_to_original_positions(obj)
+
+                if props.log_scale and size_value_str is not None:
                     try:
-                        float_value = float(value) if property_type == 'NUMERICAL' else value
-                        color, cmap, norm = self.map_color(float_value, props.color_ramp_options, property_type, property_data, props)
-                        color_map[value] = color  # Store color for legend creation
-                        self.apply_color(obj, color)
-                        if norm:  # Store the normalization used only if it's defined
-                            normalization = norm
-
-                        if props.use_size_scaling:  # if size scaling option is enabled
-                            self.store_original_positions(obj)
-                            self.reset_to_original_positions(obj)
-
-                            if props.log_scale and props.log_scale_property in obj:
-                                size_value_str = obj[props.log_scale_property]
-                                try:
-                                    size_value = float(size_value_str)
-                                    max_value = max(log_scale_property_data['values'])
-                                    min_value = min(log_scale_property_data['values'])
-                                    min_size = 0.5 * props.size_multiplier
-                                    max_size = 3.5 * props.size_multiplier
-
-                                    if props.use_full_data_range:
-                                        size_value = min_size + ((size_value - min_value) / (max_value - min_value)) * (max_size - min_size)
-                                    else:
-                                        size_value = min_size + (np.log1p(size_value) / np.log1p(max_value)) * (max_size - min_size)
-                                    
-                                    for v in obj.data.vertices:
-                                        v.co.normalize()
-                                        v.co *= size_value
-                                except ValueError:
-                                    # If cannot be converted to float, use default size
-                                    for v in obj.data.vertices:
-                                        v.co.normalize()
-                                        v.co *= props.size
-                            else:
-                                for v in obj.data.vertices:
-                                    v.co.normalize()
-                                    v.co *= props.size
-                        else:
-                            # If size scaling is not enabled, keep vertices as is
-                            pass
+                        size_value = float(size_value_str)
+                        min_size = 0.5 * props.size_multiplier
+                        max_size = 3.5 * props.size_multiplier
 
-                        obj.name = str(value)  # Ensure obj.name is always a string
+                        if props.use_full_data_range:
+                            size_value = min_size + ((size_value - min_value) / (max_value - min_value)) * (max_size - min_size)
+                        else:
+                            size_value = min_size + (np.log1p(size_value) / np.log1p(max_value)) * (max_size - min_size)
+                        
+                        for v in obj.data.vertices:
+                            v.co.normalize()
+                            v.co *= size_value
                     except ValueError:
-                        continue
+                        # If cannot be converted to float, use default size
+                        for v in obj.data.vertices:
+                            v.co.normalize()
+                            v.co *= props.size
                 else:
-                    self.apply_default_settings(obj)
-                    obj.name = "Mesh Object"
-            
+                    for v in obj.data.vertices:
+                        v.co.normalize()
+                        v.co *= props.size
+
+            obj.name = str(value)  # Ensure obj.name is always a string
+
 
         
         bpy.context.view_layer.update()
@@ -166,6 +190,24 @@ class OBJECT_OT_apply_color_changes_mesh(bpy.types.Operator):
 
         return {'FINISHED'}
 
+    def color_point_cloud(self, collection, props, property_type, property_data, color_map):
+        # Instanced point cloud: a colour per point in the 'color' attribute, which the sphere instances
+        # show. Points without a value are grey.
+        cloud = collection_point_cloud(collection)
+        if not cloud or props.selected_property not in cloud[0].columns:
+            return
+        store, obj, rows = cloud
+        values = store.text(props.selected_property, rows)
+        colors, mapped, _ = map_colors(
+            values, props.color_ramp_options, property_type, property_data,
+            props.adjust_for_outliers, props.scaling_factor
+        )
+        colors = np.array(colors, dtype=np.float32).reshape(-1, 4)
+        colors[~mapped] = POINT_DEFAULT_COLOR
+        for value, color in zip(values[mapped], colors[mapped]):
+            color_map.setdefault(value, tuple(color))
+        set_color_attribute(obj, colors, 'POINT')
+
     def store_original_positions(self, obj):
         if obj.name not in self.original_positions:
             self.original_positions[obj.name] = [(v.co.copy()) for v in obj.data.vertices]
@@ -179,6 +221,9 @@ class OBJECT_OT_apply_color_changes_mesh(bpy.types.Operator):
         obj.data.materials.clear()
 
     def get_property_type_and_data(self, collection, prop_name):
+        found = collection_store(collection, 'MESH') or collection_point_cloud(collection)
+        if found and prop_name in found[0].columns:
+            return property_type_and_data(found[0], prop_name, found[2])
         raw_values = [obj[prop_name] for obj in collection.all_objects if prop_name in obj and obj[prop_name] not in [None, '', 'N/A']]
         converted_values = []
         for value in raw_values:
@@ -195,50 +240,25 @@ class OBJECT_OT_apply_color_changes_mesh(bpy.types.Operator):
             unique_values = list(set(raw_values))
             return ('CATEGORICAL', {'values': unique_values})
 
-    def map_color(self, value, cmap_name, property_type, property_data, props):
-        cmap = plt.get_cmap(cmap_name)
-        norm = None  # Initialize norm to None
-        if property_type == 'NUMERICAL' and 'values' in property_data:
-            if props.adjust_for_outliers:
-                q75, q25 = np.percentile(property_data['values'], [75, 25])
-                iqr = q75 - q25
-                lower_bound = q25 - (props.scaling_factor * iqr)
-                upper_bound = q75 + (props.scaling_factor * iqr)
-
-                filtered_values = [v for v in property_data['values'] if lower_bound <= v <= upper_bound]
-                min_val = min(filtered_values) if filtered_values else q25
-                max_val = max(filtered_values) if filtered_values else q75
-            else:
-                min_val = property_data['min']
-                max_val = property_data['max']
-
-            norm = plt.Normalize(min_val, max_val)
-            normalized_value = norm(float(value)) if max_val > min_val else 0.0
-        elif property_type == 'CATEGORICAL':
-            unique_categories = property_data['values']
-            category_index = unique_categories.index(value)
-            normalized_value = category_index / (len(unique_categories) - 1) if len(unique_categories) > 1 else 0.0
+    def apply_color(self, obj, color, color_mode='MATERIAL'):
+        if color_mode == 'OBJECT_COLOR':
+            # The shared material shows the object colour, no material per colour
+            obj.color = (color[0], color[1], color[2], 1)
+            material = get_object_color_material()
         else:
-            normalized_value = 0.5
-
-        rgba_color = cmap(normalized_value)
-        return rgba_color, cmap, norm
+            color_key = tuple(color[:3])
+            material_name = f"Material_{color_key}"
+
+            # Check if the material already exists in Blender
+            material = bpy.data.materials.get(material_name)
+            if not material:
+                # If the material doesn't exist, create a new one
+                material = bpy.data.materials.new(name=material_name)
+                material.use_nodes = True
+                emission = material.node_tree.nodes.new(type='ShaderNodeEmission')
+                material.node_tree.links.new(emission.outputs['Emission'], material.node_tree.nodes.get('Material Output').inputs['Surface'])
+                emission.inputs['Color'].default_value = (color[0], color[1], color[2], 1)
 
-    def apply_color(self, obj, color):
-        color_key = tuple(color[:3])  
-        material_name = f"Material_{color_key}"
-        
-        # Check if the material already exists in Blender
-        material = bpy.data.materials.get(material_name)
-        
-        if not material:
-            # If the material doesn't exist, create a new one
-            material = bpy.data.materials.new(name=material_name)
-            material.use_nodes = True
-            emission = material.node_tree.nodes.new(type='ShaderNodeEmission')
-            material.node_tree.links.new(emission.outputs['Emission'], material.node_tree.nodes.get('Material Output').inputs['Surface'])
-            emission.inputs['Color'].default_value = (color[0], color[1], color[2], 1)
-            
         # Apply the materal to the object
         if not obj.data.materials:
             obj.data.materials.append(material)
@@ -316,6 +336,7 @@ class OBJECT_PT_custom_panel_mesh(bpy.types.Panel): # UI Panel
             layout.prop(mytool, "selected_property", text="Attribute")
             if mytool.selected_property:
                 layout.prop(mytool, "color_ramp_options", text="Color Ramp")
+                layout.prop(mytool, "color_mode", text="Color With")
                 layout.prop(mytool, "use_size_scaling", text="Adjust Size")
                 if mytool.use_size_scaling:
                     layout.prop(mytool, "size", text="Size")
@@ -349,6 +370,15 @@ class MyMeshProperties(bpy.types.PropertyGroup):
         description="Choose a color ramp",
         items=get_color_ramp_items
     )
+    color_mode: bpy.props.EnumProperty(
+        name="Color With",
+        description="How the colours are applied to the points",
+        items=[
+            ('MATERIAL', "Material per Color", "One emission material for each colour of the color ramp"),
+            ('OBJECT_COLOR', "Object Color", "Write the colour to each point's object colour, shown by one shared material (and by Solid shading set to Object color)")
+        ],
+        default='MATERIAL'
+    )
     adjust_for_outliers: bpy.props.BoolProperty(
         name="Adjust for Outliers",
         description="Enable to normalize color distribution by removing outliers",
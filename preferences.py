@@ -1,4 +1,6 @@
 import bpy
+import os
+import types
 
 class GeoModellerPreferences(bpy.types.AddonPreferences):
     bl_idname = __package__  
@@ -15,16 +17,30 @@ class GeoModellerPreferences(bpy.types.AddonPreferences):
         default=True
     )
 
+    import_workers: bpy.props.IntProperty(
+        name="Import Worker Processes",
+        description="Number of CPU cores used to parse large CSV files (64 MB and up) when importing",
+        default=min(os.cpu_count() or 1, 8),
+        min=1,
+        max=64
+    )
+
     def draw(self, context):
         layout = self.layout
         col = layout.column()
         col.label(text="GeoModeller Preferences")
         col.prop(self, "use_scene_crs", text="Use Scene CRS")
         col.prop(self, "use_z_descending", text="Sort Drill Data Z Descending")
+        col.prop(self, "import_workers", text="Import Worker Processes")
 
 def get_preferences():
     return bpy.context.preferences.addons[__package__].preferences
 
+def copy_preferences():
+    # Plain copy of the preference values, for code that runs off the main thread
+    preferences = get_preferences()
+    return types.SimpleNamespace(**{name: getattr(preferences, name) for name in GeoModellerPreferences.__annotations__})
+
 def register_class(cls):
     try:
         bpy.utils.register_class(cls)
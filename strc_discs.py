@@ -1,14 +1,11 @@
 import bpy
 import bmesh
 from math import radians
+from ..attribute_store import object_properties, object_values, ORIENTATION_PROPERTIES
 
 def get_unique_properties(collection):
-    unique_props = set()
-    for obj in collection.all_objects:
-        for key in obj.keys():
-            if key not in {'_RNA_UI', 'cycles'}:
-                unique_props.add(key)
-    return list(unique_props)
+    # Custom properties of the objects and the columns of the attribute stores they reference
+    return object_properties(collection.all_objects)
 
 def update_properties_list(self, context):
     props = context.scene.structural_discs_tool
@@ -73,10 +70,14 @@ def create_disc_object(location, rotation, scale, name, mesh, collection, source
     disc.rotation_euler = rotation
     disc.scale = scale
     
-    # Copy custom properties
+    # Copy custom properties, and the orientation the source only has in its attribute store row (spheres)
     for key, value in source_obj.items():
         if key not in {'_RNA_UI', 'cycles'}:
             disc[key] = value
+    for key in ORIENTATION_PROPERTIES:
+        value = object_values([source_obj], key)[0]
+        if key not in disc and value not in (None, ''):
+            disc[key] = value
 
     collection.objects.link(disc)
     return disc
@@ -111,48 +112,49 @@ class IMPORT_OT_generate_structural_discs(bpy.types.Operator):
 
             skipped_count = 0  # Counter for skipped objects
 
-            for obj in collection.all_objects:
-                if obj.type in {'MESH', 'CURVE'}:
-                    try:
-                        strike_prop = obj.get(props.strike_property, None)
-                        dip_prop = obj.get(props.dip_property, None)
-                        if strike_prop is None or dip_prop is None:
-                            continue
-                        strike = float(strike_prop)
-                        dip = float(dip_prop)
-
-                        # Skip objects with invalid strike or dip
-                        if not (0 <= strike <= 360) or dip > 90:
-                            skipped_count += 1
-                            continue
-                    except (TypeError, ValueError):
+            # Strike and dip of each object from its custom properties or its attribute store row
+            objects = [obj for obj in collection.all_objects if obj.type in {'MESH', 'CURVE'}]
+            strikes = object_values(objects, props.strike_property)
+            dips = object_values(objects, props.dip_property)
+            for obj, strike_prop, dip_prop in zip(objects, strikes, dips):
+                try:
+                    if strike_prop is None or dip_prop is None:
                         continue
+                    strike = float(strike_prop)
+                    dip = float(dip_prop)
 
-                    if obj.type == 'CURVE':
-                        curve = obj.data
-                        if curve.splines and len(curve.splines[0].points) >= 2:
-                            spline = curve.splines[0]
-                            points = spline.points if hasattr(spline, 'points') else spline.bezier_points
-                            low_point = min(points, key=lambda p: p.co.z)
-                            coords = low_point.co[:3]  # Ignore the 'w' for NURBS
-                        else:
-                            continue
-                    elif obj.type == 'MESH' and len(obj.data.vertices) > 0:
-                        coords = obj.location  
+                    # Skip objects with invalid strike or dip
+                    if not (0 <= strike <= 360) or dip > 90:
+                        skipped_count += 1
+                        continue
+                except (TypeError, ValueError):
+                    continue
+
+                if obj.type == 'CURVE':
+                    curve = obj.data
+                    if curve.splines and len(curve.splines[0].points) >= 2:
+                        spline = curve.splines[0]
+                        points = spline.points if hasattr(spline, 'points') else spline.bezier_points
+                        low_point = min(points, key=lambda p: p.co.z)
+                        coords = low_point.co[:3]  # Ignore the 'w' for NURBS
                     else:
                         continue
-
-                    # Calculate rotation
-                    if props.orientation_mode == 'RIGHT_HAND_RULE':
-                        strike = (strike + 90) % 360
-                    rotation = (radians(dip), 0, radians(-(strike + 180)))
-
-                    # Create and link the disc object
-                    disc = create_disc_object(location=coords, rotation=rotation, scale=(props.size, props.size, props.size),
-                                              name=obj.name, mesh=template_mesh, collection=discs_collection, source_obj=obj)
-
-                    # Make the disc's mesh unique
-                    make_mesh_unique(disc)
+                elif obj.type == 'MESH' and len(obj.data.vertices) > 0:
+                    coords = obj.location  
+                else:
+                    continue
+
+                # Calculate rotation
+                if props.orientation_mode == 'RIGHT_HAND_RULE':
+                    strike = (strike + 90) % 360
+                rotation = (radians(dip), 0, radians(-(strike + 180)))
+
+                # Create and link the disc object
+                disc = create_disc_object(location=coords, rotation=rotation, scale=(props.size, props.size, props.size),
+                                          name=obj.name, mesh=template_mesh, collection=discs_collection, source_obj=obj)
+
+                # Make the disc's mesh unique
+                make_mesh_unique(disc)
 
             # Report the number of skipped objects
             if skipped_count > 0:
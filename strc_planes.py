@@ -2,15 +2,12 @@
 import bpy
 import bmesh
 from math import radians
+from ..attribute_store import object_properties, object_values, ORIENTATION_PROPERTIES
 from mathutils import Vector
 
 def get_unique_properties(collection):
-    unique_props = set()
-    for obj in collection.all_objects:
-        for key in obj.keys():
-            if key not in {'_RNA_UI', 'cycles'}:
-                unique_props.add(key)
-    return list(unique_props)
+    # Custom properties of the objects and the columns of the attribute stores they reference
+    return object_properties(collection.all_objects)
 
 def update_properties_list(self, context):
     props = context.scene.structural_planes_tool
@@ -74,10 +71,14 @@ def create_plane_object(location, rotation, name, mesh, collection, source_obj):
     plane.location = location
     plane.rotation_euler = rotation
     
-    # Copy custom properties
+    # Copy custom properties, and the orientation the source only has in its attribute store row (spheres)
     for key, value in source_obj.items():
         if key not in {'_RNA_UI', 'cycles'}:
             plane[key] = value
+    for key in ORIENTATION_PROPERTIES:
+        value = object_values([source_obj], key)[0]
+        if key not in plane and value not in (None, ''):
+            plane[key] = value
 
     collection.objects.link(plane)
     return plane
@@ -114,46 +115,47 @@ class IMPORT_OT_generate_structural_planes(bpy.types.Operator):
             collection_planes = bpy.data.collections.new("structural planes")
             bpy.context.scene.collection.children.link(collection_planes)
 
-            for obj in collection.all_objects:
-                if obj.type in {'MESH', 'CURVE'}:
-                    try:
-                        strike_prop = obj.get(props.strike_property, None)
-                        dip_prop = obj.get(props.dip_property, None)
-                        if strike_prop is None or dip_prop is None:
-                            continue
-                        strike = float(strike_prop)
-                        dip = float(dip_prop)
-                    except (TypeError, ValueError):
+            # Strike and dip of each object from its custom properties or its attribute store row
+            objects = [obj for obj in collection.all_objects if obj.type in {'MESH', 'CURVE'}]
+            strikes = object_values(objects, props.strike_property)
+            dips = object_values(objects, props.dip_property)
+            for obj, strike_prop, dip_prop in zip(objects, strikes, dips):
+                try:
+                    if strike_prop is None or dip_prop is None:
                         continue
-
-                    if obj.type == 'CURVE':
-                        curve = obj.data
-                        if curve.splines and len(curve.splines[0].points) >= 2:
-                            spline = curve.splines[0]
-                            points = spline.points if hasattr(spline, 'points') else spline.bezier_points
-                            low_point = min(points, key=lambda p: p.co.z)
-                            coords = low_point.co[:3]  # Ignore the 'w' for NURBS
-                        else:
-                            continue
-                    elif obj.type == 'MESH' and len(obj.data.vertices) > 0:
-                        coords = obj.location  
+                    strike = float(strike_prop)
+                    dip = float(dip_prop)
+                except (TypeError, ValueError):
+                    continue
+
+                if obj.type == 'CURVE':
+                    curve = obj.data
+                    if curve.splines and len(curve.splines[0].points) >= 2:
+                        spline = curve.splines[0]
+                        points = spline.points if hasattr(spline, 'points') else spline.bezier_points
+                        low_point = min(points, key=lambda p: p.co.z)
+                        coords = low_point.co[:3]  # Ignore the 'w' for NURBS
                     else:
                         continue
-
-                    if props.orientation_mode == 'RIGHT_HAND_RULE':
-                        strike = (strike + 90) % 360
-                    rotation = (radians(dip), 0, radians(-(strike + 180)))
-
-                    mesh = create_plane_mesh(plane_size, obj.name)
-                    plane = create_plane_object(location=coords, rotation=rotation, name=obj.name, mesh=mesh, collection=collection_planes, source_obj=obj)
-                    bpy.context.view_layer.objects.active = plane
-
-                    # Perform boolean clipping
-                    modifier = plane.modifiers.new(name="Boolean", type='BOOLEAN')
-                    modifier.operation = 'INTERSECT'
-                    modifier.solver = 'FAST'
-                    modifier.use_self = True  # Enable Self Intersection
-                    modifier.object = bounding_obj
+                elif obj.type == 'MESH' and len(obj.data.vertices) > 0:
+                    coords = obj.location  
+                else:
+                    continue
+
+                if props.orientation_mode == 'RIGHT_HAND_RULE':
+                    strike = (strike + 90) % 360
+                rotation = (radians(dip), 0, radians(-(strike + 180)))
+
+                mesh = create_plane_mesh(plane_size, obj.name)
+                plane = create_plane_object(location=coords, rotation=rotation, name=obj.name, mesh=mesh, collection=collection_planes, source_obj=obj)
+                bpy.context.view_layer.objects.active = plane
+
+                # Perform boolean clipping
+                modifier = plane.modifiers.new(name="Boolean", type='BOOLEAN')
+                modifier.operation = 'INTERSECT'
+                modifier.solver = 'FAST'
+                modifier.use_self = True  # Enable Self Intersection
+                modifier.object = bounding_obj
                     
 
         except Exception as e:
@@ -0,0 +1,78 @@
+# Table reading checks that run outside Blender.
+# Run from the tests folder (the add-on's own __init__ needs bpy): python -m pytest
+
+import os
+import sys
+import threading
+
+import numpy as np
+import pandas as pd
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import data_io
+from data_io import read_arrays, read_csv_table, ReadCancelled
+
+
+def write_csv(tmp_path, rows):
+    file_path = tmp_path / "holes.csv"
+    file_path.write_text("HOLEID,X,Y,Z\n" + "".join(f"{hole},{i},0,0\n" for i, hole in enumerate(rows)))
+    return str(file_path)
+
+
+def text_values(column):
+    codes, strings = column
+    return [strings[code] for code in codes]
+
+
+def test_text_column_across_chunk_boundary(tmp_path):
+    # HOLEID reads as numbers in the first chunk and turns out to hold text in the second
+    file_path = write_csv(tmp_path, ['1001', '1002', '1003', 'A1004', 'A1005', '0007'])
+    expected = ['1001', '1002', '1003', 'A1004', 'A1005', '0007']
+    for chunksize in (1, 2, 3, 10):
+        columns = read_arrays(file_path, ['X', 'Y', 'Z'], chunksize=chunksize)
+        assert text_values(columns['HOLEID']) == expected
+
+
+def test_text_column_with_skipped_rows(tmp_path):
+    # Rows without coordinates are left out of the chunks read again as text too
+    file_path = tmp_path / "holes.csv"
+    file_path.write_text("HOLEID,X,Y,Z\n1001,0,0,0\n1002,,0,0\n1003,2,0,0\nA1004,3,0,0\n")
+    for chunksize in (1, 2, 3, 10):
+        columns = read_arrays(str(file_path), ['X', 'Y', 'Z'], chunksize=chunksize)
+        assert text_values(columns['HOLEID']) == ['1001', '1003', 'A1004']
+        np.testing.assert_array_equal(columns['X'], [0, 2, 3])
+
+
+def test_number_column_across_chunk_boundary(tmp_path):
+    file_path = write_csv(tmp_path, ['1', '2.5', '', '4'])
+    for chunksize in (1, 3, 10):
+        columns = read_arrays(file_path, ['X', 'Y', 'Z'], chunksize=chunksize)
+        np.testing.assert_array_equal(columns['HOLEID'], [1, 2.5, np.nan, 4])
+
+
+def test_parallel_read_matches_sequential(tmp_path, monkeypatch):
+    # Byte ranges of a few rows each, the hole IDs only turn into text in the last ones
+    monkeypatch.setattr(data_io, 'PARALLEL_MIN_BYTES', 0)
+    rows = [f"{1001 + i}" for i in range(40)] + ['A1041', '0007']
+    file_path = write_csv(tmp_path, rows)
+
+    columns = read_arrays(file_path, ['X', 'Y', 'Z'], workers=2)
+    assert text_values(columns['HOLEID']) == rows
+
+    table = read_csv_table(file_path, workers=2)
+    assert table.equals(pd.read_csv(file_path))
+    assert list(table['HOLEID']) == rows
+
+
+def test_cancelled_read(tmp_path, monkeypatch):
+    # A set cancel event stops the read before the first chunk or byte range
+    file_path = write_csv(tmp_path, [f"{1001 + i}" for i in range(40)])
+    cancel = threading.Event()
+    cancel.set()
+    with pytest.raises(ReadCancelled):
+        read_arrays(file_path, ['X', 'Y', 'Z'], chunksize=10, cancel=cancel)
+    monkeypatch.setattr(data_io, 'PARALLEL_MIN_BYTES', 0)
+    with pytest.raises(ReadCancelled):
+        read_arrays(file_path, ['X', 'Y', 'Z'], workers=2, cancel=cancel)
@@ -0,0 +1,26 @@
+# Desurvey checks that run outside Blender.
+# Run from the tests folder (the add-on's own __init__ needs bpy): python -m pytest
+
+import os
+import sys
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from desurvey_engine import iter_hole_chunks
+
+
+def hole_ids(file_path, hole_dtype):
+    chunks = iter_hole_chunks(str(file_path), 'HOLEID', chunksize=3, hole_dtype=hole_dtype)
+    return [[hole for hole in chunk['HOLEID']] for chunk in chunks]
+
+
+def test_hole_chunks_match_collar_hole_ids(tmp_path):
+    # Chunks of whole holes, the last one with text hole IDs
+    file_path = tmp_path / "intervals.csv"
+    file_path.write_text("HOLEID,FROM,TO\n0007,0,10\n0007,10,20\n1002,0,10\nA1003,0,10\nA1003,10,20\n")
+    # Text collar IDs: the interval IDs as they are in the file
+    assert hole_ids(file_path, np.dtype(object)) == [['0007', '0007'], ['1002'], ['A1003', 'A1003']]
+    # Numeric collar IDs: numbers where a chunk has no text
+    assert hole_ids(file_path, np.dtype(np.int64)) == [[7, 7], [1002], ['A1003', 'A1003']]